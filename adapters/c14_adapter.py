@@ -1,8 +1,9 @@
-import json
 import os
-import glob
 from datetime import datetime
+from adapters.common.article import Article, read_articles, write_articles
+from adapters.common.storage import base_name, data_files, data_path
 from analysis.utils.time_labels import is_time_label, parse_hebrew_time_label
+from pipeline.instrument import count, span
 
 raw_dir = "data/raw"
 out_dir = "data/adapted"
@@ -23,6 +24,8 @@ out_dir = "data/adapted"
 def adapt_records(raw_records):
     out = []
     for record in raw_records:
+        if not isinstance(record, Article):
+            record = Article.from_dict(record)
         published = record.get("published", "").strip()
         if is_time_label(published):
 
@@ -48,22 +51,22 @@ def adapt_records(raw_records):
 def main():
     # 1) Load raw data
     i = -1
-    for in_path in glob.glob(os.path.join(raw_dir, "c14_scraped_*.json")):
+    for in_path in data_files(raw_dir, "c14_scraped_"):
         i += 1
         print(f"Processing file {i}")
-        with open(in_path, "r", encoding="utf-8") as f:
-            raw_records = json.load(f)      #list of dicts
+        raw_records = read_articles(in_path)      #list of Articles
     
     # 2) Adapt each record
-        adapted_records = adapt_records(raw_records)
+        with span("adapt"):
+            adapted_records = adapt_records(raw_records)
+        count("records_in", len(raw_records))
+        count("records_out", len(adapted_records))
 
      # 3) decide output filename
-        filename = os.path.basename(in_path).replace("scraped_", "adapted_")
-        out_path = os.path.join(out_dir, filename)
+        out_path = data_path(os.path.join(out_dir, base_name(in_path).replace("scraped_", "adapted_")))
     
      # 4) save
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(adapted_records, f, ensure_ascii=False, indent=2)
+        write_articles(out_path, adapted_records)
     
     print(f"C14 Adapted data saved to {out_path}")
 
@@ -0,0 +1,83 @@
+# adapters/common/day_files.py
+"""
+Which data/processed files cover which days: the date in a daily file's name,
+the days in a monthly partition's footer (adapters/common/partition.py), and
+date-window pushdown over both (select_parts). Stdlib only: the loader in
+analysis/group_similar.py and the archive tool analysis/streaming_tfidf.py
+share it without one importing the other.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from adapters.common.partition import partition_files, read_footer
+from adapters.common.storage import data_files
+
+DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def file_date(path) -> Optional[date]:
+    """Date from names like combined_2025-08-25.json (None if the name has no date)."""
+    m = DATE_IN_NAME.search(Path(path).stem)
+    if not m:
+        return None
+    try:
+        return date.fromisoformat(m.group(1))
+    except ValueError:
+        return None
+
+
+def _partition_days(f: Path) -> List[date]:
+    try:
+        return [date.fromisoformat(d) for d in read_footer(f)["days"]]
+    except Exception as e:
+        print(f"[WARN] Failed reading partition footer {f}: {e}")
+        return []
+
+
+def select_parts(processed_dir, date_from=None, date_to=None, window_days=None, slack_days: int = 1):
+    """
+    Pick what's worth opening: [(path, days)], days=None for a daily file (read it
+    whole), else the ISO days wanted from a monthly partition (pipeline/compact.py).
+    Daily files go by the date in their name, partitions by the days in their footer;
+    a daily file wins over the same day in a partition (it was rewritten after compaction).
+    Files are named by scrape date, and an article is scraped on/after its publish
+    date, so a window [from, to] needs days from .. to + slack_days.
+    window_days (without date_from) counts back from date_to or the newest day.
+    Files without a date in the name are always kept.
+    """
+    p = Path(processed_dir)
+    files = data_files(p)                          # .json / .jsonl, plain or .gz / .zst
+    dated = [(f, file_date(f)) for f in files]
+    daily = {d for _, d in dated if d is not None}
+    parts = [(f, [d for d in _partition_days(f) if d not in daily]) for f in partition_files(p)]
+    days = list(daily) + [d for _, ds in parts for d in ds]
+    date_from = date.fromisoformat(date_from) if isinstance(date_from, str) else date_from
+    date_to = date.fromisoformat(date_to) if isinstance(date_to, str) else date_to
+
+    if date_from is None and window_days and days:
+        anchor = date_to or max(days)
+        date_from = anchor - timedelta(days=window_days - 1)
+    hi = date_to + timedelta(days=slack_days) if date_to else None
+
+    def wanted(d):
+        return (date_from is None or d >= date_from) and (hi is None or d <= hi)
+
+    keep = [(f, None) for f, d in dated if d is None or wanted(d)]
+    for f, ds in parts:
+        ds = [d.isoformat() for d in ds if wanted(d)]
+        if ds:
+            keep.append((f, ds))
+    if date_from is not None or date_to is not None:
+        print(f"[INFO] Date pushdown: opening {len(keep)} of {len(files) + len(parts)} files "
+              f"({date_from or '…'} .. {date_to or '…'})")
+    return keep
+
+
+def select_files(processed_dir, date_from=None, date_to=None, window_days=None, slack_days: int = 1):
+    """Paths only (see select_parts)."""
+    return [f for f, _ in select_parts(processed_dir, date_from=date_from, date_to=date_to,
+                                       window_days=window_days, slack_days=slack_days)]
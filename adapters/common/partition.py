@@ -0,0 +1,183 @@
+# adapters/common/partition.py
+"""
+Monthly columnar partition: many daily record files -> one file per month.
+
+    data/processed/combined_2025-08.partition
+
+Layout (everything little-endian):
+
+    b"IMMP1\\n"
+    column chunks        one zlib'd JSON array per (day, column)
+    footer               JSON, see below
+    uint64 footer length + b"IMMP"
+
+Rows are grouped by day (a day = one former combined_<date> file) and sorted by
+source inside a day, so the footer can say where everything is:
+
+    {"version": 1, "month": "2025-08", "rows": 5321, "columns": ["title", ...],
+     "days": {"2025-08-01": {"rows": [0, 812],
+                             "sources": {"c14": [0, 390], "n12": [390, 812]},
+                             "chunks": {"title": [offset, length], ...},
+                             "missing": {"summary": [3, 17]}}, ...}}
+
+A reader opens the footer only (a few KB), then decompresses just the chunks for
+the days and columns it asked for. "missing" lists the rows (day-relative) that
+didn't have the key at all, so records come back exactly as they went in.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from adapters.common.article import ArticleBatch
+
+SUFFIX = ".partition"
+MAGIC = b"IMMP1\n"
+TAIL = b"IMMP"
+LEVEL = 6
+
+
+def partition_files(directory, prefix: str = "") -> List[Path]:
+    d = Path(directory)
+    if not d.is_dir():
+        return []
+    return sorted(p for p in d.glob(f"{prefix}*{SUFFIX}") if p.is_file())
+
+
+def partition_path(directory, prefix: str, month: str) -> Path:
+    """partition_path("data/processed", "combined", "2025-08") -> data/processed/combined_2025-08.partition"""
+    return Path(directory) / f"{prefix}_{month}{SUFFIX}"
+
+
+def _source_key(v) -> str:
+    return "" if v is None else str(v)
+
+
+def write_partition(path, days: Dict[str, list]) -> dict:
+    """
+    days: {"2025-08-01": [records...]} -> one partition file (atomic). Returns the footer.
+    Within a day rows are stably sorted by source.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp{os.getpid()}")
+    footer = {"version": 1, "month": None, "rows": 0, "columns": [], "days": {}}
+    columns: Dict[str, None] = {}
+    try:
+        with tmp.open("wb") as fh:
+            fh.write(MAGIC)
+            row = 0
+            for day in sorted(days):
+                recs = sorted(days[day], key=lambda r: _source_key(r.get("source")))
+                batch = ArticleBatch.from_records(recs)
+                entry = {"rows": [row, row + len(batch)], "sources": {}, "chunks": {}, "missing": {}}
+                src = [_source_key(r.get("source")) for r in recs]
+                for i, s in enumerate(src):
+                    if s not in entry["sources"]:
+                        entry["sources"][s] = [row + i, row + i]
+                    entry["sources"][s][1] = row + i + 1
+                for col, values in batch.columns.items():
+                    blob = zlib.compress(json.dumps(values, ensure_ascii=False).encode("utf-8"), LEVEL)
+                    entry["chunks"][col] = [fh.tell(), len(blob)]
+                    fh.write(blob)
+                    columns.setdefault(col, None)
+                    if batch.missing.get(col):
+                        entry["missing"][col] = sorted(batch.missing[col])
+                footer["days"][day] = entry
+                row += len(batch)
+            footer["rows"] = row
+            footer["columns"] = list(columns)
+            footer["month"] = min(days)[:7] if days else None
+            raw = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+            fh.write(raw)
+            fh.write(struct.pack("<Q", len(raw)) + TAIL)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return footer
+
+
+def read_footer(path) -> dict:
+    with open(path, "rb") as fh:
+        fh.seek(-12, os.SEEK_END)
+        n, tail = struct.unpack("<Q", fh.read(8))[0], fh.read(4)
+        if tail != TAIL:
+            raise ValueError(f"not a partition file: {path}")
+        fh.seek(-12 - n, os.SEEK_END)
+        return json.loads(fh.read(n).decode("utf-8"))
+
+
+def partition_days(path) -> List[str]:
+    return sorted(read_footer(path)["days"])
+
+
+def _rows_for(entry: dict, sources: Optional[set]) -> Optional[List[Tuple[int, int]]]:
+    """Day-relative row ranges for these sources (None = the whole day)."""
+    if sources is None:
+        return None
+    start = entry["rows"][0]
+    return [(a - start, b - start) for s, (a, b) in sorted(entry["sources"].items()) if s in sources]
+
+
+def read_partition(path, columns: Optional[Iterable[str]] = None, days: Optional[Iterable[str]] = None,
+                   sources: Optional[Iterable[str]] = None, footer: Optional[dict] = None) -> Tuple[int, Dict[str, list], Dict[str, set]]:
+    """
+    (n_rows, {column: values}, {column: rows without the key}) for the chosen days / sources.
+    Only the needed chunks are read and decompressed. A `_file_date` column holds each row's day.
+    """
+    footer = footer or read_footer(path)
+    days = None if days is None else set(days)
+    columns = None if columns is None else set(columns)
+    sources = None if sources is None else {_source_key(s) for s in sources}
+    wanted_days = [d for d in sorted(footer["days"]) if days is None or d in days]
+    cols = [c for c in footer["columns"] if columns is None or c in columns]
+    out: Dict[str, list] = {c: [] for c in cols}
+    missing: Dict[str, set] = {}
+    file_date: list = []
+    n = 0
+    with open(path, "rb") as fh:
+        for day in wanted_days:
+            entry = footer["days"][day]
+            size = entry["rows"][1] - entry["rows"][0]
+            ranges = _rows_for(entry, sources)
+            keep = list(range(size)) if ranges is None else [i for a, b in ranges for i in range(a, b)]
+            for c in cols:
+                if c in entry["chunks"]:
+                    off, length = entry["chunks"][c]
+                    fh.seek(off)
+                    values = json.loads(zlib.decompress(fh.read(length)).decode("utf-8"))
+                    gone = set(entry["missing"].get(c, ()))
+                else:                                   # column not present that day
+                    values, gone = [None] * size, set(range(size))
+                out[c].extend(values if ranges is None else [values[i] for i in keep])
+                for j, i in enumerate(keep):
+                    if i in gone:
+                        missing.setdefault(c, set()).add(n + j)
+            file_date.extend([day] * len(keep))
+            n += len(keep)
+    out["_file_date"] = file_date
+    return n, out, missing
+
+
+def iter_partition_records(path, days: Optional[Iterable[str]] = None, sources: Optional[Iterable[str]] = None,
+                           day_key: Optional[str] = None) -> Iterator[dict]:
+    """Records as they were written (missing keys stay missing), day by day.
+    day_key="_file_date" also stamps each record with its day."""
+    footer = read_footer(path)
+    days = None if days is None else set(days)
+    for day in sorted(footer["days"]):
+        if days is not None and day not in days:
+            continue
+        n, cols, missing = read_partition(path, days=[day], sources=sources, footer=footer)
+        cols.pop("_file_date")
+        batch = ArticleBatch(cols, n, missing)
+        for i in range(n):
+            rec = batch[i].to_dict()
+            if day_key:
+                rec[day_key] = day
+            yield rec
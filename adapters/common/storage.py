@@ -0,0 +1,287 @@
+# adapters/common/storage.py
+"""
+Record files on disk: one place that knows how data/raw, data/adapted,
+data/processed (and clusters.jsonl) are stored.
+
+Everything used to be pretty-printed JSON lists (indent=2): most of the bytes
+were indentation and the same keys repeated per record, and a reader had to
+parse the whole file before seeing the first record. Now the format comes from
+the extension:
+
+    name.json          JSON list (the old layout, still read and written)
+    name.jsonl         one record per line
+    name.jsonl.gz      gzip'd JSONL (stdlib)            <- default for new files
+    name.jsonl.zst     zstd JSONL (needs `pip install zstandard`)
+    name.json.gz / name.json.zst also work
+
+Readers stream: iter_records() decompresses and parses one line at a time for
+JSONL, so memory stays at one record (a .json list still has to be loaded whole).
+Writers go through a temp file + rename, so a crash never leaves half a file,
+and drop other-format copies of the same name (a day file rewritten as
+.jsonl.gz replaces its old .json).
+
+New files get DEFAULT_EXT; set MEDIA_MONITOR_STORAGE=.jsonl.zst (or .json to
+keep the old layout) to change it.
+
+One-shot migration of an existing archive:
+
+    python main.py migrate                               # raw, adapted, processed, clusters.jsonl -> .jsonl.gz
+    python main.py migrate data/processed --to .jsonl.zst --keep
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+SUFFIXES = (".jsonl.zst", ".jsonl.gz", ".json.zst", ".json.gz", ".jsonl", ".json")   # longest match first
+CODECS = {".gz": "gz", ".zst": "zst"}
+DEFAULT_EXT = os.environ.get("MEDIA_MONITOR_STORAGE") or ".jsonl.gz"
+# what `migrate` converts by default: record folders + each clustering run's clusters.jsonl
+# (not data/clustered/lineage/lineage.jsonl, which is appended to)
+MIGRATE_PATHS = ("data/raw", "data/adapted", "data/processed", "data/clustered/*/clusters.jsonl")
+GZIP_LEVEL = 6           # ~same ratio as 9 on this text, much faster to write
+ZSTD_LEVEL = 10
+
+
+def data_suffix(path) -> Optional[str]:
+    """'.jsonl.gz' for 'combined_2025-08-22.jsonl.gz'; None for anything that isn't a record file."""
+    name = Path(path).name
+    for s in SUFFIXES:
+        if name.endswith(s):
+            return s
+    return None
+
+
+def detect(path) -> Tuple[str, Optional[str]]:
+    """(format, codec): ("jsonl", "gz"), ("json", None), ..."""
+    s = data_suffix(path)
+    if s is None:
+        raise ValueError(f"not a record file (expected one of {', '.join(SUFFIXES)}): {path}")
+    parts = s.split(".")                      # ['', 'jsonl', 'gz']
+    return parts[1], CODECS.get("." + parts[2]) if len(parts) > 2 else None
+
+
+def base_name(path) -> str:
+    """File name without its record suffix: 'n12_rss_2025-08-22'."""
+    name = Path(path).name
+    s = data_suffix(name)
+    return name[:-len(s)] if s else Path(name).stem
+
+
+def data_path(base, ext: Optional[str] = None) -> Path:
+    """'data/raw/n12_rss_2025-08-22' -> Path('data/raw/n12_rss_2025-08-22.jsonl.gz')."""
+    return Path(str(base) + (ext or DEFAULT_EXT))
+
+
+def data_files(directory, prefix: str = "") -> List[Path]:
+    """Every record file in directory whose name starts with prefix, sorted by name."""
+    d = Path(directory)
+    if not d.is_dir():
+        return []
+    return sorted(p for p in d.iterdir()
+                  if p.is_file() and p.name.startswith(prefix) and not p.name.startswith(".") and data_suffix(p))
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard is not installed (pip install zstandard) -- needed for .zst files") from None
+    return zstandard
+
+
+class _GzipWriter(gzip.GzipFile):
+    """GzipFile over a file it owns, with an empty name and mtime 0 in the header:
+    the same records always give the same bytes (gzip.open stamps the temp file's
+    name and the current time, which changed every content hash downstream)."""
+
+    def __init__(self, path, mode: str):
+        self._raw = open(path, mode)
+        super().__init__(filename="", mode=mode, compresslevel=GZIP_LEVEL, fileobj=self._raw, mtime=0)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def open_data(path, mode: str = "rt"):
+    """open() that (de)compresses by extension. Text modes are UTF-8."""
+    _, codec = detect(path)
+    binary = "b" in mode
+    if codec == "gz":
+        if any(c in mode for c in "wax"):
+            stream = _GzipWriter(path, mode.replace("t", "").replace("b", "") + "b")
+            return stream if binary else io.TextIOWrapper(stream, encoding="utf-8")
+        if binary:
+            return gzip.open(path, mode)
+        return gzip.open(path, mode, encoding="utf-8")
+    if codec == "zst":
+        zstd = _zstd()
+        writing = any(c in mode for c in "wax")
+        raw = open(path, mode.replace("t", "").replace("b", "") + "b")
+        stream = (zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) if writing
+                  else zstd.ZstdDecompressor().stream_reader(raw))
+        return stream if binary else io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding=None if binary else "utf-8")
+
+
+def iter_records(path) -> Iterator[dict]:
+    """Records one by one; JSONL is decompressed + parsed line by line."""
+    fmt, _ = detect(path)
+    with open_data(path, "rt") as fh:
+        if fmt == "jsonl":
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        obj = json.load(fh)
+    recs = obj if isinstance(obj, list) else obj.get("records", []) if isinstance(obj, dict) else []
+    yield from recs
+
+
+def read_records(path) -> list:
+    """Whole file at once. JSONL is decompressed in one go and parsed as a single JSON array
+    (json.dumps never writes a raw newline inside a record), per line if that fails."""
+    fmt, _ = detect(path)
+    if fmt != "jsonl":
+        return list(iter_records(path))
+    with open_data(path, "rb") as fh:
+        data = fh.read().strip()
+    if not data:
+        return []
+    try:
+        return json.loads(b"[" + data.replace(b"\n", b",") + b"]")
+    except ValueError:                       # blank lines / stray whitespace between records
+        return [json.loads(line) for line in data.split(b"\n") if line.strip()]
+
+
+def _plain(r):
+    return r.to_dict() if hasattr(r, "to_dict") else r
+
+
+def write_records(path, records: Iterable, indent: Optional[int] = 2, replace_other_formats: bool = True) -> Path:
+    """
+    Write records (dicts or Articles) in the format of path's extension, atomically.
+    indent only applies to .json lists (the old pretty-printed layout).
+    """
+    path = Path(path)
+    fmt, _ = detect(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{base_name(path)}.tmp{os.getpid()}{data_suffix(path)}")    # same suffix -> same codec
+    try:
+        with open_data(tmp, "wt") as fh:
+            if fmt == "jsonl":
+                for r in records:
+                    fh.write(json.dumps(_plain(r), ensure_ascii=False))
+                    fh.write("\n")
+            else:
+                json.dump([_plain(r) for r in records], fh, ensure_ascii=False, indent=indent)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    if replace_other_formats:
+        base = base_name(path)
+        for other in data_files(path.parent, base):
+            if other != path and base_name(other) == base:
+                other.unlink()
+    return path
+
+
+# --- migration ---
+def _read_seconds(path, repeat: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for _ in iter_records(path):
+            pass
+    return (time.perf_counter() - t0) / repeat
+
+
+def migrate_file(path, to: str = DEFAULT_EXT, keep: bool = False) -> Optional[dict]:
+    """Rewrite one record file as `to`; verified by reading it back before the original goes."""
+    src = Path(path)
+    if data_suffix(src) == to:
+        return None
+    recs = read_records(src)
+    dst = data_path(src.parent / base_name(src), to)
+    write_records(dst, recs, replace_other_formats=False)
+    if read_records(dst) != recs:
+        dst.unlink()
+        raise RuntimeError(f"round trip mismatch for {src}; original kept")
+    out = {"src": str(src), "dst": str(dst), "records": len(recs),
+           "bytes_before": src.stat().st_size, "bytes_after": dst.stat().st_size,
+           "read_s_before": _read_seconds(src), "read_s_after": _read_seconds(dst)}
+    if not keep:
+        src.unlink()
+    return out
+
+
+def _migrate_targets(paths: Iterable, to: str) -> List[Path]:
+    files = []
+    for p in paths:
+        p = str(p)
+        found = [Path(x) for x in sorted(glob.glob(p))] if any(c in p for c in "*?[") else [Path(p)]
+        for f in found:
+            files += data_files(f) if f.is_dir() else [f] if f.is_file() and data_suffix(f) else []
+    return [f for f in files if data_suffix(f) != to and not f.name.startswith(".")]
+
+
+def migrate(paths: Iterable = MIGRATE_PATHS, to: str = DEFAULT_EXT, keep: bool = False, dry_run: bool = False) -> dict:
+    """Every record file in these folders / files / globs -> `to`."""
+    if to not in SUFFIXES:
+        raise ValueError(f"--to must be one of {', '.join(SUFFIXES)}")
+    files = _migrate_targets(paths, to)
+    total = {"files": 0, "records": 0, "bytes_before": 0, "bytes_after": 0, "read_s_before": 0.0, "read_s_after": 0.0}
+    if dry_run:
+        for f in files:
+            print(f"[INFO] would migrate {f} -> {data_path(f.parent / base_name(f), to).name}")
+        total["files"] = len(files)
+        return total
+    for f in files:
+        try:
+            r = migrate_file(f, to=to, keep=keep)
+        except Exception as e:
+            print(f"[WARN] {f}: {e}")
+            continue
+        if r is None:
+            continue
+        total["files"] += 1
+        for k in ("records", "bytes_before", "bytes_after", "read_s_before", "read_s_after"):
+            total[k] += r[k]
+    if total["files"]:
+        ratio = total["bytes_before"] / max(1, total["bytes_after"])
+        speed = total["read_s_before"] / max(1e-9, total["read_s_after"])
+        print(f"[INFO] Migrated {total['files']} files ({total['records']} records) to {to}: "
+              f"{total['bytes_before'] / 2**20:.1f} MB -> {total['bytes_after'] / 2**20:.1f} MB ({ratio:.1f}x smaller), "
+              f"full read {total['read_s_before']:.2f}s -> {total['read_s_after']:.2f}s ({speed:.1f}x)")
+    else:
+        print(f"[INFO] Nothing to migrate (everything in {', '.join(map(str, paths))} is already {to})")
+    return total
+
+
+def build_parser(ap: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    ap = ap or argparse.ArgumentParser(description="Convert record files to compressed JSONL.")
+    ap.add_argument("paths", nargs="*", default=list(MIGRATE_PATHS),
+                    help="Folders, files or globs to convert (default: raw/adapted/processed + clusters.jsonl of every run)")
+    ap.add_argument("--to", default=DEFAULT_EXT, choices=list(SUFFIXES), help="Target format")
+    ap.add_argument("--keep", action="store_true", help="Keep the original files")
+    ap.add_argument("--dry-run", action="store_true", help="Only list what would be converted")
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return migrate(args.paths, to=args.to, keep=args.keep, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# analysis/bench/bench_article_memory.py
+"""
+Memory / copy benchmark: dict records vs Article (__slots__) vs ArticleBatch (columns).
+
+Raw records are synthetic scraper output (analysis/bench/synthetic_corpus.py)
+repeated with unique urls up to --n, serialized to JSON and parsed back in
+chunks, the way the pipeline reads data/raw and data/processed. For each
+representation we keep what the parse produced and report tracemalloc's
+retained bytes per record (the JSON text itself is freed chunk by chunk):
+
+- dict    : json.loads output as is
+- article : Article.from_dict per record, dicts dropped (interned source)
+- batch   : ArticleBatch.from_records, one list per field
+
+Then the per-record copy preprocess() does (dict(r) before, Article.coerce now)
+and the memory of --processed-n preprocessed records (dicts vs Articles).
+
+Usage:
+  python -m analysis.bench.bench_article_memory                # 1M raw records
+  python -m analysis.bench.bench_article_memory --n 200000 --processed-n 20000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from adapters.common.article import Article, ArticleBatch
+from analysis.bench.synthetic_corpus import generate_raw
+from analysis.preprocessing import preprocess
+
+
+def _chunks(base, n: int, chunk: int):
+    """JSON text of n records (base repeated, url made unique), chunk records at a time."""
+    for start in range(0, n, chunk):
+        recs = []
+        for i in range(start, min(n, start + chunk)):
+            r = dict(base[i % len(base)])
+            r["url"] = f"{r['url']}-{i}"
+            recs.append(r)
+        yield json.dumps(recs, ensure_ascii=False)
+
+
+def retained(build, base, n: int, chunk: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    kept = build(json.loads(text) for text in _chunks(base, n, chunk))
+    wall = time.perf_counter() - t0
+    gc.collect()
+    cur, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return {"mb": round(cur / 2**20, 1), "bytes_per_record": round(cur / n, 1), "wall_s": round(wall, 2)}
+
+
+def _as_dicts(parts):
+    out = []
+    for p in parts:
+        out.extend(p)
+    return out
+
+
+def _as_articles(parts):
+    out = []
+    for p in parts:
+        out.extend(Article.from_dict(d) for d in p)
+    return out
+
+
+def _as_batch(parts):
+    return ArticleBatch.from_records(r for p in parts for r in p)
+
+
+def copy_cost(base, n: int) -> dict:
+    dicts = [dict(base[i % len(base)]) for i in range(n)]
+    arts = [Article.from_dict(d) for d in dicts]
+    t0 = time.perf_counter()
+    for r in dicts:
+        dict(r)
+    t_dict = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for r in arts:
+        Article.coerce(r)
+    t_art = time.perf_counter() - t0
+    return {"dict_copy_us": round(t_dict / n * 1e6, 3), "article_copy_us": round(t_art / n * 1e6, 3)}
+
+
+def processed_memory(base, n: int) -> dict:
+    raw = [dict(base[i % len(base)], url=f"{base[i % len(base)]['url']}-{i}") for i in range(n)]
+    text = json.dumps([r.to_dict() for r in preprocess(raw)], ensure_ascii=False)
+    del raw
+    out = {}
+    for name in ("dict", "article"):
+        gc.collect()
+        tracemalloc.start()
+        parsed = json.loads(text)
+        kept = parsed if name == "dict" else [Article.from_dict(d) for d in parsed]
+        del parsed
+        gc.collect()
+        cur = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        out[name] = {"mb": round(cur / 2**20, 1), "bytes_per_record": round(cur / n, 1)}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory of dict vs Article vs ArticleBatch records.")
+    ap.add_argument("--n", type=int, default=1_000_000, help="Raw records")
+    ap.add_argument("--processed-n", type=int, default=100_000, help="Preprocessed records (preprocess is the slow part)")
+    ap.add_argument("--chunk", type=int, default=50_000, help="Records per parsed JSON chunk")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="data/bench", help="Folder for results json + history.jsonl")
+    args = ap.parse_args()
+
+    # what the scrapers write: drop the corpus' ground-truth event_id (it would land in Article.extra)
+    base = [{k: v for k, v in r.items() if k != "event_id"} for r in generate_raw(5000, seed=args.seed)]
+    results = {}
+    for name, build in (("dict", _as_dicts), ("article", _as_articles), ("batch", _as_batch)):
+        results[name] = retained(build, base, args.n, args.chunk)
+        print(f"[INFO] {args.n} raw records as {name:7s}: {results[name]['mb']} MB "
+              f"({results[name]['bytes_per_record']} B/record, built in {results[name]['wall_s']}s)")
+    for name in ("article", "batch"):
+        saved = 1 - results[name]["mb"] / results["dict"]["mb"]
+        print(f"[INFO] {name} vs dict: {saved:+.1%} memory saved")
+    results["copy"] = copy_cost(base, min(args.n, 200_000))
+    print(f"[INFO] per-record copy in preprocess: dict(r) {results['copy']['dict_copy_us']}us, "
+          f"Article.coerce {results['copy']['article_copy_us']}us")
+    if args.processed_n:
+        results["processed"] = processed_memory(base, args.processed_n)
+        p = results["processed"]
+        print(f"[INFO] {args.processed_n} processed records: dict {p['dict']['bytes_per_record']} B/record, "
+              f"Article {p['article']['bytes_per_record']} B/record")
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = time.strftime("%Y-%m-%d_%H-%M-%S")
+    report = {"benchmark": "article_memory", "timestamp": ts, "params": vars(args), "results": results}
+    out_file = out_dir / f"article_memory_{ts}.json"
+    out_file.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    with (out_dir / "history.jsonl").open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(report, ensure_ascii=False) + "\n")
+    print(f"[INFO] Saved results to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# analysis/bench/bench_clustering.py
+"""
+Speed / memory / quality benchmark for analysis/group_similar.py.
+
+For every corpus size it:
+1) generates a deterministic synthetic corpus (analysis/bench/synthetic_corpus.py)
+   and writes it as combined_<date>.json files into a temp processed dir,
+2) times + memory-profiles load_articles(), cluster() and save_cluster_outputs(),
+3) scores the labels against the planted events (pairwise P/R/F1 + ARI).
+
+Results are written as JSON (one file per run) and appended to history.jsonl,
+so a regression shows up as a diff between two lines.
+
+Usage:
+  python -m analysis.bench.bench_clustering                      # 1k + 10k
+  python -m analysis.bench.bench_clustering --sizes 1000 10000 100000 --out data/bench
+
+Notes:
+- Peak memory is measured with tracemalloc (numpy/scipy allocations included).
+  tracemalloc adds overhead to pure-Python code, so compare timings only against
+  runs with the same --no-memory setting.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from analysis import group_similar
+from analysis.bench.quality import pairwise_scores
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.token_cache import TokenVocab
+
+
+def measure(fn, *args, trace_memory: bool = True, **kwargs):
+    """Run fn(*args, **kwargs); return (result, stats) with wall/cpu seconds and peak MB."""
+    if trace_memory:
+        tracemalloc.start()
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        peak = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    stats = {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4)}
+    if peak is not None:
+        stats["peak_mb"] = round(peak / 2**20, 2)
+    return result, stats
+
+
+def run_one(n: int, seed: int, threshold: float, max_articles, trace_memory: bool, days: int,
+            cluster_opts: dict = None) -> dict:
+    vocab = TokenVocab()
+    records = generate_corpus(n, seed=seed, days=days, vocab=vocab)
+    with tempfile.TemporaryDirectory(prefix="imm_bench_") as tmp:
+        processed = Path(tmp) / "processed"
+        clustered = Path(tmp) / "clustered"
+        write_corpus(records, processed, vocab=vocab)
+        del records
+
+        df, t_load = measure(group_similar.load_articles, str(processed), trace_memory=trace_memory)
+        kwargs = {"threshold": threshold, **(cluster_opts or {})}
+        if max_articles is not None:
+            kwargs["max_articles"] = max_articles
+        (df2, labels), t_cluster = measure(group_similar.cluster, df, trace_memory=trace_memory, **kwargs)
+        _, t_save = measure(group_similar.save_cluster_outputs, df2, labels,
+                            out_dir=str(clustered), trace_memory=trace_memory)
+
+        scores = pairwise_scores(df2["event_id"].to_numpy(), labels)
+
+    return {
+        "n": n,
+        "n_loaded": int(len(df)),
+        "n_clustered": int(len(df2)),
+        "n_clusters": int(len(set(labels.tolist()))),
+        "n_events": int(df2["event_id"].nunique()),
+        "matrix": df2.attrs.get("matrix"),
+        "plan": df2.attrs.get("plan"),
+        "stages": {"load_articles": t_load, "cluster": t_cluster, "save_cluster_outputs": t_save},
+        "quality": scores,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark clustering speed, memory and quality on a synthetic corpus.")
+    ap.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000], help="Corpus sizes, e.g. 1000 10000 100000")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--days", type=int, default=3)
+    ap.add_argument("--threshold", type=float, default=0.83, help="Same meaning as group_similar --threshold")
+    ap.add_argument("--max-articles", type=int, default=None, help="Passed to cluster(); default = cluster() default")
+    ap.add_argument("--mode", choices=["agglomerative", "cross"], default="agglomerative")
+    ap.add_argument("--features", choices=["word", "char", "hybrid"], default="word", help="TF-IDF feature mode")
+    ap.add_argument("--strategy", choices=["auto", "dense", "sparse", "blocked"], default="auto")
+    ap.add_argument("--memory-budget", type=float, default=1024, help="MB, passed to cluster()")
+    ap.add_argument("--workers", type=int, default=1, help="Sharded clustering processes (0 = all cores)")
+    ap.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, timings less distorted)")
+    ap.add_argument("--out", default="data/bench", help="Folder for results json + history.jsonl")
+    args = ap.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = time.strftime("%Y-%m-%d_%H-%M-%S")
+
+    runs = []
+    for n in args.sizes:
+        print(f"[INFO] Benchmarking n={n} …")
+        res = run_one(n, args.seed, args.threshold, args.max_articles, not args.no_memory, args.days,
+                      cluster_opts={"mode": args.mode, "vector_opts": {"features": args.features},
+                                    "strategy": args.strategy, "memory_budget_mb": args.memory_budget,
+                                    "workers": args.workers})
+        st, q = res["stages"], res["quality"]
+        print(f"[INFO] n={n}: load {st['load_articles']['wall_s']}s, cluster {st['cluster']['wall_s']}s, "
+              f"save {st['save_cluster_outputs']['wall_s']}s | P={q['pair_precision']} R={q['pair_recall']} ARI={q['ari']}")
+        runs.append(res)
+
+    report = {
+        "benchmark": "clustering",
+        "timestamp": ts,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"seed": args.seed, "days": args.days, "threshold": args.threshold,
+                   "max_articles": args.max_articles, "mode": args.mode, "features": args.features,
+                   "strategy": args.strategy, "memory_budget": args.memory_budget, "workers": args.workers,
+                   "trace_memory": not args.no_memory},
+        "runs": runs,
+    }
+    out_file = out_dir / f"clustering_{ts}.json"
+    out_file.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    with (out_dir / "history.jsonl").open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(report, ensure_ascii=False) + "\n")
+    print(f"[INFO] Saved results to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
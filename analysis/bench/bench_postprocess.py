@@ -0,0 +1,143 @@
+# analysis/bench/bench_postprocess.py
+"""
+Benchmark for analysis/tools/postprocess_clusters.py on a synthetic grouped file.
+
+Builds a combined_grouped_<date>.json shaped file (cluster_id = planted event)
+from analysis/bench/synthetic_corpus.py, then times the postprocessor end to end.
+With --compare it also runs the old per-cluster loop (legacy_main below, kept
+only as the reference) and checks that both write the same CSVs.
+
+Usage:
+  python -m analysis.bench.bench_postprocess                     # 100k articles
+  python -m analysis.bench.bench_postprocess --n 20000 --compare
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from analysis.bench.bench_clustering import measure
+from analysis.bench.synthetic_corpus import generate_raw
+from analysis.tools import postprocess_clusters
+
+
+def grouped_records(n: int, seed: int = 0, days: int = 3):
+    """Records shaped like data/final/combined_grouped_<date>.json."""
+    out = []
+    for r in generate_raw(n, seed=seed, days=days):
+        out.append({
+            "cluster_id": r["event_id"],
+            "title": r["title"],
+            "summary": r["summary"],
+            "url": r["url"],
+            "source": r["source"],
+            "published_dt": r["published_iso"],
+            "scraped_at": r["scraped_at"],
+            "clean_title": r["title"],
+        })
+    return out
+
+
+# --- the pre-vectorization implementation, for --compare only ---------------
+def _legacy_parse_dt(s):
+    if not isinstance(s, str) or not s.strip():
+        return pd.NaT
+    return pd.to_datetime(s, utc=True, errors="coerce")
+
+
+def _legacy_pick_representative(group):
+    g = group.copy()
+    g["title_len"] = g["title"].apply(lambda x: len(x) if isinstance(x, str) else 0)
+    g = g.sort_values(by=["published_dt_parsed", "scraped_at_parsed", "title_len"], ascending=[True, True, False])
+    return g.iloc[0]
+
+
+def legacy_main(inp, out_dir):
+    with open(inp, "r", encoding="utf-8") as f:
+        df = pd.DataFrame(json.load(f))
+    for col in postprocess_clusters.EXPECTED_COLS:
+        if col not in df.columns:
+            df[col] = None
+    df["published_dt_parsed"] = df["published_dt"].apply(_legacy_parse_dt)
+    df["scraped_at_parsed"] = df["scraped_at"].apply(_legacy_parse_dt)
+
+    repr_rows, article_rows = [], []
+    for cid, group in df.groupby("cluster_id", dropna=False):
+        rep = _legacy_pick_representative(group)
+        first_pub = group["published_dt_parsed"].min()
+        last_pub = group["published_dt_parsed"].max()
+        repr_rows.append({
+            "cluster_id": cid,
+            "size": len(group),
+            "repr_title": rep.get("title", ""),
+            "repr_url": rep.get("url", ""),
+            "repr_source": rep.get("source", ""),
+            "sources": ", ".join(sorted(set(group["source"].dropna().astype(str).tolist()))),
+            "first_published_dt": first_pub.isoformat() if pd.notna(first_pub) else "",
+            "last_published_dt": last_pub.isoformat() if pd.notna(last_pub) else "",
+        })
+        for _, r in group.sort_values(["published_dt_parsed", "source", "url"]).iterrows():
+            article_rows.append({c: r.get(c, "") for c in postprocess_clusters.ARTICLE_COLS})
+
+    os.makedirs(out_dir, exist_ok=True)
+    pd.DataFrame(repr_rows).sort_values(["size", "cluster_id"], ascending=[False, True]) \
+        .to_csv(os.path.join(out_dir, "clusters_summary.csv"), index=False, encoding="utf-8-sig")
+    pd.DataFrame(article_rows).to_csv(os.path.join(out_dir, "articles_by_cluster.csv"), index=False, encoding="utf-8-sig")
+# -----------------------------------------------------------------------------
+
+
+def same_outputs(dir_a, dir_b) -> bool:
+    for name in ("clusters_summary.csv", "articles_by_cluster.csv"):
+        a = pd.read_csv(Path(dir_a) / name, encoding="utf-8-sig")
+        b = pd.read_csv(Path(dir_b) / name, encoding="utf-8-sig")
+        if not a.reset_index(drop=True).equals(b.reset_index(drop=True)):
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark postprocess_clusters on a synthetic grouped file.")
+    ap.add_argument("--n", type=int, default=100_000, help="Number of articles in the grouped file")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--compare", action="store_true", help="Also run the old per-cluster loop and diff the outputs")
+    ap.add_argument("--no-memory", action="store_true", help="Skip tracemalloc")
+    ap.add_argument("--out", default="data/bench", help="Folder for results json + history.jsonl")
+    args = ap.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = time.strftime("%Y-%m-%d_%H-%M-%S")
+    trace = not args.no_memory
+
+    with tempfile.TemporaryDirectory(prefix="imm_bench_pp_") as tmp:
+        inp = Path(tmp) / "combined_grouped_2025-08-20.json"
+        inp.write_text(json.dumps(grouped_records(args.n, seed=args.seed), ensure_ascii=False), encoding="utf-8")
+
+        _, t_new = measure(postprocess_clusters.main, str(inp), str(Path(tmp) / "new"), quiet=True, trace_memory=trace)
+        print(f"[INFO] postprocess n={args.n}: {t_new['wall_s']}s, peak {t_new.get('peak_mb', '-')} MB")
+        stages = {"postprocess": t_new}
+
+        if args.compare:
+            _, t_old = measure(legacy_main, str(inp), str(Path(tmp) / "old"), trace_memory=trace)
+            same = same_outputs(Path(tmp) / "new", Path(tmp) / "old")
+            print(f"[INFO] legacy: {t_old['wall_s']}s ({t_old['wall_s'] / max(t_new['wall_s'], 1e-9):.1f}x slower), "
+                  f"identical outputs: {same}")
+            stages["legacy"] = t_old
+            stages["identical"] = same
+
+    report = {"benchmark": "postprocess", "timestamp": ts, "params": vars(args), "stages": stages}
+    out_file = out_dir / f"postprocess_{ts}.json"
+    out_file.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    with (out_dir / "history.jsonl").open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(report, ensure_ascii=False) + "\n")
+    print(f"[INFO] Saved results to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
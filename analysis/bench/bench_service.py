@@ -0,0 +1,191 @@
+# analysis/bench/bench_service.py
+"""
+Load test for the local query service (pipeline/service.py).
+
+Without --url it builds a throwaway archive first: a synthetic corpus
+(analysis/bench/synthetic_corpus.py) -> data/processed-style files -> search
+index -> one group_similar run, then serves it on a free port in-process.
+
+The workload is the common analyst queries, picked at random with weights:
+
+    latest     /clusters/latest?top=20
+    cluster    /clusters/<one of the 20 biggest>
+    outlets    /outlets
+    search     /search?q=<frequent word>&days=7
+    topic      /outlets?q=<frequent word>&days=7
+
+--concurrency client threads each keep one HTTP/1.1 connection open and send
+--requests in total. Reported per endpoint: p50 / p95 / p99 for cache misses
+and hits separately, plus throughput. Exit status is 1 when the p95 over all
+requests is above --target-p95-ms (default 50 ms), so it can gate a change.
+
+Usage:
+  python -m analysis.bench.bench_service                       # 20k articles, 4000 requests, 8 threads
+  python -m analysis.bench.bench_service --n 100000 --requests 20000
+  python -m analysis.bench.bench_service --url http://127.0.0.1:8766 --words עזה,ממשלה,חטופים
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import quote, urlsplit
+
+WEIGHTS = {"latest": 3, "cluster": 3, "outlets": 1, "search": 4, "topic": 1}
+
+
+def build_archive(root: Path, n: int, days: int, seed: int = 0) -> Tuple[Path, Path]:
+    """Synthetic processed files + index + one clustering run under root. Returns (clustered_dir, index_dir)."""
+    from analysis import group_similar
+    from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+    from analysis.search_index import build
+
+    t0 = time.perf_counter()
+    processed, clustered, index = root / "processed", root / "clustered", root / "index"
+    write_corpus(generate_corpus(n, seed=seed, days=days), processed, ext=".jsonl.gz")
+    build(processed, index)
+    group_similar.main(["--processed-dir", str(processed), "--out-dir", str(clustered), "--window-days", "0",
+                        "--index-dir", str(index)])
+    print(f"[INFO] Synthetic archive: {n} articles over {days} days ({time.perf_counter() - t0:.1f}s)")
+    return clustered, index
+
+
+def _get(conn: http.client.HTTPConnection, path: str, headers=None) -> Tuple[int, bytes, dict]:
+    conn.request("GET", path, headers=headers or {})
+    r = conn.getresponse()
+    return r.status, r.read(), dict(r.getheaders())
+
+
+def workload(host: str, port: int, words: List[str], seed: int = 0) -> Dict[str, List[str]]:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    status, body, _ = _get(conn, "/clusters/latest?top=20")
+    if status != 200:
+        raise SystemExit(f"[WARN] /clusters/latest -> {status}: {body[:200]!r}")
+    latest = json.loads(body)
+    run_day = latest["run"][:10]
+    conn.close()
+    ids = [r["cluster"] for r in latest["top"]]
+    return {
+        "latest": ["/clusters/latest?top=20"],
+        "cluster": [f"/clusters/{c}" for c in ids],
+        "outlets": ["/outlets"],
+        "search": [f"/search?q={quote(w)}&days=7&to={run_day}" for w in words],
+        "topic": [f"/outlets?q={quote(w)}&days=7&to={run_day}" for w in words],
+    }
+
+
+def _worker(host, port, jobs: List[Tuple[str, str]], out: list):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for kind, path in jobs:
+        t0 = time.perf_counter()
+        status, _, headers = _get(conn, path)
+        out.append((kind, (time.perf_counter() - t0) * 1000, status, headers.get("X-Cache", "?")))
+    conn.close()
+
+
+def _pct(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] if xs else float("nan")
+
+
+def load_test(host: str, port: int, paths: Dict[str, List[str]], requests: int = 4000, concurrency: int = 8,
+              seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    kinds = [k for k in WEIGHTS if paths.get(k)]
+    jobs = [(k, rng.choice(paths[k])) for k in rng.choices(kinds, weights=[WEIGHTS[k] for k in kinds], k=requests)]
+    results: list = []
+    threads = [threading.Thread(target=_worker, args=(host, port, jobs[i::concurrency], results))
+               for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    report = {"requests": len(results), "wall_s": round(wall, 2), "rps": round(len(results) / wall, 1),
+              "errors": sum(1 for r in results if r[2] != 200), "endpoints": {}}
+    print(f"{'endpoint':10s} {'n':>6s} {'miss':>6s} {'miss p50':>9s} {'miss p95':>9s} {'hit p50':>8s} {'hit p95':>8s} {'p99':>8s}")
+    for k in kinds + ["all"]:
+        rows = [r for r in results if k == "all" or r[0] == k]
+        miss = [r[1] for r in rows if r[3] != "hit"]
+        hit = [r[1] for r in rows if r[3] == "hit"]
+        allv = [r[1] for r in rows]
+        e = {"n": len(rows), "misses": len(miss), "miss_p50": _pct(miss, 50), "miss_p95": _pct(miss, 95),
+             "hit_p50": _pct(hit, 50), "hit_p95": _pct(hit, 95), "p95": _pct(allv, 95), "p99": _pct(allv, 99)}
+        report["endpoints"][k] = e
+        print(f"{k:10s} {e['n']:6d} {e['misses']:6d} {e['miss_p50']:9.2f} {e['miss_p95']:9.2f} "
+              f"{e['hit_p50']:8.2f} {e['hit_p95']:8.2f} {e['p99']:8.2f}")
+    print(f"[INFO] {report['requests']} requests in {report['wall_s']}s ({report['rps']} req/s, "
+          f"{report['errors']} errors), status codes {dict(Counter(r[2] for r in results))}")
+    return report
+
+
+def check_etag(host: str, port: int, path: str) -> bool:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    _, _, headers = _get(conn, path)
+    status, body, _ = _get(conn, path, {"If-None-Match": headers.get("ETag", "")})
+    conn.close()
+    return status == 304 and not body
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test for pipeline/service.py.")
+    ap.add_argument("--url", default=None, help="Test a running service instead of a synthetic one")
+    ap.add_argument("--n", type=int, default=20_000, help="Synthetic articles")
+    ap.add_argument("--days", type=int, default=14, help="Synthetic days")
+    ap.add_argument("--words", default=None, help="Comma-separated search words (default: frequent synthetic title words)")
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--target-p95-ms", type=float, default=50.0, help="Fail (exit 1) above this p95 over all requests")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    server = None
+    if args.url:
+        u = urlsplit(args.url)
+        host, port = u.hostname, u.port or 80
+        words = (args.words or "").split(",")
+    else:
+        from analysis.bench.synthetic_corpus import generate_corpus
+        from pipeline.service import QueryService, ServiceServer
+
+        tmp = tempfile.TemporaryDirectory(prefix="bench_service_")
+        clustered, index = build_archive(Path(tmp.name), args.n, args.days, seed=args.seed)
+        server = ServiceServer(("127.0.0.1", 0), QueryService(clustered, index))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        if args.words:
+            words = args.words.split(",")
+        else:
+            counts = Counter(w for r in generate_corpus(500, seed=args.seed, days=args.days)
+                             for w in r["title_norm_min"].split() if len(w) > 2)
+            words = [w for w, _ in counts.most_common(40)[10:30]]     # frequent, but not the very top
+    words = [w for w in words if w]
+
+    paths = workload(host, port, words, seed=args.seed)
+    report = load_test(host, port, paths, requests=args.requests, concurrency=args.concurrency, seed=args.seed)
+    report["etag_304"] = check_etag(host, port, paths["latest"][0])
+    p95 = report["endpoints"]["all"]["p95"]
+    report["target_p95_ms"], report["ok"] = args.target_p95_ms, p95 <= args.target_p95_ms and not report["errors"]
+    print(f"[INFO] p95 {p95:.2f} ms (target {args.target_p95_ms} ms) -> {'OK' if report['ok'] else 'MISSED'}; "
+          f"ETag revalidation {'304' if report['etag_304'] else 'FAILED'}")
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        tmp.cleanup()
+    if __name__ == "__main__" and not report["ok"]:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
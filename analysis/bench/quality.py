@@ -0,0 +1,34 @@
+# analysis/bench/quality.py
+"""Clustering quality vs. planted labels: pairwise precision/recall/F1 and ARI."""
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+from sklearn.metrics.cluster import pair_confusion_matrix
+
+
+def pairwise_scores(true_labels, pred_labels) -> Dict[str, float]:
+    """
+    Pair-counting scores: a pair is 'positive' when both articles share a label.
+    precision = same predicted & same planted / same predicted
+    recall    = same predicted & same planted / same planted
+    """
+    true_labels = np.asarray(true_labels)
+    pred_labels = np.asarray(pred_labels)
+    if true_labels.size == 0:
+        return {"pair_precision": 0.0, "pair_recall": 0.0, "pair_f1": 0.0, "ari": 0.0}
+
+    # C[i, j]: i = same planted label, j = same predicted label (ordered pairs)
+    C = pair_confusion_matrix(true_labels, pred_labels).astype(np.float64)
+    tp, fp, fn = C[1, 1], C[0, 1], C[1, 0]
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "pair_precision": round(float(precision), 4),
+        "pair_recall": round(float(recall), 4),
+        "pair_f1": round(float(f1), 4),
+        "ari": round(float(adjusted_rand_score(true_labels, pred_labels)), 4),
+    }
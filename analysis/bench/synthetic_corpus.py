@@ -0,0 +1,245 @@
+# analysis/bench/synthetic_corpus.py
+"""
+Deterministic synthetic Hebrew news corpus for benchmarking the clustering.
+
+Every generated article belongs to a planted event (`event_id`). Events are
+covered by several outlets that paraphrase the same story (different verbs,
+word order, Hebrew prefixes), and titles get the same noise we see on the real
+sites: CTA prefixes ("צפו:"), site suffixes (" | N12"), times and numbers.
+Articles that don't belong to any event get a unique event_id of their own.
+
+The raw records are run through `preprocess()` + `dataframe_hygiene()` so the
+output looks exactly like data/processed/combined_<date>.json.
+
+Usage:
+  python -m analysis.bench.synthetic_corpus --n 10000 --out data/bench/corpus_10k
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from adapters.common.storage import SUFFIXES, data_path, write_records
+from analysis.preprocessing import preprocess
+from analysis.token_cache import VOCAB_FILE, TokenVocab
+from analysis.dataframe_hygiene import dataframe_hygiene
+
+IL_TZ = timezone(timedelta(hours=3))
+START_DATE = datetime(2025, 8, 20, 6, 0, tzinfo=IL_TZ)
+
+SOURCES = ["n12", "c14", "kan11"]
+
+# site suffixes / CTA labels the way they show up on the sites (norm_min strips them)
+SITE_SUFFIXES = {
+    "n12": [" | N12", " - mako", " | חדשות 12"],
+    "c14": [" - ערוץ 14", " | ערוץ 14"],
+    "kan11": [" | כאן 11", " - Kan 11"],
+}
+CTA_PREFIXES = ["צפו: ", "תיעוד: ", "וידאו: ", "פרשנות: ", "חשיפה: "]
+
+# --- vocabulary ---
+ENTITIES = [
+    "ראש הממשלה", "שר הביטחון", "המשטרה", "צה\"ל", "בית המשפט", "הכנסת", "חמאס",
+    "חיזבאללה", "הקואליציה", "האופוזיציה", "בנק ישראל", "משרד הבריאות", "השב\"כ",
+    "מד\"א", "ראש העיר", "שר האוצר", "היועצת המשפטית", "הרמטכ\"ל", "ועדת הכספים",
+    "שר החוץ", "כבאות והצלה", "הסתדרות", "משרד החינוך", "רשות המסים",
+]
+OBJECTS = [
+    "הסכם", "תקציב", "חוק הגיוס", "הרפורמה", "עסקת החטופים", "המחאה", "התאונה",
+    "השריפה", "הפיגוע", "הבחירות", "מחירי הדיור", "רעידת האדמה", "השביתה",
+    "הריבית", "המבצע", "החקירה", "הגשר", "המכרז", "הסנקציות", "הפינוי",
+]
+PLACES = [
+    "תל אביב", "ירושלים", "חיפה", "באר שבע", "עזה", "הגליל", "יהודה ושומרון",
+    "אשדוד", "נתניה", "הנגב", "רמת גן", "צפת", "אילת", "עפולה", "חולון", "לבנון",
+]
+# one synonym per outlet framing ("rally" / "disrupt" / "gather" in notes.txt)
+ACTIONS = [
+    ("הפגינו נגד", "שיבשו את", "התכנסו סביב"),
+    ("תקף את", "הפציץ את", "פגע ב"),
+    ("אישרה את", "העבירה את", "קידמה את"),
+    ("עצר חשוד ב", "לכד חשוד ב", "תפס חשוד ב"),
+    ("הודיע על", "הכריז על", "מסר על"),
+    ("דחה את", "ביטל את", "הקפיא את"),
+    ("חתם על", "סיכם את", "השלים את"),
+    ("חקר את", "בדק את", "בחן את"),
+    ("תקף בחריפות את", "הסתער על", "מתח ביקורת על"),
+    ("פתח ב", "יצא ל", "החל ב"),
+]
+MODIFIERS = ["קשה", "דרמטי", "חריג", "ראשון", "נוסף", "מסוכן", "היסטורי", "סוער", "מפתיע"]
+FIRST_NAMES = [
+    "יוסי", "דני", "משה", "אבי", "רונית", "מיכל", "נועה", "איתי", "עומר", "שירה",
+    "יעל", "אורי", "גלעד", "תמר", "עידו", "ליאור", "חיים", "אסף", "רותם", "ענבל",
+    "אלון", "מאיר", "דוד", "שרה", "רחל", "עמית", "נדב", "הדס", "יונתן", "אורית",
+]
+LAST_NAMES = [
+    "כהן", "לוי", "מזרחי", "פרץ", "ביטון", "דהן", "אברהם", "פרידמן", "שפירא", "גבאי",
+    "אזולאי", "מלכה", "חדד", "יוסף", "עמר", "אוחיון", "קליין", "רוזן", "גולן", "ברק",
+    "שמעוני", "נחום", "סויסה", "טל", "הראל", "אלמוג", "דגן", "ששון", "זילבר", "בן דוד",
+]
+FILLER = ["על", "עם", "אחרי", "לאחר", "בזמן", "בעקבות", "גם", "כבר", "עוד", "הערב", "היום"]
+# background words for unrelated (singleton) headlines
+BACKGROUND = [
+    "מתכון", "קיץ", "חופשה", "טלוויזיה", "סדרה", "כדורגל", "ליגה", "שחקן", "אוכל",
+    "מסעדה", "טיול", "ים", "בריכה", "סטנדאפ", "מוזיקה", "שיר", "אלבום", "הופעה",
+    "טכנולוגיה", "סמארטפון", "אפליקציה", "בינה", "מלאכותית", "רכב", "חשמלי", "נדל\"ן",
+    "משכנתא", "חיסכון", "פנסיה", "בורסה", "מניות", "דולר", "שקל", "מזג", "אוויר",
+    "גשם", "שרב", "ילדים", "הורים", "בית ספר", "אוניברסיטה", "סטודנטים", "בריאות",
+    "תזונה", "ספורט", "ריצה", "כושר", "אופנה", "קולנוע", "סרט", "פסטיבל", "ספר",
+    "תערוכה", "מוזיאון", "כלב", "חתול", "גינה", "שכונה", "רחוב", "קפה", "חתונה",
+]
+# Hebrew clitic prefixes added to some tokens so outlets don't agree on surface forms
+CLITICS = ["ו", "ה", "ב", "ל", "ש"]
+
+
+def _event(rng: random.Random, event_id: int) -> Dict[str, object]:
+    return {
+        "event_id": event_id,
+        "person": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "entity": rng.choice(ENTITIES),
+        "object": rng.choice(OBJECTS),
+        "place": rng.choice(PLACES),
+        "action": rng.randrange(len(ACTIONS)),
+        "modifier": rng.choice(MODIFIERS),
+        "number": rng.randint(2, 90),
+    }
+
+
+def _maybe_clitic(rng: random.Random, word: str, p: float = 0.15) -> str:
+    if rng.random() < p:
+        return rng.choice(CLITICS) + word
+    return word
+
+
+def _event_title(rng: random.Random, ev: Dict[str, object], source: str) -> str:
+    # each outlet has a preferred framing verb, with some crossover
+    framing = SOURCES.index(source) if rng.random() < 0.8 else rng.randrange(3)
+    verb = ACTIONS[ev["action"]][framing]
+    obj = _maybe_clitic(rng, ev["object"])
+    person = ev["person"]
+    place = ev["place"]
+    patterns = [
+        f"{ev['entity']} {verb} {obj} ב{place}",
+        f"{obj} {ev['modifier']}: {ev['entity']} {verb} {person}",
+        f"ב{place}: {person} {verb} {obj}",
+        f"{person} {rng.choice(FILLER)} {obj} ב{place}: {ev['number']} {ev['modifier']}",
+        f"\"{obj} {ev['modifier']}\" - {person} {verb} {obj} ב{place}",
+    ]
+    title = rng.choice(patterns)
+    if rng.random() < 0.15:
+        title = rng.choice(CTA_PREFIXES) + title
+    if rng.random() < 0.2:
+        title = title + rng.choice(SITE_SUFFIXES[source])
+    return title
+
+
+def _event_summary(rng: random.Random, ev: Dict[str, object]) -> str:
+    words = [ev["entity"], ev["person"], ev["object"], ev["place"], ev["modifier"]]
+    rng.shuffle(words)
+    filler = rng.sample(FILLER, 3)
+    t = f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}"
+    return f"{words[0]} {filler[0]} {words[1]} {filler[1]} {words[2]} • {words[3]} {filler[2]} {words[4]} ({t})"
+
+
+def _noise_title(rng: random.Random, source: str) -> str:
+    words = [_maybe_clitic(rng, w, 0.1) for w in rng.sample(BACKGROUND, rng.randint(4, 8))]
+    title = " ".join(words)
+    if rng.random() < 0.1:
+        title = rng.choice(CTA_PREFIXES) + title
+    if rng.random() < 0.2:
+        title = title + rng.choice(SITE_SUFFIXES[source])
+    return title
+
+
+def _url(source: str, n: int) -> str:
+    if source == "n12":
+        return f"https://www.mako.co.il/news-israel/2025_q3/Article-{n:018x}.htm"
+    if source == "c14":
+        return f"https://www.c14.co.il/article/{1_000_000 + n}"
+    return f"https://www.kan.org.il/content/kan-news/local/{n}/"
+
+
+def generate_raw(n: int, seed: int = 0, days: int = 3, event_share: float = 0.6) -> List[Dict]:
+    """Raw (scraper-shaped) records with a planted `event_id` per record."""
+    rng = random.Random(seed)
+    records: List[Dict] = []
+    next_event = 0
+    span_hours = max(1, days * 24 - 12)
+
+    def add(title, summary, source, when, event_id):
+        records.append({
+            "title": title,
+            "summary": summary,
+            "url": _url(source, len(records)),
+            "published": when.strftime("%a, %d %b %Y %H:%M:%S %z"),
+            "published_iso": when.isoformat(timespec="seconds"),
+            "source": source,
+            "scraped_at": (when + timedelta(minutes=rng.randint(5, 90))).isoformat(timespec="seconds"),
+            "event_id": event_id,
+        })
+
+    n_event_articles = int(n * event_share)
+    while len(records) < n_event_articles:
+        ev = _event(rng, next_event)
+        next_event += 1
+        base = START_DATE + timedelta(hours=rng.uniform(0, span_hours))
+        size = min(rng.choice([2, 2, 3, 3, 4, 5, 6, 8]), n_event_articles - len(records))
+        for i in range(size):
+            # make sure most events span >= 2 outlets
+            source = SOURCES[i % len(SOURCES)] if i < 2 else rng.choice(SOURCES)
+            when = base + timedelta(minutes=rng.randint(0, 360))
+            add(_event_title(rng, ev, source), _event_summary(rng, ev), source, when, ev["event_id"])
+
+    while len(records) < n:
+        source = rng.choice(SOURCES)
+        when = START_DATE + timedelta(hours=rng.uniform(0, span_hours))
+        add(_noise_title(rng, source), _noise_title(rng, source), source, when, next_event)
+        next_event += 1
+
+    rng.shuffle(records)
+    return records
+
+
+def generate_corpus(n: int, seed: int = 0, days: int = 3, event_share: float = 0.6,
+                    vocab: TokenVocab = None) -> List[Dict]:
+    """Processed records (same shape as data/processed) with planted `event_id`; token ids when vocab is given."""
+    recs = dataframe_hygiene(preprocess(generate_raw(n, seed=seed, days=days, event_share=event_share), vocab=vocab))
+    return [r.to_dict() for r in recs]             # plain dicts, like json.load of a processed file
+
+
+def write_corpus(records: List[Dict], out_dir, vocab: TokenVocab = None, ext: str = ".json") -> List[Path]:
+    """Write records as data/processed-style combined_<date><ext> files (grouped by publish date) + the vocab."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if vocab is not None:
+        vocab.save(out_dir / VOCAB_FILE)
+    by_day: Dict[str, List[Dict]] = {}
+    for r in records:
+        by_day.setdefault(str(r.get("published_iso", ""))[:10], []).append(r)
+    paths = []
+    for d in sorted(by_day):
+        paths.append(write_records(data_path(out_dir / f"combined_{d}", ext), by_day[d]))
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic processed corpus with planted events.")
+    ap.add_argument("--n", type=int, default=1000, help="Number of articles")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--days", type=int, default=3, help="Spread articles over N days")
+    ap.add_argument("--event-share", type=float, default=0.6, help="Fraction of articles that belong to multi-article events")
+    ap.add_argument("--out", required=True, help="Output folder (combined_<date>.json files)")
+    ap.add_argument("--ext", default=".json", choices=list(SUFFIXES), help="File format, e.g. .jsonl.gz like new processed files")
+    args = ap.parse_args()
+
+    vocab = TokenVocab.load(Path(args.out) / VOCAB_FILE)
+    records = generate_corpus(args.n, seed=args.seed, days=args.days, event_share=args.event_share, vocab=vocab)
+    paths = write_corpus(records, args.out, vocab=vocab, ext=args.ext)
+    print(f"[INFO] Wrote {len(records)} records to {len(paths)} files under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
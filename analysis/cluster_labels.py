@@ -0,0 +1,115 @@
+# analysis/cluster_labels.py
+"""
+Top terms for every cluster at once (class-based TF-IDF).
+
+One CountVectorizer over all articles, one sparse indicator matrix
+M (clusters x articles), and C = M @ X gives term counts per cluster.
+Score(term, cluster) = tf(term | cluster) * log(1 + A / f(term)), where
+A = average words per cluster and f(term) = count of the term over all clusters.
+So a term scores high when it is frequent in the cluster and rare elsewhere.
+
+Replaces fitting a fresh TfidfVectorizer per cluster (post_clusters_check.py).
+
+When the frame carries token ids (<col>_tok, see analysis/token_cache.py) the
+counts come straight from them -- the norm_min tokens, Hebrew terms only --
+instead of running CountVectorizer over the raw text again.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import re
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+
+from analysis.cross_link import topk_rows
+from analysis.token_cache import TokenColumn, df_prune, ngram_counts
+
+HEBREW_TOKEN = r"(?u)\b[א-ת]{2,}\b"   # Hebrew words only
+HEBREW_TERM = re.compile(r"[א-ת]{2,}")
+
+
+def _token_counts(tokens, ngram_range, stop_words, min_df):
+    col, vocab = tokens
+    hebrew = np.fromiter((HEBREW_TERM.fullmatch(t) is not None for t in vocab.term_names),
+                         dtype=bool, count=len(vocab.term_names))
+    X, feats = ngram_counts(col, vocab, ngram_range, stop_words=stop_words or False, term_filter=hebrew)
+    keep = df_prune(X, min_df=min_df)
+    return X[:, keep], feats[keep]
+
+
+def ctfidf(texts: Sequence[str], labels, ngram_range=(1, 2), stop_words=None, min_df: int = 1, tokens=None):
+    """
+    Returns (cluster_ids, scores [clusters x terms] CSR, feature_names).
+    tokens=(TokenColumn, TokenVocab) counts from token ids; texts is ignored then.
+    """
+    labels = np.asarray(labels)
+    ids, inverse = np.unique(labels, return_inverse=True)
+    try:
+        if tokens is not None and tuple(ngram_range)[1] <= 2:
+            X, feats = _token_counts(tokens, ngram_range, stop_words, min_df)
+        else:
+            cv = CountVectorizer(token_pattern=HEBREW_TOKEN, ngram_range=tuple(ngram_range),
+                                 stop_words=stop_words, min_df=min_df, dtype=np.float32)
+            X = cv.fit_transform(texts)
+            feats = cv.get_feature_names_out()
+    except ValueError:          # empty vocabulary
+        return ids, sp.csr_matrix((len(ids), 0), dtype=np.float32), np.array([], dtype=object)
+
+    n = X.shape[0]
+    M = sp.csr_matrix((np.ones(n, dtype=np.float32), (inverse, np.arange(n))), shape=(len(ids), n))
+    C = (M @ X).tocsr()                                    # term counts per cluster
+    return ids, class_scores(C), feats
+
+
+def class_scores(C) -> sp.csr_matrix:
+    """c-TF-IDF scores from term counts per class (rows = clusters, months, ...)."""
+    C = sp.csr_matrix(C, dtype=np.float32)
+    words_per_cluster = np.asarray(C.sum(axis=1)).ravel()
+    tf = sp.diags(1.0 / np.maximum(words_per_cluster, 1.0)).astype(np.float32) @ C
+    A = words_per_cluster.mean() if len(words_per_cluster) else 0.0
+    f_t = np.asarray(C.sum(axis=0)).ravel()
+    idf = np.log1p(A / np.maximum(f_t, 1.0)).astype(np.float32)
+    return (tf @ sp.diags(idf)).tocsr()
+
+
+def top_terms(texts: Sequence[str], labels, k: int = 12, ngram_range=(1, 2),
+              stop_words=None, min_df: int = 1, tokens=None) -> Dict[object, List[str]]:
+    """{cluster_id: [top k terms, best first]} for every cluster."""
+    ids, scores, feats = ctfidf(texts, labels, ngram_range=ngram_range, stop_words=stop_words, min_df=min_df,
+                                tokens=tokens)
+    id_list = ids.tolist()
+    out = {cid: [] for cid in id_list}
+    if scores.nnz == 0:
+        return out
+    rows, cols, _ = topk_rows(scores, k)              # row-major, score desc inside each row
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        out[id_list[r]].append(feats[c])
+    return out
+
+
+def cluster_top_terms(df: pd.DataFrame, labels=None, k: int = 12, text_cols=("title", "summary"),
+                      stop_words: Optional[Sequence[str]] = None, ngram_range=(1, 2)) -> pd.DataFrame:
+    """
+    DataFrame[cluster, top_terms] -- labels default to df["cluster"].
+    Uses <col>_tok + df.attrs["token_vocab"] when every text column has them.
+    """
+    labels = df["cluster"].to_numpy() if labels is None else np.asarray(labels)
+    tok_cols = [f"{c}_tok" for c in text_cols if c in df.columns]
+    vocab = df.attrs.get("token_vocab")
+    if vocab is not None and tok_cols and all(c in df.columns for c in tok_cols):
+        rows = [sum((r if isinstance(r, list) else [] for r in parts), []) for parts in zip(*(df[c] for c in tok_cols))]
+        terms = top_terms(None, labels, k=k, ngram_range=ngram_range, stop_words=stop_words,
+                          tokens=(TokenColumn.from_lists(rows), vocab))
+        return pd.DataFrame({"cluster": list(terms.keys()), "top_terms": [", ".join(t) for t in terms.values()]})
+    text = None
+    for c in text_cols:
+        if c in df.columns:
+            col = df[c].fillna("").astype(str)
+            text = col if text is None else text + " " + col
+    texts = text.tolist() if text is not None else [""] * len(df)
+    terms = top_terms(texts, labels, k=k, ngram_range=ngram_range, stop_words=stop_words)
+    return pd.DataFrame({"cluster": list(terms.keys()), "top_terms": [", ".join(t) for t in terms.values()]})
@@ -0,0 +1,219 @@
+# analysis/cluster_lineage.py
+"""
+Stable event IDs across group_similar runs.
+
+Every run labels clusters 0..k with no relation to the previous run. This keeps an
+inverted index record_key -> event_id (data/clustered/lineage/members.csv) and
+maps each new cluster to its predecessor event by member Jaccard:
+
+  overlap(c, e) = articles of new cluster c that were last seen in event e
+  jaccard(c, e) = overlap / (|c ∩ known| + |e ∩ this run| - overlap)
+
+Only members present on both sides count ("comparable" members), so a story that
+gains fresh articles or loses old ones to the rolling window keeps its ID.
+The whole thing is a join + two groupbys -> O(articles), no cluster x cluster loop.
+
+A new cluster keeps the event_id of its best predecessor when they are each
+other's best match (mutual best); other matches above --lineage-min-jaccard are
+recorded as split / merge events in lineage.jsonl.
+
+Files (under <out_dir>/lineage/):
+  members.csv    record_key, event_id, last_run     (inverted index; members not seen for
+                 keep_days are dropped, so it tracks the recent window, not the whole history)
+  events.csv     event_id, first_run, last_run, runs, size, example_title
+  lineage.jsonl  one line per split / merge + one summary line per run
+  state.json     next event number
+and per run folder: cluster_events.csv (cluster, event_id, status, parents, jaccard),
+so dashboards join articles.csv -> cluster_events.csv on `cluster`.
+
+Usage (backfill existing runs, oldest first):
+  python -m analysis.cluster_lineage --clustered-dir data/clustered
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MEMBER_COLS = ["record_key", "event_id", "last_run"]
+EVENT_COLS = ["event_id", "first_run", "last_run", "runs", "size", "example_title"]
+RUN_FMT = "%Y-%m-%d_%H-%M-%S"          # run folder names (analysis/cluster_output.py)
+KEEP_DAYS = 7
+
+
+class LineageStore:
+    def __init__(self, root, min_jaccard: float = 0.3, keep_days: Optional[float] = KEEP_DAYS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.min_jaccard = float(min_jaccard)
+        self.keep_days = keep_days
+        self.members = self._read_csv("members.csv", MEMBER_COLS)
+        self.events = self._read_csv("events.csv", EVENT_COLS)
+        state_p = self.root / "state.json"
+        self.state = json.loads(state_p.read_text(encoding="utf-8")) if state_p.exists() else {"next_event": 1, "runs": []}
+        self._pending: List[Dict] = []
+
+    def _read_csv(self, name: str, cols: List[str]) -> pd.DataFrame:
+        p = self.root / name
+        if not p.exists():
+            return pd.DataFrame(columns=cols)
+        return pd.read_csv(p, dtype={"record_key": str, "event_id": str, "last_run": str, "first_run": str},
+                           keep_default_na=False)
+
+    def _new_ids(self, n: int) -> List[str]:
+        start = int(self.state["next_event"])
+        self.state["next_event"] = start + n
+        return [f"E{i:06d}" for i in range(start, start + n)]
+
+    def match(self, record_keys: Sequence[str], labels) -> pd.DataFrame:
+        """Candidate (cluster, event_id, overlap, jaccard) pairs above min_jaccard."""
+        cur = pd.DataFrame({"record_key": pd.Series(record_keys, dtype=str).to_numpy(),
+                            "cluster": np.asarray(labels)}).drop_duplicates("record_key")
+        m = cur.merge(self.members[["record_key", "event_id"]], on="record_key", how="inner")
+        if m.empty:
+            return pd.DataFrame(columns=["cluster", "event_id", "overlap", "jaccard"])
+        ov = m.groupby(["cluster", "event_id"]).size().rename("overlap").reset_index()
+        a = m.groupby("cluster").size()                 # comparable members of each new cluster
+        b = m.groupby("event_id").size()                # members of each old event seen in this run
+        ov["jaccard"] = ov["overlap"] / (a.reindex(ov["cluster"]).to_numpy() + b.reindex(ov["event_id"]).to_numpy()
+                                         - ov["overlap"].to_numpy())
+        return ov[ov["jaccard"] >= self.min_jaccard].reset_index(drop=True)
+
+    def assign(self, record_keys: Sequence[str], labels, run_id: str, titles: Optional[Sequence[str]] = None):
+        """
+        Returns (cluster_events DataFrame, lineage events list) and updates the in-memory
+        index; call save() to persist.
+        """
+        labels = np.asarray(labels)
+        ids, first, sizes = np.unique(labels, return_index=True, return_counts=True)
+        cand = self.match(record_keys, labels)
+
+        # best predecessor per cluster / best successor per event (ties -> bigger overlap, smaller id)
+        ranked = cand.sort_values(["jaccard", "overlap", "event_id", "cluster"], ascending=[False, False, True, True],
+                                  kind="mergesort")
+        best_pred = ranked.drop_duplicates("cluster").set_index("cluster")["event_id"]
+        best_succ = ranked.drop_duplicates("event_id").set_index("event_id")["cluster"]
+        inherits = best_pred[best_succ.reindex(best_pred.to_numpy()).to_numpy() == best_pred.index.to_numpy()]
+
+        out = pd.DataFrame({"cluster": ids, "size": sizes})
+        out["event_id"] = out["cluster"].map(inherits)
+        fresh = out["event_id"].isna().to_numpy()
+        out.loc[fresh, "event_id"] = self._new_ids(int(fresh.sum()))
+
+        parents = cand.sort_values(["cluster", "jaccard"], ascending=[True, False]).groupby("cluster")["event_id"].agg(list)
+        best_j = ranked.drop_duplicates("cluster").set_index("cluster")["jaccard"]
+        out["parents"] = out["cluster"].map(parents)
+        out["jaccard"] = out["cluster"].map(best_j).round(3)
+        n_parents = out["parents"].map(lambda p: len(p) if isinstance(p, list) else 0)
+        out["status"] = np.select(
+            [n_parents >= 2, ~fresh, n_parents == 1],
+            ["merged", "continued", "split"],
+            default="new",
+        )
+
+        # lineage events
+        eid_of = out.set_index("cluster")["event_id"]
+        events = []
+        for e, grp in cand.groupby("event_id"):
+            if len(grp) >= 2:
+                events.append({"run": run_id, "type": "split", "from": e,
+                               "into": sorted(eid_of.reindex(grp["cluster"]).tolist())})
+        for _, row in out[out["status"] == "merged"].iterrows():
+            events.append({"run": run_id, "type": "merge", "from": list(row["parents"]), "into": row["event_id"]})
+        counts = out["status"].value_counts().to_dict()
+        events.append({"run": run_id, "type": "run", "clusters": int(len(out)),
+                       **{k: int(counts.get(k, 0)) for k in ("continued", "new", "split", "merged")}})
+
+        # update inverted index + registry
+        cur = pd.DataFrame({"record_key": pd.Series(record_keys, dtype=str).to_numpy(),
+                            "event_id": eid_of.reindex(labels).to_numpy(), "last_run": run_id})
+        self.members = (pd.concat([self.members, cur], ignore_index=True)
+                        .drop_duplicates("record_key", keep="last").reset_index(drop=True))
+        self._prune(run_id)
+
+        ex_title = np.asarray(titles, dtype=object)[first] if titles is not None else np.full(len(ids), "", dtype=object)
+        seen = pd.DataFrame({"event_id": out["event_id"].to_numpy(), "size": sizes, "example_title": ex_title})
+        reg = self.events.set_index("event_id")
+        old = reg.reindex(seen["event_id"])
+        seen["first_run"] = old["first_run"].fillna(run_id).to_numpy()
+        seen["runs"] = pd.to_numeric(old["runs"], errors="coerce").fillna(0).astype(int).to_numpy() + 1
+        seen["last_run"] = run_id
+        self.events = pd.concat([reg[~reg.index.isin(seen["event_id"])].reset_index(), seen[EVENT_COLS]],
+                                ignore_index=True)[EVENT_COLS]
+        self._pending = events
+        self.state["runs"] = (self.state.get("runs", []) + [run_id])[-50:]
+
+        out["parents"] = out["parents"].map(lambda p: " ".join(p) if isinstance(p, list) else "")
+        return out[["cluster", "event_id", "status", "parents", "jaccard", "size"]], events
+
+    def _prune(self, run_id: str):
+        """Drop members last seen more than keep_days before this run: they can't be in its
+        window any more, and keeping them would make every run pay for the whole history."""
+        if not self.keep_days:
+            return
+        try:
+            cutoff = datetime.strptime(run_id, RUN_FMT) - timedelta(days=self.keep_days)
+        except ValueError:                   # not a timestamped run folder (backfills, tests): keep all
+            return
+        seen = pd.to_datetime(self.members["last_run"], format=RUN_FMT, errors="coerce")
+        old = (seen < cutoff).to_numpy()
+        if old.any():
+            self.members = self.members[~old].reset_index(drop=True)
+            print(f"[INFO] Lineage: dropped {int(old.sum())} members not seen since {cutoff:%Y-%m-%d}")
+
+    def save(self):
+        self.members.to_csv(self.root / "members.csv", index=False)
+        self.events.to_csv(self.root / "events.csv", index=False, encoding="utf-8")
+        with (self.root / "lineage.jsonl").open("a", encoding="utf-8") as fh:
+            for ev in self._pending:
+                fh.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        self._pending = []
+        (self.root / "state.json").write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+
+
+def update_lineage(run_dir, df: pd.DataFrame, labels, lineage_dir, min_jaccard: float = 0.3,
+                   keep_days: Optional[float] = KEEP_DAYS) -> Optional[pd.DataFrame]:
+    """Assign event IDs for one finished run and write <run_dir>/cluster_events.csv."""
+    if "record_key" not in df.columns:
+        print("[WARN] No record_key column; skipping cluster lineage")
+        return None
+    run_dir = Path(run_dir)
+    store = LineageStore(lineage_dir, min_jaccard=min_jaccard, keep_days=keep_days)
+    if run_dir.name in store.state.get("runs", []):
+        print(f"[WARN] Run {run_dir.name} already in lineage; skipping")
+        return None
+    titles = df["title"].tolist() if "title" in df.columns else None
+    table, events = store.assign(df["record_key"].astype(str).tolist(), labels, run_dir.name, titles=titles)
+    store.save()
+    table.to_csv(run_dir / "cluster_events.csv", index=False, encoding="utf-8-sig")
+    s = events[-1]
+    print(f"[INFO] Lineage: {s['continued']} continued, {s['new']} new, {s['split']} split, "
+          f"{s['merged']} merged -> {run_dir / 'cluster_events.csv'}")
+    return table
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Assign persistent event IDs to clustered runs (oldest first).")
+    ap.add_argument("--clustered-dir", default="data/clustered", help="Folder with <timestamp>/articles.csv runs")
+    ap.add_argument("--lineage-dir", default=None, help="Default: <clustered-dir>/lineage")
+    ap.add_argument("--min-jaccard", type=float, default=0.3)
+    ap.add_argument("--keep-days", type=float, default=KEEP_DAYS,
+                    help="Forget members not seen for this many days (0 = keep all)")
+    args = ap.parse_args()
+
+    root = Path(args.clustered_dir)
+    lineage_dir = Path(args.lineage_dir) if args.lineage_dir else root / "lineage"
+    runs = sorted(p for p in root.iterdir() if (p / "articles.csv").exists())
+    for run in runs:
+        df = pd.read_csv(run / "articles.csv", encoding="utf-8-sig", usecols=lambda c: c in ("cluster", "record_key", "title"))
+        update_lineage(run, df, df["cluster"].to_numpy(), lineage_dir, min_jaccard=args.min_jaccard,
+                       keep_days=args.keep_days)
+
+
+if __name__ == "__main__":
+    main()
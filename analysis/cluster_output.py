@@ -0,0 +1,192 @@
+# analysis/cluster_output.py
+"""
+Output stage for group_similar: articles.csv, clusters_summary.csv, clusters.jsonl
+(+ optional articles.parquet) in a timestamped run folder.
+
+All per-cluster numbers come from one pass over the label array
+(np.unique -> sizes / first member / sort order); files are streamed in
+chunks, so time and peak memory grow with the number of articles, not with
+the number of clusters. orjson is used for the JSONL when installed.
+"""
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from adapters.common.storage import open_data
+from analysis.cluster_labels import cluster_top_terms
+
+try:  # optional, ~5x faster than stdlib json for this
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ITEM_COLS = ["source", "title", "summary", "url", "published"]
+FRONT_COLS = ["cluster", "cluster_size", "source", "published", "title", "summary", "url"]
+README_PARAMS = ["threshold", "mode", "analyzer", "vectorizer", "ngrams", "min_df", "max_df", "title_weight",
+                 "processed_dir", "max_articles", "window_days", "window_hours",
+                 "date_from", "date_to", "stopwords", "matrix", "strategy", "memory_budget", "stem"]
+
+
+def dumps_line(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _obj_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as an object array with None for missing (JSON null, not NaN)."""
+    if col not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    s = df[col]
+    return s.astype(object).where(s.notna(), None).to_numpy(dtype=object)
+
+
+def cluster_aggregates(df: pd.DataFrame, labels) -> dict:
+    """
+    Everything the writers need, computed once:
+      ids      : sorted unique cluster ids
+      inverse  : row -> position in ids
+      sizes    : members per cluster (aligned to ids)
+      order    : rows sorted by (cluster, published) -- stable
+      summary  : DataFrame[cluster, cluster_size, sources, example_title], biggest first
+    """
+    labels = np.asarray(labels)
+    ids, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    sizes = np.bincount(inverse, minlength=len(ids))
+
+    published = df["published"] if "published" in df.columns else pd.Series([None] * len(df))
+    order = (pd.DataFrame({"c": inverse, "p": published.to_numpy()})
+             .sort_values(["c", "p"], kind="mergesort", na_position="last")
+             .index.to_numpy())
+
+    # up to 5 distinct non-empty sources per cluster, alphabetically
+    src = pd.DataFrame({"c": inverse, "s": df["source"].to_numpy() if "source" in df.columns else None})
+    src = src[src["s"].notna() & (src["s"].astype(str) != "")].drop_duplicates()
+    src = src.sort_values(["c", "s"], kind="mergesort").groupby("c", sort=False).head(5)
+    sources = src.groupby("c")["s"].agg(lambda s: ", ".join(map(str, s)))
+    sources = sources.reindex(np.arange(len(ids)), fill_value="").to_numpy()
+
+    titles = _obj_column(df, "title")
+    summary = pd.DataFrame({
+        "cluster": ids,
+        "cluster_size": sizes,
+        "sources": sources,
+        "example_title": titles[first] if len(first) else [],
+    }).sort_values("cluster_size", ascending=False, kind="mergesort", ignore_index=True)
+    return {"ids": ids, "inverse": inverse, "sizes": sizes, "order": order, "summary": summary}
+
+
+def write_articles_csv(df: pd.DataFrame, labels, sizes_per_row: np.ndarray, path: Path, chunk_size: int = 50_000):
+    cols = [c for c in FRONT_COLS if c in df.columns or c in ("cluster", "cluster_size")]
+    cols += [c for c in df.columns if c not in cols and not c.endswith("_tok")]   # token ids mean nothing without the vocab
+    data_cols = cols[2:]                                            # cols starts with cluster, cluster_size
+    labels = np.asarray(labels)
+    with path.open("w", encoding="utf-8-sig", newline="") as fh:
+        for start in range(0, max(len(df), 1), chunk_size):
+            chunk = df.iloc[start:start + chunk_size][data_cols]    # only this chunk's written columns are copied
+            chunk.insert(0, "cluster", labels[start:start + chunk_size])
+            chunk.insert(1, "cluster_size", sizes_per_row[start:start + chunk_size])
+            chunk.to_csv(fh, index=False, header=(start == 0))
+
+
+def write_clusters_jsonl(df: pd.DataFrame, agg: dict, path: Path, flush_every: int = 2_000):
+    """One line per cluster: {"cluster", "size", "items": [...]} with items sorted by published.
+    path may end in .jsonl.gz / .jsonl.zst (compressed while streaming)."""
+    cols = {c: _obj_column(df, c) for c in ITEM_COLS}
+    order, inverse, ids = agg["order"], agg["inverse"], agg["ids"]
+    bounds = np.flatnonzero(np.diff(inverse[order])) + 1
+    buf = []
+    with open_data(path, "wb") as fh:
+        for members in np.split(order, bounds) if len(order) else []:
+            cid = ids[inverse[members[0]]]
+            items = [{c: cols[c][i] for c in ITEM_COLS} for i in members]
+            buf.append(dumps_line({"cluster": int(cid), "size": int(members.size), "items": items}))
+            if len(buf) >= flush_every:
+                fh.write(b"".join(buf))
+                buf.clear()
+        fh.write(b"".join(buf))
+
+
+def write_articles_parquet(df: pd.DataFrame, labels, sizes_per_row: np.ndarray, path: Path) -> bool:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("[WARN] pyarrow not installed; skipping articles.parquet")
+        return False
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column("cluster", pa.array(np.asarray(labels)))
+    table = table.append_column("cluster_size", pa.array(sizes_per_row))
+    pq.write_table(table, path, compression="zstd")
+    return True
+
+
+def save_cluster_outputs(df, labels, out_dir="data/clustered", save="both", run_params=None,
+                         columnar: bool = False, chunk_size: int = 50_000,
+                         label_terms: int = 8, stop_words=None, compress=None):
+    """
+    Save per-article table (CSV) + per-cluster nested (JSONL).
+    Creates a timestamped folder: data/clustered/2025-08-28_15-12-03/
+    columnar=True also writes articles.parquet (needs pyarrow).
+    label_terms: top c-TF-IDF terms per cluster in clusters_summary.csv (0 = skip).
+    compress: "gz" / "zst" -> clusters.jsonl.gz / .zst.
+    """
+    ts = time.strftime("%Y-%m-%d_%H-%M-%S")
+    out_base = Path(out_dir) / ts
+    out_base.mkdir(parents=True, exist_ok=True)
+
+    agg = cluster_aggregates(df, labels)
+    sizes_per_row = agg["sizes"][agg["inverse"]]
+    files = []
+
+    # 1) Article-level CSV + cluster summary CSV
+    if save in ("csv", "both"):
+        write_articles_csv(df, labels, sizes_per_row, out_base / "articles.csv", chunk_size=chunk_size)
+        summary = agg["summary"]
+        if label_terms:
+            terms = cluster_top_terms(df, labels, k=label_terms, stop_words=stop_words)
+            summary["top_terms"] = summary["cluster"].map(terms.set_index("cluster")["top_terms"])   # no merge copy
+        summary.to_csv(out_base / "clusters_summary.csv", index=False, encoding="utf-8-sig")
+        files += ["articles.csv", "clusters_summary.csv"]
+
+    # Cross-outlet pairs (only in --mode cross)
+    pairs = df.attrs.get("cross_pairs")
+    if pairs is not None and len(pairs):
+        pairs.drop(columns=["i", "j"]).to_csv(out_base / "cross_pairs.csv", index=False, encoding="utf-8-sig")
+        files.append("cross_pairs.csv")
+
+    # 2) Cluster-level JSONL (nested items)
+    if save in ("json", "both"):
+        name = "clusters.jsonl" + (f".{compress}" if compress else "")
+        write_clusters_jsonl(df, agg, out_base / name)
+        files.append(name)
+
+    if columnar and write_articles_parquet(df, labels, sizes_per_row, out_base / "articles.parquet"):
+        files.append("articles.parquet")
+
+    # Tiny README with stats
+    n_articles = len(df)
+    n_clusters = len(agg["ids"])
+    n_singletons = int((agg["sizes"] == 1).sum())
+    with (out_base / "README.txt").open("w", encoding="utf-8") as f:
+        f.write(
+            f"Articles: {n_articles}\n"
+            f"Clusters: {n_clusters}\n"
+            f"Singletons: {n_singletons} ({n_singletons/max(1,n_articles)*100:.1f}%)\n"
+            "\nFiles:\n" + "".join(f"- {name}\n" for name in files)
+        )
+        if run_params:
+            f.write("\nRun params:\n")
+            # print only keys that have values
+            for k in README_PARAMS:
+                v = run_params.get(k, None)
+                if v not in (None, "", []):
+                    f.write(f"- {k}: {v}\n")
+
+    print(f"[INFO] Saved outputs to {out_base}")
+    return out_base
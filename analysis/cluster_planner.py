@@ -0,0 +1,169 @@
+# analysis/cluster_planner.py
+"""
+Pick a clustering strategy for group_similar from the size of the problem.
+
+Right after vectorizing we know n, the number of columns and nnz. From those
+(plus a small sampled similarity block) estimate() predicts memory and time for:
+
+- dense   : full n x n cosine distances + average linkage (the original path).
+            Exact, ~24 bytes per pair (distance matrix + linkage copy).
+- sparse  : thresholded neighbour graph built in row blocks, connected
+            components, then exact average linkage inside every component.
+            Gives the SAME clusters as dense: two groups only merge when their
+            average distance is <= threshold, so at least one pair is, so they are
+            already in the same component. Memory ~ edges + largest component².
+- blocked : rows (date order) cut into chunks that fit the budget, dense linkage
+            per chunk. Approximate at chunk borders, but never over budget.
+
+plan() takes the first strategy that fits memory_budget_mb; run_plan() executes
+it. Components that are still too big for the budget in sparse mode are
+chunked the same way as blocked.
+
+Time constants were measured on a laptop-class CPU; they are for comparing
+the strategies, not for promising wall-clock seconds.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import AgglomerativeClustering
+from sklearn.metrics import pairwise_distances
+
+from analysis.cross_link import refine_components, sim_block
+
+STRATEGIES = ("auto", "dense", "sparse", "blocked")
+PAIR_BYTES = 24                # float64 distance + linkage copy + slack
+DENSE_S_PER_PAIR = 7.5e-8      # pairwise_distances + average linkage
+SPARSE_S_PER_FLOP = 1.7e-8     # sparse X @ X.T per multiply-add
+EDGE_BYTES = 16                # int32 row/col + float32 sim + slack
+SAMPLE_ROWS = 512
+
+
+def _mb(n_bytes: float) -> float:
+    return round(n_bytes / 2**20, 1)
+
+
+def _x_bytes(X) -> int:
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return np.asarray(X).nbytes
+
+
+def max_dense_rows(memory_budget_mb: float) -> int:
+    """Largest n whose dense distance matrix + linkage fits the budget."""
+    return max(2, int(math.sqrt(memory_budget_mb * 2**20 / PAIR_BYTES)))
+
+
+def graph_block_rows(n: int, memory_budget_mb: float) -> int:
+    """Rows per X[block] @ X.T so a (worst case dense) block uses <= 1/4 of the budget."""
+    return int(min(4096, max(64, memory_budget_mb * 2**20 / 4 / max(n * 12, 1))))
+
+
+def estimate(X, threshold: float, memory_budget_mb: float, seed: int = 0) -> dict:
+    """Memory (MB) / time (s) guesses for every strategy, from n, cols, nnz and a sampled block."""
+    n, cols = X.shape
+    x_bytes = _x_bytes(X)
+    if sp.issparse(X):
+        X = X.tocsr()
+        nnz = int(X.nnz)
+        df_col = np.bincount(X.indices, minlength=cols).astype(np.int64)
+        flops = int((df_col ** 2).sum())                     # multiply-adds in X @ X.T
+    else:
+        nnz = int(n * cols)
+        flops = int(n) * int(n) * int(cols)
+
+    # neighbours above the threshold, extrapolated from a random row sample
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(n, SAMPLE_ROWS), replace=False) if n else np.array([], dtype=int)
+    # in blocks of X rows, thresholded per block, so the probe itself stays inside the budget
+    step = graph_block_rows(len(sample), memory_budget_mb)
+    hits = sum(sim_block(X[sample], X[start:start + step], 1.0 - threshold).nnz
+               for start in range(0, n, step)) if len(sample) else 0
+    edges = int(max(hits - len(sample), 0) * n / max(len(sample), 1))
+
+    m = max_dense_rows(memory_budget_mb)
+    block = graph_block_rows(n, memory_budget_mb)
+    chunk = min(n, m)
+    return {
+        "n": int(n), "cols": int(cols), "nnz": nnz, "est_edges": edges,
+        "dense": {"mb": _mb(n * n * PAIR_BYTES + x_bytes), "s": round(n * n * DENSE_S_PER_PAIR, 2)},
+        "sparse": {"mb": _mb(x_bytes + edges * EDGE_BYTES + block * n * 12),
+                   "s": round(flops * SPARSE_S_PER_FLOP + edges * DENSE_S_PER_PAIR, 2)},
+        "blocked": {"mb": _mb(chunk * chunk * PAIR_BYTES + x_bytes),
+                    "s": round(n * chunk * DENSE_S_PER_PAIR, 2), "chunk_rows": int(chunk)},
+    }
+
+
+def plan(X, threshold: float, memory_budget_mb: float = 1024, strategy: str = "auto", verbose: bool = True) -> dict:
+    est = estimate(X, threshold, memory_budget_mb)
+    if strategy == "auto":
+        strategy = next((s for s in ("dense", "sparse") if est[s]["mb"] <= memory_budget_mb), "blocked")
+    est.update({"strategy": strategy, "memory_budget_mb": memory_budget_mb})
+    if verbose:
+        print(f"[INFO] Planner: n={est['n']} cols={est['cols']} nnz={est['nnz']} ~edges={est['est_edges']} | "
+              + " | ".join(f"{s} ~{est[s]['mb']}MB ~{est[s]['s']}s" for s in ("dense", "sparse", "blocked"))
+              + f" -> {strategy} (budget {memory_budget_mb}MB)")
+    return est
+
+
+def dense_agglomerative(X, threshold: float) -> np.ndarray:
+    if X.shape[0] < 2:
+        return np.zeros(X.shape[0], dtype=np.int64)
+    D = pairwise_distances(X, metric="cosine")
+    model = AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=threshold,
+        metric="precomputed",   # sklearn >= 1.2
+        linkage="average"
+    )
+    return model.fit_predict(D)
+
+
+def neighbour_graph(X, threshold: float, block_rows: int) -> sp.csr_matrix:
+    """Edges i~j with cosine similarity >= 1 - threshold, built X[block] @ X.T at a time."""
+    n = X.shape[0]
+    rows, cols = [], []
+    for start in range(0, n, block_rows):
+        S = sim_block(X[start:start + block_rows], X, 1.0 - threshold).tocoo()
+        rows.append(S.row + start)
+        cols.append(S.col)
+    r = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+    c = np.concatenate(cols) if cols else np.array([], dtype=np.int64)
+    return sp.csr_matrix((np.ones(r.size, dtype=np.int8), (r, c)), shape=(n, n))
+
+
+def sparse_agglomerative(X, threshold: float, memory_budget_mb: float) -> np.ndarray:
+    if sp.issparse(X):
+        X = X.tocsr()
+    G = neighbour_graph(X, threshold, graph_block_rows(X.shape[0], memory_budget_mb))
+    _, comp = connected_components(G, directed=False)
+    del G
+    return refine_components(X, comp, 1.0 - threshold, max_size=max_dense_rows(memory_budget_mb))
+
+
+def blocked_agglomerative(X, threshold: float, chunk_rows: int) -> np.ndarray:
+    labels = np.empty(X.shape[0], dtype=np.int64)
+    offset = 0
+    for start in range(0, X.shape[0], chunk_rows):
+        sub = dense_agglomerative(X[start:start + chunk_rows], threshold)
+        labels[start:start + chunk_rows] = sub + offset
+        offset += int(sub.max()) + 1 if sub.size else 0
+    return labels
+
+
+def run_plan(X, threshold: float, p: dict, verbose: bool = True) -> np.ndarray:
+    s = p["strategy"]
+    if s == "dense":
+        if verbose:
+            print("[INFO] Computing cosine distance matrix (may take time for large N)…")
+        return dense_agglomerative(X, threshold)
+    if s == "sparse":
+        return sparse_agglomerative(X, threshold, p["memory_budget_mb"])
+    if s == "blocked":
+        print(f"[WARN] Blocked clustering in chunks of {p['blocked']['chunk_rows']} rows; "
+              "stories split across chunk borders won't be joined")
+        return blocked_agglomerative(X, threshold, p["blocked"]["chunk_rows"])
+    raise ValueError(f"Unknown strategy {s!r}; expected one of {STRATEGIES}")
@@ -0,0 +1,158 @@
+# analysis/cross_link.py
+"""
+Cross-outlet linking: compare headlines only *between* sources.
+
+Instead of the full n x n similarity, every pair of source blocks
+(n12 x c14, n12 x kan11, c14 x kan11) is multiplied in row blocks, each row keeps
+its top-k partners above min_sim, and the resulting multipartite graph is split
+into connected components = cross-outlet event groups. With 3 equal-sized
+outlets that is ~n²/3 work instead of n², and it never links two articles of
+the same outlet directly (repeats of a story by one outlet still end up in
+the same group if they both match another outlet). Components that chained
+together are split again with average linkage (refine_components).
+
+Works with any row-normalized matrix from analysis/vectorize.py
+(sparse TF-IDF/hashing or dense embeddings).
+"""
+from __future__ import annotations
+
+from itertools import combinations
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import AgglomerativeClustering
+from sklearn.metrics import pairwise_distances
+
+
+def topk_rows(S: sp.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, col, value) of the k largest stored values in every row of a CSR matrix."""
+    S = S.tocsr()
+    if S.nnz == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32)
+    row = np.repeat(np.arange(S.shape[0]), np.diff(S.indptr))
+    order = np.lexsort((-S.data, row))              # by row, then similarity desc
+    rank = np.arange(order.size) - S.indptr[row[order]]
+    keep = order[rank < k]
+    return row[keep], S.indices[keep].astype(np.int64), S.data[keep]
+
+
+def sim_block(XA, XB, min_sim: float) -> sp.csr_matrix:
+    S = XA @ XB.T
+    if sp.issparse(S):
+        S = S.tocsr()
+        S.data[S.data < min_sim] = 0
+        S.eliminate_zeros()
+        return S
+    S = np.asarray(S)
+    S[S < min_sim] = 0
+    return sp.csr_matrix(S)
+
+
+def link_blocks(XA, XB, top_k: int = 3, min_sim: float = 0.2, mutual: bool = True,
+                block_size: int = 4096) -> pd.DataFrame:
+    """
+    Candidate pairs between two sources (local row indices a, b).
+    mutual=True keeps (a, b) only if b is in a's top-k AND a is in b's top-k,
+    which stops one generic headline from chaining unrelated stories together.
+    """
+    nA, nB = XA.shape[0], XB.shape[0]
+    ab, col_cands = [], []
+    for start in range(0, nA, block_size):
+        S = sim_block(XA[start:start + block_size], XB, min_sim)
+        r, c, v = topk_rows(S, top_k)
+        ab.append((r + start, c, v))
+        # column-side candidates; merged across blocks below
+        r2, c2, v2 = topk_rows(S.T.tocsr(), top_k)
+        col_cands.append((r2, c2 + start, v2))
+
+    a1, b1, s1 = (np.concatenate(x) for x in zip(*ab))
+    rb, ca, vv = (np.concatenate(x) for x in zip(*col_cands))
+    b2, a2, s2 = topk_rows(sp.csr_matrix((vv, (rb, ca)), shape=(nB, nA)), top_k)
+
+    k1 = a1.astype(np.int64) * nB + b1
+    k2 = a2.astype(np.int64) * nB + b2
+    if mutual:
+        keys, idx1, _ = np.intersect1d(k1, k2, assume_unique=True, return_indices=True)
+        sims = s1[idx1]
+    else:
+        keys, first = np.unique(np.concatenate([k1, k2]), return_index=True)
+        sims = np.concatenate([s1, s2])[first]
+    return pd.DataFrame({"a": keys // nB, "b": keys % nB, "similarity": sims.astype(np.float32)})
+
+
+def refine_components(X, labels: np.ndarray, min_sim: float, max_size: int = None) -> np.ndarray:
+    """
+    Connected components chain (A~B, B~C => A,B,C). Split every multi-member
+    component with average-linkage at the same threshold; components are small,
+    so this only costs sum(size²) instead of n².
+    max_size: components bigger than this are first cut into consecutive row
+    chunks (rows are in date order) so no distance matrix exceeds max_size².
+    """
+    out = labels.copy()
+    next_label = int(labels.max()) + 1 if labels.size else 0
+    order = np.argsort(labels, kind="stable")
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    for members in np.split(order, bounds):
+        if members.size < 3:
+            continue
+        n_chunks = -(-members.size // max_size) if max_size else 1
+        for ci, chunk in enumerate(np.array_split(members, n_chunks)):
+            if chunk.size > 1:
+                D = pairwise_distances(X[chunk], metric="cosine")
+                sub = AgglomerativeClustering(n_clusters=None, distance_threshold=1.0 - min_sim,
+                                              metric="precomputed", linkage="average").fit_predict(D)
+            else:
+                sub = np.zeros(chunk.size, dtype=np.int64)
+            for k in range(0 if ci else 1, int(sub.max()) + 1):     # chunk 0 / sub 0 keeps the label
+                out[chunk[sub == k]] = next_label
+                next_label += 1
+    return out
+
+
+def cross_source_link(X, sources: Sequence[str], top_k: int = 3, min_sim: float = 0.2,
+                      mutual: bool = True, block_size: int = 4096, refine: bool = True,
+                      memory_budget_mb: float = 1024):
+    """
+    Returns (labels, pairs):
+      labels : np.ndarray of group ids aligned to X rows (connected components,
+               split by refine_components() unless refine=False; components bigger
+               than memory_budget_mb allows for a dense distance matrix are refined in chunks)
+      pairs  : DataFrame[i, j, source_i, source_j, similarity] with global row indices
+    """
+    sources = np.asarray([str(s) for s in sources])
+    n = X.shape[0]
+    if sp.issparse(X):
+        X = X.tocsr()
+    blocks = {s: np.flatnonzero(sources == s) for s in sorted(set(sources.tolist()))}
+
+    parts = []
+    for sa, sb in combinations(blocks, 2):
+        ia, ib = blocks[sa], blocks[sb]
+        if ia.size == 0 or ib.size == 0:
+            continue
+        p = link_blocks(X[ia], X[ib], top_k=top_k, min_sim=min_sim, mutual=mutual, block_size=block_size)
+        parts.append(pd.DataFrame({
+            "i": ia[p["a"].to_numpy()],
+            "j": ib[p["b"].to_numpy()],
+            "source_i": sa,
+            "source_j": sb,
+            "similarity": p["similarity"].to_numpy(),
+        }))
+    pairs = (pd.concat(parts, ignore_index=True) if parts
+             else pd.DataFrame(columns=["i", "j", "source_i", "source_j", "similarity"]))
+
+    G = sp.coo_matrix((np.ones(len(pairs), dtype=np.int8),
+                       (pairs["i"].to_numpy(dtype=np.int64), pairs["j"].to_numpy(dtype=np.int64))),
+                      shape=(n, n))
+    _, labels = connected_components(G, directed=False)
+    if refine:
+        from analysis.cluster_planner import max_dense_rows     # cluster_planner imports this module
+        labels = refine_components(X, labels, min_sim, max_size=max_dense_rows(memory_budget_mb))
+    pairs["cluster"] = labels[pairs["i"].to_numpy(dtype=np.int64)] if len(pairs) else []
+    print(f"[INFO] Cross-outlet linking: {len(blocks)} sources, {len(pairs)} pairs, "
+          f"{int((np.bincount(labels) > 1).sum())} linked groups")
+    return labels, pairs.sort_values("similarity", ascending=False, ignore_index=True)
@@ -1,17 +1,19 @@
-import json
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 
+from adapters.common.storage import data_files, data_path, read_records, write_records
+
 PROCESSED_DIR = Path("data/processed")
 FINAL_DIR = Path("data/final")
 FINAL_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_processed_file():
     today = datetime.now().strftime("%Y-%m-%d")
-    file_path = PROCESSED_DIR / f"combined_{today}.json"
-    with open(file_path, encoding="utf-8") as f:
-        return json.load(f)
+    files = data_files(PROCESSED_DIR, f"combined_{today}")    # whatever format preprocessing wrote
+    if not files:
+        raise FileNotFoundError(f"No processed file for {today} in {PROCESSED_DIR}")
+    return read_records(files[0])
 
 def deduplicate(records):
     """
@@ -35,9 +37,7 @@ def deduplicate(records):
 
 def save_final(records):
     today = datetime.now().strftime("%Y-%m-%d")
-    output_path = FINAL_DIR / f"combined_deduplicated_{today}.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+    output_path = write_records(data_path(FINAL_DIR / f"combined_deduplicated_{today}"), records)
     print(f"Saved deduplicated output to {output_path}")
 
 def main():
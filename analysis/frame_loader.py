@@ -0,0 +1,105 @@
+# analysis/frame_loader.py
+"""
+Shared DataFrame loading for clustering and the reporting tools.
+
+Everything used to come in as object columns holding every key of every record
+(full summaries included), then got copied by df.copy() / merges on the way out.
+Here:
+
+- column projection: read only the columns the caller lists (CSV usecols,
+  JSON via pd.DataFrame(records, columns=...), which never builds the rest)
+- category dtype for the low-cardinality columns (source, cluster, file date):
+  one small int code per row instead of a pointer to a string
+- optional Arrow-backed strings (string[pyarrow]) for the long text columns,
+  when pyarrow is installed -- off by default, object columns otherwise
+- dates parsed once, as whole columns
+- memory before/after printed, so the savings show up in the logs
+
+    df = read_frame("data/clustered/<run>/articles.csv", columns=["cluster", "source", "title"])
+"""
+from __future__ import annotations
+
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+
+from adapters.common.storage import read_records
+
+CATEGORY_COLS = ("source", "cluster", "_file_date")
+TEXT_COLS = ("title", "summary", "url", "title_norm_min", "summary_norm_min", "text_for_cluster", "record_key")
+
+
+def has_arrow() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+def frame_mb(df: pd.DataFrame) -> float:
+    """Deep memory of a frame in MB (strings included)."""
+    return float(df.memory_usage(deep=True, index=True).sum()) / 2**20
+
+
+def report_memory(label: str, before_mb: float, after_mb: float) -> None:
+    saved = 1 - after_mb / before_mb if before_mb else 0.0
+    print(f"[INFO] {label} memory: {before_mb:.1f} MB -> {after_mb:.1f} MB ({saved:.0%} less)")
+
+
+def _categorizable(s: pd.Series) -> bool:
+    """Only plain strings (or ints) become categories -- mixed types would change sort order."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return False
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return True
+    return s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string"
+
+
+def optimize_frame(df: pd.DataFrame, categories: Iterable[str] = CATEGORY_COLS,
+                   arrow_strings: bool = False, text_cols: Iterable[str] = TEXT_COLS) -> pd.DataFrame:
+    """Convert columns in place (returns df): categories, then Arrow strings if asked and available."""
+    for c in categories:
+        if c in df.columns and _categorizable(df[c]):
+            df[c] = df[c].astype("category")
+    if arrow_strings:
+        if not has_arrow():
+            print("[WARN] pyarrow not installed; keeping object strings")
+        else:
+            for c in text_cols:
+                if c in df.columns and df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) == "string":
+                    df[c] = df[c].astype("string[pyarrow]")
+    return df
+
+
+def parse_dates(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
+    """Replace each column with UTC timestamps (unparseable -> NaT), in place."""
+    for c in cols:
+        if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = pd.to_datetime(df[c], utc=True, errors="coerce", format="mixed")
+    return df
+
+
+def read_frame(path, columns: Optional[Sequence[str]] = None, dates: Iterable[str] = (),
+               categories: Iterable[str] = CATEGORY_COLS, arrow_strings: bool = False,
+               report: bool = True) -> pd.DataFrame:
+    """
+    CSV / record file (.json / .jsonl, plain or .gz / .zst) -> optimized DataFrame.
+    columns: keep only these (missing ones are added as empty columns, like the old
+    "ensure expected columns" loops); None = everything in the file.
+    """
+    p = Path(path)
+    if p.suffix == ".csv":
+        wanted = None if columns is None else set(columns)
+        df = pd.read_csv(p, usecols=None if wanted is None else (lambda c: c in wanted), encoding="utf-8-sig")
+        for c in columns or ():
+            if c not in df.columns:
+                df[c] = None
+    else:
+        recs = read_records(p)
+        df = pd.DataFrame(recs, columns=list(columns) if columns is not None else None)
+        del recs
+    before = frame_mb(df) if report else 0.0
+    optimize_frame(df, categories=categories, arrow_strings=arrow_strings)
+    parse_dates(df, dates)
+    if report:
+        report_memory(f"{p.name} ({len(df)} rows x {df.shape[1]} cols)", before, frame_mb(df))
+    return df
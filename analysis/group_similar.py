@@ -123,11 +123,12 @@ What it does (simple & robust):
 
 Usage:
   python cluster_simple.py
-  python cluster_simple.py --threshold 0.84 --min-df 2 --max-df 0.85 --ngrams 1 2 --max-articles 3000
+  python cluster_simple.py --threshold 0.84 --min-df 2 --max-df 0.85 --ngrams 1 2 --memory-budget 2048
 
 Notes:
 - Keep threshold around 0.80–0.90. Lower = bigger clusters, Higher = more, smaller clusters.
-- This builds a full distance matrix (O(n^2) memory). Start with <= ~2000 articles.
+- Big inputs are not truncated: analysis/cluster_planner.py picks dense (O(n^2)),
+  sparse-neighbour (same result, less memory) or blocked clustering to fit --memory-budget.
 """
 
 import json
@@ -141,71 +142,199 @@ import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import AgglomerativeClustering
 from sklearn.metrics import pairwise_distances
-import os, json, time
+import math
+import os, json, time, re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
 from scipy.sparse import hstack
 
+from adapters.common.article import ArticleBatch
+from adapters.common.day_files import file_date as _file_date, select_files, select_parts
+from adapters.common.partition import SUFFIX as PARTITION_SUFFIX, read_partition
+from adapters.common.storage import read_records
+from analysis.vectorize import VECTORIZERS, make_vectorizer
+from analysis.token_cache import VOCAB_FILE, TokenColumn, TokenVocab, ensure_tokens, token_column
+from analysis.hebrew_stem import stem_text, stem_vocab
+from analysis.cross_link import cross_source_link
+from analysis.cluster_planner import STRATEGIES, plan, run_plan
+from analysis.sharded_cluster import sharded_cluster
+from analysis.cluster_output import save_cluster_outputs
+from analysis.cluster_lineage import update_lineage
+from analysis.search_index import INDEX_DIR, SearchIndex
+from analysis.frame_loader import frame_mb, optimize_frame, report_memory
+from pipeline.instrument import count, span
+from analysis import story_threads
+
 STOPWORDS_PATH = Path("analysis/utils/hebrew_stopswords_list_extended.txt")
 
-def load_articles(processed_dir: str) -> pd.DataFrame:
+# --columns: what load_articles keeps. "output" = what the output files show + what
+# clustering / labels need (no summary_norm_min, no stray keys); "cluster" also drops the summary
+LOAD_COLUMNS = {
+    "all": None,
+    "output": ("title", "summary", "source", "url", "published", "published_iso", "scraped_at",
+               "title_norm_min", "title_tok", "summary_tok", "record_key", "url_id"),
+    "cluster": ("title", "source", "url", "published", "published_iso", "scraped_at",
+                "title_norm_min", "title_tok", "record_key"),
+}
+
+IL_TZ = "Asia/Jerusalem"
+
+
+def _read_columns(f: Path, columns=None, days=None):
+    """One file -> (n_rows, {column: list}) without keeping its list of dicts around."""
+    if f.name.endswith(PARTITION_SUFFIX):         # only the chunks for these days / columns get decompressed
+        n, cols, _ = read_partition(f, columns=None if columns is None else set(columns) | {"_file_date"}, days=days)
+        return n, cols
+    batch = ArticleBatch.from_records(read_records(f))       # columns, interned source strings
+    if columns is not None:                       # projection: unused columns never reach pandas
+        batch.columns = {k: v for k, v in batch.columns.items() if k in columns}
+    fd = _file_date(f)
+    batch.columns["_file_date"] = [fd.isoformat() if fd else None] * len(batch)
+    return len(batch), batch.columns
+
+
+def load_articles(processed_dir: str, date_from=None, date_to=None, window_days=None,
+                  workers: int = None, columns=None, arrow_strings: bool = False) -> pd.DataFrame:
     """
-    Loads records from .json (list of dicts) and .jsonl (one JSON per line).
+    Loads records from .json (list of dicts) and .jsonl (one JSON per line), plain or
+    gzip / zstd compressed (adapters/common/storage.py).
     Expects keys: 'title', 'summary', 'source', 'url', 'published' (best-effort).
+    Daily files and monthly partitions are chosen by date (see select_parts) and
+    read in a thread pool; the frame is built column by column.
+    columns: keep only these keys (see LOAD_COLUMNS); None = every key in the files.
+    source / _file_date become categories, text columns Arrow strings with
+    arrow_strings=True (analysis/frame_loader.py).
+    Row-level date filtering is apply_date_filters().
     """
-    records = []
-    p = Path(processed_dir)
-    files = list(p.glob("*.json")) + list(p.glob("*.jsonl"))
-    for f in files:
+    files = select_parts(processed_dir, date_from=date_from, date_to=date_to, window_days=window_days)
+    keep = None if columns is None else frozenset(columns) | {"title_norm_min"}
+
+    def read(part):
+        f, days = part
         try:
-            if f.suffix == ".jsonl":
-                with f.open("r", encoding="utf-8") as fh:
-                    for line in fh:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        obj = json.loads(line)
-                        records.append(obj)
-            else:
-                with f.open("r", encoding="utf-8") as fh:
-                    obj = json.load(fh)
-                    if isinstance(obj, list):
-                        records.extend(obj)
-                    elif isinstance(obj, dict) and "records" in obj:
-                        records.extend(obj["records"])
+            return _read_columns(f, keep, days)
         except Exception as e:
             print(f"[WARN] Failed reading {f}: {e}")
-
-    if not records:
+            return 0, {}
+
+    workers = workers or min(8, (os.cpu_count() or 1) + 4)
+    if len(files) > 1 and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(read, files))
+    else:
+        parts = [read(f) for f in files]
+
+    # concatenate column lists (files may not share every key)
+    all_cols = {}
+    for _, cols in parts:
+        for k in cols:
+            all_cols.setdefault(k, None)
+    data = {k: [] for k in all_cols}
+    for n, cols in parts:
+        for k in all_cols:
+            v = cols.get(k)
+            data[k].extend(v if v is not None else [None] * n)
+    del parts
+
+    if not any(len(v) for v in data.values()):
         print("[WARN] No records found in", processed_dir)
 
     # Normalize to dataframe with safe defaults
-    df = pd.DataFrame.from_records(records)
-    for col in ["title", "summary", "source", "url", "published"]:
+    df = pd.DataFrame(data)
+    del data
+    for col in ["title", "summary", "source", "url", "published", "title_norm_min"]:
         if col not in df.columns:
             df[col] = ""
 
-    # Prefer normalized fields if you keep both versions
-    # e.g., df["title_use"] = df.get("title_norm_min", df["title"])
-    df["title_use"] = df["title_norm_min"].fillna("").astype(str)
-    df["summary_use"] = df["summary_norm_min"].fillna("").astype(str)
-
-    # Build the clustering text     # more weight to the title in the TFIDF
-    df["text_for_cluster"] = (df["title_use"]).str.strip()                    #@@@@@@@@@ Maybe add the summary later       # + " " + df["title_use"]        #+ " " + df["summary_use"]
-    # Drop empty
-    df = df[df["text_for_cluster"].str.len() > 0].reset_index(drop=True)
+    # Build the clustering text from the normalized title     #@@@@@@@@@ Maybe add the summary later (summary_norm_min)
+    df["text_for_cluster"] = df["title_norm_min"].fillna("").astype(str).str.strip()
+    # Drop empty (no copy when there's nothing to drop)
+    nonempty = df["text_for_cluster"].str.len() > 0
+    if not nonempty.all():
+        df = df[nonempty].reset_index(drop=True)
+
+    before = frame_mb(df)
+    optimize_frame(df, arrow_strings=arrow_strings)
+    report_memory(f"Articles ({len(df)} rows x {df.shape[1]} cols)", before, frame_mb(df))
+
+    # token ids for the same text (stored by preprocessing, else encoded here once)
+    vocab_path = Path(processed_dir) / VOCAB_FILE
+    vocab = TokenVocab.load(vocab_path) if vocab_path.exists() else None
+    return ensure_tokens(df, cols=("title",), vocab=vocab)
+
+
+def parse_article_dt(df: pd.DataFrame) -> pd.Series:
+    """UTC timestamp per row: published_iso, else published, else scraped_at, else the file date."""
+    dt = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+    for col in ["published_iso", "published", "scraped_at"]:
+        if col in df.columns and dt.isna().any():
+            missing = dt.isna()
+            dt[missing] = pd.to_datetime(df.loc[missing, col], utc=True, errors="coerce", format="mixed")
+    if "_file_date" in df.columns and dt.isna().any():
+        missing = dt.isna()
+        fd = pd.to_datetime(df.loc[missing, "_file_date"], errors="coerce")
+        dt[missing] = fd.dt.tz_localize(IL_TZ).dt.tz_convert("UTC")
+    return dt
+
+
+def file_window_days(window_days=None, window_hours=None):
+    """Daily files to open for a window. A rolling N-hour window can start on an earlier
+    local day than the newest file, so it needs ceil(N/24) + 1 files (same as pipeline/worker.py)."""
+    return math.ceil(window_hours / 24) + 1 if window_hours else window_days
+
+
+def apply_date_filters(df: pd.DataFrame, date_from=None, date_to=None, window_days=None,
+                       window_hours=None) -> pd.DataFrame:
+    """
+    Keep rows whose _dt falls in the requested window.
+    - date_from / date_to (YYYY-MM-DD, inclusive, Israel local date) win over window_days
+    - window_days: last N whole local days, ending at date_to or the newest article
+    - window_hours: rolling N hours back from the newest article (applied on top)
+    """
+    if df.empty:
+        return df
+    local_day = df["_dt"].dt.tz_convert(IL_TZ).dt.date
+    start = date.fromisoformat(date_from) if isinstance(date_from, str) else date_from
+    end = date.fromisoformat(date_to) if isinstance(date_to, str) else date_to
+    if start is None and window_days:
+        anchor = end or local_day.dropna().max()
+        start = anchor - timedelta(days=window_days - 1)
+
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= local_day >= start
+    if end is not None:
+        mask &= local_day <= end
+    if window_hours:
+        mask &= df["_dt"] >= df["_dt"].max() - pd.Timedelta(hours=window_hours)
+
+    before = len(df)
+    mask = mask.fillna(False)
+    if not mask.all():                 # nothing filtered -> no copy
+        df = df[mask].reset_index(drop=True)
+    print(f"[INFO] Date filter kept {len(df)} of {before} articles ({start or '…'} .. {end or '…'}"
+          + (f", last {window_hours}h" if window_hours else "") + ")")
     return df
 
 
 def load_stopwords(path: str):
+    """Sorted stopword list (sklearn wants a list); the file is read once per mtime."""
     p = Path(path)
+    return list(_stopwords_cached(str(p.resolve()), p.stat().st_mtime_ns))
+
+
+@lru_cache(maxsize=8)
+def _stopwords_cached(path: str, mtime_ns: int) -> tuple:
     words = []
-    with p.open("r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         for line in f:
             w = line.strip()
             if not w or w.startswith("#"):
                 continue
             words.append(w)
-    return sorted(set(words))
+    return tuple(sorted(set(words)))
 
 
 def cluster(df: pd.DataFrame,
@@ -214,57 +343,100 @@ def cluster(df: pd.DataFrame,
             ngram_high: int = 2,
             min_df: int = 2,
             max_df: float = 0.8,
-            max_articles: int = 2000):
+            max_articles: int = None,
+            vectorizer: str = "tfidf",
+            vector_opts: dict = None,
+            mode: str = "agglomerative",
+            top_k: int = 3,
+            mutual: bool = True,
+            memory_budget_mb: float = 1024,
+            strategy: str = "auto",
+            workers: int = 1,
+            shard_rows: int = 5000,
+            shard_overlap: int = 1000,
+            stem: bool = False):
     """
     Returns labels (np.array) aligned to df rows.
+    mode: "agglomerative" (average linkage) or "cross" (cross-outlet
+          top-k linking, see analysis/cross_link.py; pairs land in df.attrs["cross_pairs"]).
+    strategy: agglomerative backend -- "auto" lets analysis/cluster_planner.py pick
+          dense / sparse / blocked from the matrix size and memory_budget_mb
+          (estimates land in df.attrs["plan"]).
+    max_articles: optional hard cap; keeps the newest rows (by _dt when present).
+    workers: != 1 clusters overlapping time shards of shard_rows in a process pool
+          (0/None = all cores) and stitches them, see analysis/sharded_cluster.py.
+    vectorizer: one of analysis.vectorize.VECTORIZERS ("tfidf", "hashing", "embed", "fake").
+    vector_opts: extra make_vectorizer() kwargs (model, cache_dir, dtype, batch_size, n_threads).
+    stem: light Hebrew prefix/suffix stemming before vectorizing (analysis/hebrew_stem.py);
+          הממשלה / בממשלה / והממשלה become one feature.
     """
 
     if len(df) == 0:
-        return np.array([])
+        return df, np.array([], dtype=int)
 
-    if len(df) > max_articles:
-        print(f"[INFO] Truncating from {len(df)} to max_articles={max_articles} to keep it simple.")
-        df = df.iloc[:max_articles].copy()
+    if max_articles and len(df) > max_articles:
+        print(f"[WARN] max_articles={max_articles}: dropping the {len(df) - max_articles} oldest of {len(df)} articles")
+        if "_dt" in df.columns:
+            df = df.sort_values("_dt", kind="mergesort", na_position="first")
+        df = df.iloc[-max_articles:].reset_index(drop=True)
 
     texts = df["text_for_cluster"].tolist()
+    # title_tok holds the same tokens as text_for_cluster (load_articles), so TF-IDF can skip tokenizing
+    tokens = None
+    if vectorizer == "tfidf" and "title_tok" in df.columns and df.attrs.get("token_vocab") is not None:
+        tokens = (token_column(df, "title"), df.attrs["token_vocab"])
 
     he_stop = load_stopwords(STOPWORDS_PATH) if STOPWORDS_PATH.exists() else None
 
-    vectorizer_word = TfidfVectorizer(
+    if stem:
+        keep = frozenset(he_stop or ())              # stopwords are matched unstemmed
+        texts = [stem_text(t, keep) for t in texts]
+        if tokens is not None:
+            stem_v, mapping = stem_vocab(tokens[1], keep)
+            tokens = (TokenColumn(tokens[0].indptr, mapping[tokens[0].ids]), stem_v)
+
+    vec = make_vectorizer(
+        vectorizer,
         ngram_range=(ngram_low, ngram_high),
         min_df=min_df,
         max_df=max_df,
-        stop_words=he_stop
+        stop_words=he_stop,
+        **(vector_opts or {})
     )
 
-    
-    #@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@ maybe open the CHAR vectorizer later
-    # vectorizer_char = TfidfVectorizer(
-    # analyzer="char",
-    # ngram_range=(3,5),
-    # min_df=2,
-    # max_df=0.8,
-    # )
-    # X_word = vectorizer_word.fit_transform(texts)
-    # X_char = vectorizer_char.fit_transform(texts)
-
-    # # Optionally down-weight char features a bit
-    # X = hstack([X_word, X_char * 0.5])
-    #@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
-
-    X = vectorizer_word.fit_transform(texts)
-
-    # AgglomerativeClustering with precomputed cosine distances
-    print("[INFO] Computing cosine distance matrix (may take time for large N)…")
-    D = pairwise_distances(X, metric="cosine")
-
-    model = AgglomerativeClustering(
-        n_clusters=None,
-        distance_threshold=threshold,
-        metric="precomputed",   # sklearn >= 1.2
-        linkage="average"
-    )
-    labels = model.fit_predict(D)
+    # char 3–5 / word+char hybrid: vector_opts={"features": "char"|"hybrid", "char_weight": 0.5, ...}
+
+    # record_key lets dense backends reuse cached vectors
+    keys = df["record_key"].astype(str).tolist() if "record_key" in df.columns else None
+    with span("vectorize"):
+        X = vec.fit_transform(texts, keys=keys, tokens=tokens)
+    if getattr(vec, "stats", None):
+        df.attrs["matrix"] = vec.stats.get("total")
+
+    if mode == "cross":
+        labels, pairs = cross_source_link(X, df["source"].astype(str).tolist(), top_k=top_k,
+                                          min_sim=1.0 - threshold, mutual=mutual,
+                                          memory_budget_mb=memory_budget_mb)
+        cols = [c for c in ["record_key", "title", "url"] if c in df.columns]
+        for side in ("i", "j"):
+            rows = df.iloc[pairs[side].to_numpy()]
+            for c in cols:
+                pairs[f"{c}_{side}"] = rows[c].to_numpy()
+        df.attrs["cross_pairs"] = pairs
+        return df, labels
+
+    if workers != 1 and X.shape[0] > shard_rows:
+        labels = sharded_cluster(X, threshold, workers=workers or None, shard_rows=shard_rows,
+                                 overlap_rows=shard_overlap, memory_budget_mb=memory_budget_mb)
+        df.attrs["plan"] = {"strategy": "sharded", "workers": workers, "shard_rows": shard_rows,
+                            "shard_overlap": shard_overlap, "memory_budget_mb": memory_budget_mb}
+        return df, labels
+
+    # average linkage: dense n x n, sparse neighbour graph, or blocked -- whatever fits the budget
+    p = plan(X, threshold, memory_budget_mb=memory_budget_mb, strategy=strategy)
+    df.attrs["plan"] = p
+    with span("linkage"):
+        labels = run_plan(X, threshold, p)
 
     return df, labels
 
@@ -274,8 +446,7 @@ def show_report(df: pd.DataFrame, labels: np.ndarray, top_k: int = 10, sample_pe
         print("[INFO] Nothing to cluster.")
         return
 
-    df = df.copy()
-    df["cluster"] = labels
+    labels = np.asarray(labels)        # no df.copy() + cluster column: rows are picked by label
 
     counts = Counter(labels)
     n_clusters = len(counts)
@@ -294,7 +465,7 @@ def show_report(df: pd.DataFrame, labels: np.ndarray, top_k: int = 10, sample_pe
     # Show samples for the biggest clusters
     biggest = [cid for cid, _ in counts.most_common(top_k)]
     for cid in biggest:
-        sub = df[df["cluster"] == cid].head(sample_per_cluster)
+        sub = df.iloc[np.flatnonzero(labels == cid)[:sample_per_cluster]]
         print(f"=== Cluster {cid} (showing {len(sub)} of {counts[cid]}) ===")
         for _, row in sub.iterrows():
             title = str(row.get("title", ""))[:200]
@@ -309,130 +480,139 @@ def show_report(df: pd.DataFrame, labels: np.ndarray, top_k: int = 10, sample_pe
         print()
 
 
-def save_cluster_outputs(df, labels, out_dir="data/clustered", save="both", run_params=None):
-    """
-    Save per-article table (CSV) + per-cluster nested (JSONL).
-    Creates a timestamped folder: data/clustered/2025-08-28_15-12-03/
-    """
-    ts = time.strftime("%Y-%m-%d_%H-%M-%S")
-    out_base = Path(out_dir) / ts
-    out_base.mkdir(parents=True, exist_ok=True)
-
-    # Attach labels + cluster sizes
-    df_out = df.copy()
-    df_out["cluster"] = labels
-    sizes = df_out.groupby("cluster").size().rename("cluster_size").reset_index()
-    df_out = df_out.merge(sizes, on="cluster", how="left")
-
-    # Nice column order for quick review
-    cols = [c for c in ["cluster","cluster_size","source","published","title","summary","url"]
-            if c in df_out.columns]
-    cols = cols + [c for c in df_out.columns if c not in cols]  # keep everything else after
-
-    # 1) Article-level CSV
-    if save in ("csv","both"):
-        csv_path = out_base / "articles.csv"
-        df_out.to_csv(csv_path, index=False, encoding="utf-8-sig")
-        # Cluster summary CSV (sizes + example title)
-        summary = (df_out.groupby("cluster")
-                   .agg(cluster_size=("cluster","size"),
-                        sources=("source", lambda s: ", ".join(sorted({x for x in s if x})[:5])),
-                        example_title=("title","first")))
-        summary = summary.sort_values("cluster_size", ascending=False).reset_index()
-        summary.to_csv(out_base / "clusters_summary.csv", index=False, encoding="utf-8-sig")
-
-    # 2) Cluster-level JSONL (nested items)
-    if save in ("json","both"):
-        jsonl_path = out_base / "clusters.jsonl"
-        with jsonl_path.open("w", encoding="utf-8") as f:
-            for cid, sub in df_out.sort_values(["cluster","published"]).groupby("cluster"):
-                record = {
-                    "cluster": int(cid),
-                    "size": int(sub.shape[0]),
-                    "items": sub[["source","title","summary","url","published"]]
-                                .to_dict(orient="records")
-                }
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
-
-    # Tiny README with stats
-    readme = out_base / "README.txt"
-    with readme.open("w", encoding="utf-8") as f:
-        n_articles = len(df_out)
-        n_clusters = df_out["cluster"].nunique()
-        n_singletons = int((df_out.groupby("cluster").size() == 1).sum())
-        f.write(
-            f"Articles: {n_articles}\n"
-            f"Clusters: {n_clusters}\n"
-            f"Singletons: {n_singletons} ({n_singletons/max(1,n_articles)*100:.1f}%)\n"
-            f"\nFiles:\n- articles.csv\n- clusters_summary.csv\n- clusters.jsonl\n"
-        )
-        if run_params:
-            f.write("\nRun params:\n")
-            # print only keys that have values
-            for k in ["threshold","analyzer","ngrams","min_df","max_df","title_weight",
-                      "processed_dir","max_articles","window_days","window_hours",
-                      "date_from","date_to","stopwords"]:
-                v = run_params.get(k, None)
-                if v not in (None, "", []):
-                    f.write(f"- {k}: {v}\n")
-
-    print(f"[INFO] Saved outputs to {out_base}")
-
-
-
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser()
-    ap.add_argument("--processed-dir", default="data/processed", help="Folder with processed .json/.jsonl")
+    ap.add_argument("--processed-dir", default="data/processed", help="Folder with processed .json/.jsonl(.gz/.zst)")
     ap.add_argument("--threshold", type=float, default=0.83, help="Distance threshold (0–1, cosine distance)")
     ap.add_argument("--min-df", type=int, default=2, help="Ignore terms that appear in fewer than min_df docs")
     ap.add_argument("--max-df", type=float, default=0.75, help="Ignore terms that appear in more than max_df fraction")
     ap.add_argument("--ngrams", nargs=2, type=int, default=[1, 2], help="n-gram range, e.g. --ngrams 1 2")
-    ap.add_argument("--max-articles", type=int, default=2000, help="Cap to avoid huge distance matrices")
+    ap.add_argument("--max-articles", type=int, default=None,
+                    help="Optional hard cap (keeps the newest N); normally the planner handles size")
+    ap.add_argument("--memory-budget", type=float, default=1024,
+                    help="MB the clustering may use; picks dense / sparse / blocked to fit")
+    ap.add_argument("--strategy", choices=STRATEGIES, default="auto",
+                    help="Force a clustering strategy instead of letting the planner choose")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Cluster time shards in N processes and stitch them (0 = all cores)")
+    ap.add_argument("--shard-rows", type=int, default=5000, help="Articles per shard with --workers")
+    ap.add_argument("--shard-overlap", type=int, default=1000, help="Articles shared by neighbouring shards")
     ap.add_argument("--date-from", type=str, default=None, help="Start date (YYYY-MM-DD), inclusive")
     ap.add_argument("--date-to",   type=str, default=None, help="End date (YYYY-MM-DD), inclusive")
-    ap.add_argument("--window-days", type=int, default=2, help="Keep only the last N whole days (by published date)")
+    ap.add_argument("--window-days", type=int, default=2, help="Keep only the last N whole days (by published date); 0 = all")
     ap.add_argument("--window-hours", type=int, default=None, help="Keep only the last N hours (rolling window)")
-    # ap.add_argument("--char", action="store_true", help="Use character 3–5 TF-IDF instead of word 1–2")
+    ap.add_argument("--columns", choices=list(LOAD_COLUMNS), default="output",
+                    help="Record keys to load: all, output (what the output files show), cluster (also drops summary)")
+    ap.add_argument("--arrow-strings", action="store_true",
+                    help="Keep text columns as Arrow-backed strings (needs pyarrow)")
+    ap.add_argument("--features", choices=["word", "char", "hybrid"], default="word",
+                    help="TF-IDF features: word n-grams, char_wb n-grams, or weighted word+char hybrid")
+    ap.add_argument("--stem", action="store_true",
+                    help="Light Hebrew stemming (strip ו/ה/ב/ל/מ/ש/כ prefixes, plural suffixes) before vectorizing")
+    ap.add_argument("--char-ngrams", nargs=2, type=int, default=[3, 5], help="char n-gram range, e.g. --char-ngrams 3 5")
+    ap.add_argument("--char-weight", type=float, default=0.5, help="Weight of the char block in hybrid mode")
+    ap.add_argument("--feature-budget-mb", type=float, default=None,
+                    help="Cap the TF-IDF matrix to this many MB (drops most frequent features first)")
+    ap.add_argument("--mode", choices=["agglomerative", "cross"], default="agglomerative",
+                    help="agglomerative = all pairs; cross = only compare across outlets (top-k per article)")
+    ap.add_argument("--top-k", type=int, default=3, help="Cross mode: partners kept per article and outlet pair")
+    ap.add_argument("--no-mutual", action="store_true", help="Cross mode: keep one-sided top-k links too")
+    ap.add_argument("--vectorizer", choices=VECTORIZERS, default="tfidf",
+                    help="tfidf / hashing (sparse) or embed / fake (dense, cached per record_key)")
+    ap.add_argument("--embed-model", default=None, help="Local model name/path for --vectorizer embed")
+    ap.add_argument("--vector-cache", default="data/vectors", help="Folder for the memory-mapped vector cache")
+    ap.add_argument("--vector-dtype", choices=["float16", "float32"], default="float16")
+    ap.add_argument("--embed-batch", type=int, default=64, help="Texts per inference batch")
+    ap.add_argument("--embed-threads", type=int, default=None, help="Inference threads (default: min(4, cpus))")
 
     ap.add_argument("--out-dir", default="data/clustered")
     ap.add_argument("--save", choices=["csv","json","both"], default="both")
-
-    args = ap.parse_args()
-
-    df = load_articles(args.processed_dir)
+    ap.add_argument("--columnar", action="store_true", help="Also write articles.parquet (needs pyarrow)")
+    ap.add_argument("--compress", choices=["gz", "zst"], default=None, help="Write clusters.jsonl.gz / .zst instead of clusters.jsonl")
+    ap.add_argument("--label-terms", type=int, default=8, help="Top c-TF-IDF terms per cluster in clusters_summary.csv (0 = off)")
+    ap.add_argument("--no-lineage", action="store_true", help="Don't map clusters to persistent event IDs")
+    ap.add_argument("--lineage-min-jaccard", type=float, default=0.3,
+                    help="Min member Jaccard to link a cluster to a previous run's event")
+    ap.add_argument("--lineage-keep-days", type=float, default=7,
+                    help="Forget lineage members not seen for this many days (0 = keep all)")
+    ap.add_argument("--index-dir", default=INDEX_DIR,
+                    help="Search index to tag with this run's event IDs (analysis/search_index.py; '' = off)")
+    ap.add_argument("--threads", action="store_true", help="Link clusters into multi-day story threads")
+    ap.add_argument("--thread-dir", default="data/threads", help="Centroid index for --threads")
+    ap.add_argument("--thread-days", type=int, default=7, help="Days to look back for a thread to continue")
+    ap.add_argument("--thread-min-sim", type=float, default=0.5, help="Min centroid cosine to continue a thread")
+
+    args = ap.parse_args(argv)
+
+    # window_hours only needs a couple of files; whole days otherwise
+    push_days = file_window_days(args.window_days, args.window_hours)
+    with span("load_articles"):
+        df = load_articles(args.processed_dir, date_from=args.date_from, date_to=args.date_to,
+                           window_days=push_days, columns=LOAD_COLUMNS[args.columns],
+                           arrow_strings=args.arrow_strings)
     print(f"[INFO] Loaded {len(df)} articles from {args.processed_dir}")
+    count("records_in", len(df))
 
     ############### Dedup before building text for clustering
     # Parse published -> _dt (UTC), then sort so "keep='last'" is meaningful
     if "published" not in df.columns:
         df["published"] = None
 
-    df["_dt"] = pd.to_datetime(df["published"], utc=True, errors="coerce")
+    df["_dt"] = parse_article_dt(df)
+    df = apply_date_filters(df, date_from=args.date_from, date_to=args.date_to,
+                            window_days=args.window_days, window_hours=args.window_hours)
     df = df.sort_values("_dt", na_position="first")
 
-    # Dedup within each source by normalized title (keep latest)
-    df = (df
-        .drop_duplicates(subset=["source", "title_norm_min"], keep="last")
-        .reset_index(drop=True))
+    # Dedup within each source by normalized title (keep latest); token ids stand in for title_norm_min.
+    # The key lives in a two-column side frame, so df itself is copied once (not add/drop/reset)
+    dup = pd.DataFrame({"s": df["source"].to_numpy(), "k": token_column(df, "title").row_keys()}).duplicated(keep="last")
+    df = df[~dup.to_numpy()].reset_index(drop=True)
 
     ###############
 
-    df2, labels = cluster(
-        df,
-        threshold=args.threshold,
-        ngram_low=args.ngrams[0],
-        ngram_high=args.ngrams[1],
-        min_df=args.min_df,
-        max_df=args.max_df,
-        max_articles=args.max_articles
-        # use_char=args.char
-    )
+    with span("cluster"):
+        df2, labels = cluster(
+            df,
+            threshold=args.threshold,
+            ngram_low=args.ngrams[0],
+            ngram_high=args.ngrams[1],
+            min_df=args.min_df,
+            max_df=args.max_df,
+            max_articles=args.max_articles,
+            memory_budget_mb=args.memory_budget,
+            strategy=args.strategy,
+            workers=args.workers,
+            shard_rows=args.shard_rows,
+            shard_overlap=args.shard_overlap,
+            stem=args.stem,
+            mode=args.mode,
+            top_k=args.top_k,
+            mutual=not args.no_mutual,
+            vectorizer=args.vectorizer,
+            vector_opts={
+                "features": args.features,
+                "char_ngram_range": tuple(args.char_ngrams),
+                "char_weight": args.char_weight,
+                "memory_budget_mb": args.feature_budget_mb,
+                "model": args.embed_model,
+                "cache_dir": args.vector_cache,
+                "dtype": args.vector_dtype,
+                "batch_size": args.embed_batch,
+                "n_threads": args.embed_threads,
+            },
+        )
+
+    if not len(labels):                 # empty window (e.g. --date-from in the future): no run folder
+        print("[INFO] nothing to cluster")
+        return
 
     #show_report(df2, labels)
 
     run_params = {
     "threshold": args.threshold,
-    "analyzer": "char" if getattr(args, "char", False) else "word",
+    "analyzer": args.features,
+    "vectorizer": args.vectorizer,
+    "mode": args.mode,
     "ngrams": tuple(args.ngrams),
     "min_df": args.min_df,
     "max_df": args.max_df,
@@ -444,8 +624,36 @@ def main():
     "date_from": getattr(args, "date_from", None),
     "date_to": getattr(args, "date_to", None),
     "stopwords": getattr(args, "stopwords", None),
+    "matrix": df2.attrs.get("matrix"),
+    "strategy": (df2.attrs.get("plan") or {}).get("strategy"),
+    "memory_budget": args.memory_budget,
+    "stem": args.stem,
     }
-    save_cluster_outputs(df2, labels, out_dir=args.out_dir, save=args.save, run_params=run_params)
+    he_stop = load_stopwords(STOPWORDS_PATH) if STOPWORDS_PATH.exists() else None
+    with span("save_outputs"):
+        out_base = save_cluster_outputs(df2, labels, out_dir=args.out_dir, save=args.save, run_params=run_params,
+                                        columnar=args.columnar, compress=args.compress, label_terms=args.label_terms, stop_words=he_stop)
+    count("records_out", len(df2))
+    count("clusters", int(len(set(labels))) if len(labels) else 0)
+
+    # persistent event IDs: data/clustered/lineage/ + <run>/cluster_events.csv
+    if not args.no_lineage and len(labels):
+        table = update_lineage(out_base, df2, labels, lineage_dir=Path(args.out_dir) / "lineage",
+                               min_jaccard=args.lineage_min_jaccard, keep_days=args.lineage_keep_days)
+        if table is not None and args.index_dir and SearchIndex.exists(args.index_dir):
+            # only this run's articles, only the days it loaded (not the whole archive)
+            by_cluster = dict(zip(table["cluster"].tolist(), table["event_id"].tolist()))
+            events = dict(zip(df2["record_key"].astype(str), (by_cluster.get(int(c)) for c in labels)))
+            days = (df2["_file_date"].dropna().astype(str).unique().tolist() if "_file_date" in df2.columns
+                    else None)
+            linked = SearchIndex(args.index_dir).attach_events(events=events, days=days)
+            print(f"[INFO] Search index: {linked} articles linked to events")
+
+    # multi-day story threads (centroid index under --thread-dir)
+    if args.threads and len(labels):
+        threads = story_threads.run_day(df2, labels, story_threads.run_day_of(df2), args.thread_dir,
+                                        lookback=args.thread_days, min_sim=args.thread_min_sim, stop_words=he_stop)
+        threads.to_csv(out_base / "cluster_threads.csv", index=False, encoding="utf-8-sig")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+# analysis/hebrew_stem.py
+"""
+Light Hebrew stemmer for clustering (optional, `group_similar --stem`).
+
+Hebrew glues function words onto the next word (ו/ה/ב/ל/מ/ש/כ and combinations),
+so "הממשלה", "בממשלה" and "והממשלה" end up as three TF-IDF columns. stem() maps
+them to one form, in two steps on norm_min tokens:
+
+1) prefix: strip the longest clitic sequence from PREFIXES (grammatical
+   combinations only: ו + ש/כש + מ/ב/ל/כ + ה) as long as >= MIN_STEM letters remain.
+2) suffix: plural / possessive endings (ים, ות, יהם, ...) with the same floor,
+   then the new last letter gets its final form (מלכים -> מלך).
+
+Words whose first letters ARE the root (משטרה, מלחמה, שלום, בית...) would be
+mangled by rule 1, so a trie of protected stems is checked first: if the word,
+or what is left after a candidate prefix, starts with a protected stem, nothing
+beyond that prefix is stripped. The trie matches stem prefixes, so "משטר"
+protects משטרה / משטרת / משטרתי at once.
+
+Rules are deterministic string ops; stem() is memoized (lru_cache), and
+stem_vocab() stems each TokenVocab entry once, so a whole corpus costs one
+call per distinct token, not per occurrence. Non-Hebrew tokens (<NUM>, latin)
+and stopwords pass through unchanged.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:                                # stem() alone shouldn't pull in scipy (search_index query)
+    from analysis.token_cache import TokenVocab
+
+MIN_STEM = 3
+HEBREW_WORD = re.compile(r"[א-ת]+")
+
+# longest first; ה after ב/ל/כ is swallowed in writing, so "בה"/"לה" are not prefixes
+PREFIXES = tuple(sorted({
+    "ו", "ה", "ב", "ל", "מ", "ש", "כ",
+    "וה", "וב", "ול", "ומ", "וש", "וכ",
+    "שה", "שב", "של", "שמ", "שכ", "מה", "כש",
+    "ושה", "ושב", "ושל", "ושמ", "ומה", "וכש", "כשה", "לכש", "מש",
+}, key=len, reverse=True))
+SUFFIXES = ("ותיהם", "יהם", "יהן", "ים", "ות")
+SUFFIX_KEEP = frozenset({"ירושלים", "מצרים", "שמיים", "אופניים", "מכנסיים"})  # the ending is not a plural
+FINAL_FORMS = {"כ": "ך", "מ": "ם", "נ": "ן", "פ": "ף", "צ": "ץ"}
+
+# stems where a leading ו/ה/ב/ל/מ/ש/כ belongs to the word (news vocabulary)
+PROTECTED = (
+    "ממשל", "משטר", "מלחמ", "משפט", "משרד", "מדינ", "מפלג", "מחבל", "מבצע", "מחא", "מחיר",
+    "מכרז", "מנהל", "מועצ", "מוסד", "מטוס", "מעצר", "מפקד", "מסיב", "מגזר", "משבר", "מרכז",
+    "מלון", "מדע", "מטבע", "מים", "מכונ", "מלכ", "מזג", "מניות", "משכנת", "מסעד", "מוזי", "מלאכ",
+    "שלום", "שביתה", "שבית", "שריפ", "שופט", "שוטר", "שגריר", "שבוע", "שנה", "שנים", "שוק",
+    "שמאל", "שירות", "שיר", "שכונ", "שקל", "שרב", "שר", "שלט", "שטח",
+    "ביטחון", "ביטח", "בית", "בחיר", "בנק", "בריאות", "בורס", "בינ", "בריכ",
+    "לבנון", "לחימ", "לחץ", "ליכוד", "לקוח",
+    "הסכם", "הסדר", "הפגנ", "הצבע", "הסתדרות", "החלט", "הגנ", "הופע", "הורים", "היסטור",
+    "כנסת", "כלכל", "כוח", "כוחות", "כבאות", "כושר", "כדור",
+    "ועד", "וידאו",
+)
+
+
+class _Trie:
+    """Protected stems; longest(word, i) = length of the longest protected stem at word[i:]."""
+
+    __slots__ = ("root",)
+    END = ""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Dict[str, dict] = {}
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[self.END] = {}
+
+    def longest(self, word: str, i: int = 0) -> int:
+        node, best = self.root, 0
+        for j in range(i, len(word)):
+            node = node.get(word[j])
+            if node is None:
+                break
+            if self.END in node:
+                best = j - i + 1
+        return best
+
+
+_TRIE = _Trie(PROTECTED)
+
+
+def _final(word: str) -> str:
+    return word[:-1] + FINAL_FORMS.get(word[-1], word[-1]) if word else word
+
+
+def _strip_prefix(word: str) -> str:
+    if _TRIE.longest(word):
+        return word
+    # a protected stem right after a prefix wins (ובממשלה -> ממשלה, not משלה)
+    for p in PREFIXES:
+        if word.startswith(p) and _TRIE.longest(word, len(p)):
+            return word[len(p):]
+    for p in PREFIXES:
+        if word.startswith(p) and len(word) - len(p) >= MIN_STEM:
+            return word[len(p):]
+    return word
+
+
+def _strip_suffix(word: str) -> str:
+    if word in SUFFIX_KEEP:
+        return word
+    for s in SUFFIXES:
+        if word.endswith(s) and len(word) - len(s) >= MIN_STEM:
+            return _final(word[:-len(s)])
+    return word
+
+
+@lru_cache(maxsize=200_000)
+def stem(token: str) -> str:
+    """Stem one norm_min token; non-Hebrew tokens come back unchanged."""
+    if not HEBREW_WORD.fullmatch(token):
+        return token
+    return _strip_suffix(_strip_prefix(token))
+
+
+def stem_text(text: str, keep: frozenset = frozenset()) -> str:
+    """Stem every token of a norm_min string; tokens in `keep` (stopwords) stay as they are."""
+    if not isinstance(text, str):
+        return ""
+    return " ".join(t if t in keep else stem(t) for t in text.split())
+
+
+def stem_vocab(vocab: TokenVocab, keep: Optional[frozenset] = None) -> Tuple[TokenVocab, np.ndarray]:
+    """
+    (stem vocab, int32 map old id -> stem id): stems every vocab entry once, so token
+    columns are stemmed with one fancy-index (stemmed_ids = mapping[col.ids]).
+    Stopwords (vocab.stopwords unless `keep` is given) are not stemmed.
+    """
+    from analysis.token_cache import TokenVocab
+
+    keep = vocab.stopwords if keep is None else keep
+    out = TokenVocab(stopwords=vocab.stopwords)
+    mapping = np.fromiter((out.add(t if t in keep else stem(t)) for t in vocab.tokens),
+                          dtype=np.int32, count=len(vocab))
+    return out, mapping
@@ -0,0 +1,182 @@
+# analysis/online_cluster.py
+"""
+Incremental clustering for the resident worker (pipeline/worker.py).
+
+group_similar refits TF-IDF and reclusters the whole window on every run. The
+worker keeps the fitted vectorizer, the window's L2-normalized rows and their
+cluster ids in memory instead, and places each new headline on arrival:
+
+    sims = X_window @ x               (sparse, one column)
+    avg  = bincount(labels, sims) / cluster sizes
+
+avg[c] is exactly the average cosine similarity of x to the members of c --
+the same criterion average linkage uses -- so x joins the best cluster when
+avg >= 1 - threshold, else opens a new one. That is a leader-style pass (a new
+article never merges two existing clusters), so it drifts from the batch result
+over time; refit() re-runs the batch linkage on the window every refit_every
+new articles (or on demand), drops rows more than window_hours older than the
+newest one (same anchor as group_similar --window-hours), and keeps
+cluster ids stable by handing each new cluster the old id most of its members had.
+
+Terms first seen after the last fit are not in the vectorizer's vocabulary and
+are ignored until the next refit.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from analysis.cluster_planner import plan, run_plan
+
+
+class OnlineClusterer:
+    def __init__(self, threshold: float = 0.83, ngram_range=(1, 2), min_df: int = 2, max_df: float = 0.8,
+                 stop_words: Optional[Iterable[str]] = None, window_hours: float = 48, refit_every: int = 500,
+                 memory_budget_mb: float = 1024, flush_rows: int = 64):
+        self.threshold = threshold
+        self.ngram_range = tuple(ngram_range)
+        self.min_df = min_df
+        self.max_df = max_df
+        self.stop_words = sorted(stop_words) if stop_words else None
+        self.window_hours = window_hours
+        self.refit_every = refit_every
+        self.memory_budget_mb = memory_budget_mb
+        self.flush_rows = flush_rows
+
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.X = sp.csr_matrix((0, 0), dtype=np.float32)    # committed rows
+        self._pending: List[sp.csr_matrix] = []              # rows added since the last flush
+        self.labels = np.zeros(0, dtype=np.int64)           # committed + pending
+        self.sizes = np.zeros(0, dtype=np.int64)            # per cluster id
+        self.keys: List[str] = []
+        self.texts: List[str] = []
+        self.times: List[float] = []
+        self.next_id = 0
+        self.added_since_fit = 0
+        self.fitted_at = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    # --- batch ---
+    def _fit_vectorizer(self, texts: Sequence[str]):
+        min_df = self.min_df if len(texts) >= 2 * self.min_df else 1
+        for mdf, xdf in ((min_df, self.max_df), (1, 1.0)):     # tiny windows: fall back to keeping everything
+            v = TfidfVectorizer(ngram_range=self.ngram_range, min_df=mdf, max_df=xdf,
+                                stop_words=self.stop_words, dtype=np.float32)
+            try:
+                return v, v.fit_transform(texts).tocsr()
+            except ValueError:                                   # empty vocabulary after pruning
+                continue
+        return None, sp.csr_matrix((len(texts), 0), dtype=np.float32)
+
+    def fit(self, texts: Sequence[str], keys: Sequence[str], times: Optional[Sequence[float]] = None) -> dict:
+        """Replace the window with these articles and batch-cluster them."""
+        now = time.time()
+        self.texts, self.keys = list(texts), list(keys)
+        self.times = [now if t is None or t != t else float(t) for t in (times or [None] * len(self.texts))]
+        return self.refit(keep_ids=False)
+
+    def refit(self, now: Optional[float] = None, keep_ids: bool = True) -> dict:
+        """Drop rows outside the window, refit TF-IDF and rerun average linkage on what's left."""
+        t0 = time.perf_counter()
+        now = now or (max(self.times) if self.times else time.time())      # like --window-hours: back from the newest
+        if self.window_hours:
+            cutoff = now - self.window_hours * 3600
+            keep = [i for i, t in enumerate(self.times) if t >= cutoff]
+            if len(keep) < len(self.times):
+                if len(self.labels) == len(self.times):
+                    self.labels = self.labels[keep]
+                self.texts = [self.texts[i] for i in keep]
+                self.keys = [self.keys[i] for i in keep]
+                self.times = [self.times[i] for i in keep]
+        previous = self.labels.copy() if keep_ids and len(self.labels) == len(self.keys) else None
+
+        self.vectorizer, self.X = self._fit_vectorizer(self.texts) if self.texts else (None, sp.csr_matrix((0, 0), dtype=np.float32))
+        self._pending = []
+        n = self.X.shape[0]
+        if n and self.X.shape[1]:
+            fresh = run_plan(self.X, self.threshold, plan(self.X, self.threshold, self.memory_budget_mb, verbose=False),
+                             verbose=False)
+        else:
+            fresh = np.arange(n, dtype=np.int64)
+        self.labels = self._stable_ids(np.asarray(fresh, dtype=np.int64), previous)
+        self.sizes = np.bincount(self.labels, minlength=self.next_id).astype(np.int64)
+        self.added_since_fit = 0
+        self.fitted_at = now
+        return {"rows": n, "cols": int(self.X.shape[1]), "clusters": int((self.sizes > 0).sum()),
+                "seconds": round(time.perf_counter() - t0, 3)}
+
+    def _stable_ids(self, fresh: np.ndarray, previous: Optional[np.ndarray]) -> np.ndarray:
+        """Map batch labels to persistent ids: biggest overlaps first, each old id used once."""
+        out = np.empty_like(fresh)
+        taken, mapping = set(), {}
+        if previous is not None and len(previous):
+            overlaps = Counter(zip(fresh.tolist(), previous.tolist()))
+            for (new, old), _ in overlaps.most_common():
+                if new not in mapping and old not in taken:
+                    mapping[new] = old
+                    taken.add(old)
+        for new in np.unique(fresh).tolist():
+            if new not in mapping:
+                mapping[new] = self.next_id
+                self.next_id += 1
+        for new, cid in mapping.items():
+            out[fresh == new] = cid
+        self.next_id = max(self.next_id, int(out.max()) + 1 if out.size else 0)
+        return out
+
+    # --- incremental ---
+    def _flush(self):
+        if self._pending:
+            self.X = sp.vstack([self.X, *self._pending], format="csr", dtype=np.float32)
+            self._pending = []
+
+    def add(self, text: str, key: str, t: Optional[float] = None) -> dict:
+        """Place one article; returns {"cluster", "sim", "new_cluster"}."""
+        if self.vectorizer is not None:
+            x = self.vectorizer.transform([text]).astype(np.float32).tocsr()
+        else:
+            x = sp.csr_matrix((1, self.X.shape[1]), dtype=np.float32)
+        best, best_sim = -1, 0.0
+        if x.nnz and len(self.keys):
+            xt = x.T.tocsc()
+            sims = np.asarray((self.X @ xt).todense()).ravel()
+            if self._pending:
+                sims = np.concatenate([sims, np.asarray((sp.vstack(self._pending) @ xt).todense()).ravel()])
+            avg = np.bincount(self.labels, weights=sims, minlength=self.next_id)
+            live = self.sizes > 0
+            avg[live] /= self.sizes[live]
+            best = int(np.argmax(avg))
+            best_sim = float(avg[best])
+        new_cluster = best < 0 or best_sim < 1.0 - self.threshold
+        if new_cluster:
+            best = self.next_id
+            self.next_id += 1
+            self.sizes = np.append(self.sizes, 0)
+        self.sizes[best] += 1
+        self.labels = np.append(self.labels, best)
+        self.keys.append(key)
+        self.texts.append(text)
+        self.times.append(time.time() if t is None or t != t else float(t))
+        self._pending.append(x)
+        if len(self._pending) >= self.flush_rows:
+            self._flush()
+        self.added_since_fit += 1
+        return {"cluster": int(best), "sim": round(best_sim, 4), "new_cluster": new_cluster}
+
+    def needs_refit(self) -> bool:
+        return self.vectorizer is None or self.added_since_fit >= self.refit_every
+
+    def members(self, cluster_id: int) -> List[str]:
+        return [k for k, c in zip(self.keys, self.labels.tolist()) if c == cluster_id]
+
+    def stats(self) -> dict:
+        return {"rows": len(self.keys), "cols": int(self.X.shape[1]), "clusters": int((self.sizes > 0).sum()),
+                "multi_clusters": int((self.sizes > 1).sum()), "added_since_fit": self.added_since_fit,
+                "fitted_at": self.fitted_at}
@@ -5,6 +5,9 @@ from pathlib import Path
 import json
 from datetime import date
 
+from adapters.common.article import Article, write_articles
+from adapters.common.partition import partition_days, partition_files
+from adapters.common.storage import base_name, data_files, data_path, read_records
 from adapters.common.url_utils import (
     canonicalize_url,
     extract_url_id,
@@ -12,14 +15,29 @@ from adapters.common.url_utils import (
     normalize_text
 )
 from analysis.dataframe_hygiene import dataframe_hygiene
+from analysis.search_index import INDEX_DIR, SearchIndex
 from analysis.text_norm import norm_min
+from analysis.token_cache import VOCAB_FILE, TokenVocab, read_stopwords
+from pipeline.instrument import count, span
 
 Record = Dict[str, object]
 
-def preprocess(records: List[Record]) -> List[Record]:
-    out: List[Record] = []
+# where main() reads and writes; tests point these (or main's arguments) at tmp dirs
+RAW_DIR = Path("data/raw")
+ADAPTED_DIR = Path("data/adapted")
+PROCESSED_DIR = Path("data/processed")
+
+def preprocess(records: List[Record], vocab: TokenVocab | None = None) -> List[Article]:
+    """
+    Canonical url / record_key + normalized text per record.
+    With a vocab, also title_tok / summary_tok: the norm_min tokens as vocab ids
+    (see analysis/token_cache.py), so later stages never re-tokenize.
+    Takes dicts or Articles (adapters/common/article.py); returns new Articles,
+    the input records are not modified.
+    """
+    out: List[Article] = []
     for r in records or []:
-        rec = dict(r)
+        rec = Article.coerce(r)
         source = str(rec.get("source") or "").strip().lower()
         raw_url = str(rec.get("url") or "")
         can_url = canonicalize_url(raw_url)
@@ -32,6 +50,9 @@ def preprocess(records: List[Record]) -> List[Record]:
         rec["summary"] = normalize_text(summary)
         rec["title_norm_min"] = norm_min(title)
         rec["summary_norm_min"] = norm_min(summary)
+        if vocab is not None:
+            rec["title_tok"] = vocab.encode(rec["title_norm_min"])
+            rec["summary_tok"] = vocab.encode(rec["summary_norm_min"])
 
         record_key = build_record_key(source, can_url, url_id)
 
@@ -43,29 +64,38 @@ def preprocess(records: List[Record]) -> List[Record]:
 
 
 # --- quick demo runner using your 2 JSON files ---
-def main():
-    import json, re
-    from pathlib import Path
-    from typing import Dict, List
+def main(raw_dir=None, adapted_dir=None, out_dir=None, vocab_path=None, index_dir=None):
+    """
+    Preprocess every raw/adapted day into <out_dir>/combined_<day>.
+    Defaults are the module-level RAW_DIR / ADAPTED_DIR / PROCESSED_DIR, the vocab
+    next to the processed files and the search index at INDEX_DIR.
+    """
+    import re
     # make sure this import is at the top of the module in your file:
     # from preprocessing.preprocess import preprocess
 
-    n12_dir = Path("data/raw")
-    c14_dir = Path("data/adapted")
-    out_dir = Path("data/processed")
+    n12_dir = Path(raw_dir or RAW_DIR)
+    c14_dir = Path(adapted_dir or ADAPTED_DIR)
+    out_dir = Path(out_dir or PROCESSED_DIR)
     out_dir.mkdir(parents=True, exist_ok=True)
+    vocab_path = Path(vocab_path or out_dir / VOCAB_FILE)
 
     date_pat = re.compile(r"\d{4}-\d{2}-\d{2}$")
 
     def extract_date(p: Path) -> str | None:
-        token = p.stem.split("_")[-1]
+        token = base_name(p).split("_")[-1]
         return token if date_pat.fullmatch(token) else None
 
     # collect files
-    c14_files = sorted(c14_dir.glob("c14_adapted_*.json"))
-    n12_files = sorted(n12_dir.glob("n12_rss_*.json"))
+    c14_files = data_files(c14_dir, "c14_adapted_")      # .json / .jsonl(.gz/.zst), see adapters/common/storage.py
+    n12_files = data_files(n12_dir, "n12_rss_")
     all_files = c14_files + n12_files
 
+    # token ids are shared by every processed file -> one append-only vocab next to them
+    vocab = TokenVocab.load(vocab_path)
+    # search index (analysis/search_index.py), updated per day; unchanged days are skipped
+    index = SearchIndex(index_dir or INDEX_DIR, stopwords=read_stopwords())
+
     # group by date
     groups: Dict[str, List[Path]] = {}
     for f in all_files:
@@ -79,20 +109,25 @@ def main():
         print("No input files found.")
         return
 
+    # days already compacted into a monthly partition are closed (pipeline/compact.py)
+    compacted = {d for p in partition_files(out_dir, "combined_") for d in partition_days(p)}
+    skipped = sorted(d for d in groups if d in compacted)
+    if skipped:
+        print(f"[INFO] Skipping {len(skipped)} compacted days ({skipped[0]} .. {skipped[-1]})")
+
     # process each date separately
     for d in sorted(groups.keys()):
+        if d in compacted:
+            continue
         files = groups[d]
         records: List[dict] = []
 
         for f in files:
             try:
-                with f.open(encoding="utf-8") as fh:
-                    data = json.load(fh)
-                if isinstance(data, list):
-                    records.extend(data)
-                    print(f"[{d}] Loaded {len(data):4d} from {f.name}")
-                else:
-                    print(f"[{d}] Skipped (not a list): {f.name}")
+                with span("json_read"):
+                    data = read_records(f)
+                records.extend(data)
+                print(f"[{d}] Loaded {len(data):4d} from {f.name}")
             except Exception as e:
                 print(f"[{d}] Failed to load {f.name}: {e}")
 
@@ -100,14 +135,33 @@ def main():
             print(f"[{d}] No records to process.")
             continue
 
-        processed = preprocess(records)
-        cleaned = dataframe_hygiene(processed)
-
-        out_file = out_dir / f"combined_{d}.json"
-        with out_file.open("w", encoding="utf-8") as fh:
-            json.dump(cleaned, fh, ensure_ascii=False, indent=2)
+        with span("preprocess"):
+            processed = preprocess(records, vocab=vocab)
+        with span("dataframe_hygiene"):
+            cleaned = dataframe_hygiene(processed)
+        count("records_in", len(records))
+        count("records_out", len(cleaned))
+
+        out_file = data_path(out_dir / f"combined_{d}")
+        with span("json_write"):
+            out_file = write_articles(out_file, cleaned)
+        with span("index_update"):
+            st = out_file.stat()
+            try:
+                index.update_day(d, cleaned, stamp=[out_file.name, st.st_size, st.st_mtime_ns])
+            except Exception as e:
+                print(f"[{d}] [WARN] Search index not updated: {e}")
         print(f"[{d}] records loaded: {len(records)}, after preprocess: {len(processed)}, after dedup: {len(cleaned)}")
 
+    vocab.save(vocab_path)
+    try:
+        index.merge_closed_months()
+        index.save()
+    except Exception as e:
+        print(f"[WARN] Search index not saved: {e}")
+    index.close()
+    print(f"[INFO] Token vocab: {len(vocab)} tokens -> {vocab_path}")
+
 
 
 
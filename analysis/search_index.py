@@ -0,0 +1,697 @@
+# analysis/search_index.py
+"""
+Inverted index over the processed archive: "what did each outlet publish about X last week"
+without loading data/processed into pandas.
+
+Terms are the tokens of title_norm_min + summary_norm_min, stemmed with
+analysis.hebrew_stem (so "בעזה" / "ועזה" / "עזה" are one term), minus stopwords
+and <NUM>-style placeholders. The index is a set of immutable segments plus a manifest:
+
+    data/index/manifest.json      segments, which day lives where, content fingerprints
+    data/index/seg_000042.idx     one segment (usually one day; closed months get merged)
+    data/index/seg_000042.events.npy   event_id per doc (cluster_lineage), optional
+
+Segment file (same idea as adapters/common/partition.py: sections + JSON footer):
+
+    terms      sorted UTF-8 blob + uint32 offsets (binary search, never loaded into a dict)
+    postings   per term: first doc id + sorted deltas as uint8 / uint16 / uint32 (narrowest
+               width that fits; a 1-doc term costs no posting bytes at all)
+    facets     per doc: pub day (date ordinal), published ts, source code, file day
+    docs       [record_key, source, title, url, published_iso] in zlib'd JSON blocks of 64
+
+Everything is read through mmap, so a query touches the footer, a few term
+probes, its postings and the doc blocks of the hits it returns.
+
+Updates are per day: preprocessing calls update_day() after writing
+combined_<date>; an unchanged day (same fingerprint) is skipped, a changed one
+gets a fresh segment and the old copy of that day is dropped (or, inside a merged
+segment, masked until the next merge). Single-day segments of older months are
+merged into one segment per month.
+
+Usage:
+  python main.py query "עזה" --days 7                 # AND of all words, newest first
+  python main.py query "חטופים עסקה" --source n12 c14 --per-source 5
+  python -m analysis.search_index build --processed-dir data/processed    # (re)index what's on disk
+  python -m analysis.search_index events --lineage-dir data/clustered/lineage
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adapters.common.partition import iter_partition_records, partition_files, read_footer
+from adapters.common.storage import base_name, data_files, iter_records
+from analysis.hebrew_stem import stem
+from analysis.text_norm import norm_min
+
+INDEX_DIR = "data/index"
+FIELDS = ("title_norm_min", "summary_norm_min")
+DOC_KEYS = ("record_key", "source", "title", "url", "published_iso")
+DOC_BLOCK = 64
+WIDTHS = (np.uint8, np.uint16, np.uint32)
+MAGIC = b"IMMI1\n"
+TAIL = b"IMMI"
+WORD = re.compile(r"\w\w+")                      # same as TfidfVectorizer's token_pattern
+DAY_IN_NAME = re.compile(r"_(\d{4}-\d{2}-\d{2})$")
+
+
+# --- terms + postings ---
+def terms_of(text, stop: frozenset = frozenset()) -> List[str]:
+    """norm_min text -> index terms (stemmed, no stopwords / placeholders)."""
+    if not isinstance(text, str) or not text:
+        return []
+    return [stem(t) for t in text.split() if t not in stop and WORD.fullmatch(t)]
+
+
+def query_terms(text: str, stop: frozenset = frozenset()) -> List[str]:
+    """Raw query -> the same terms the documents were indexed with (deduped, in order)."""
+    return list(dict.fromkeys(terms_of(norm_min(text), stop)))
+
+
+def encode_postings(ids: np.ndarray) -> Tuple[int, int, bytes]:
+    """Sorted doc ids -> (first id, width code, delta bytes)."""
+    deltas = np.diff(ids)
+    top = int(deltas.max()) if len(deltas) else 0
+    w = 0 if top < 1 << 8 else 1 if top < 1 << 16 else 2
+    return int(ids[0]), w, deltas.astype(WIDTHS[w]).tobytes()
+
+
+def decode_postings(first: int, w: int, buf) -> np.ndarray:
+    deltas = np.frombuffer(buf, dtype=WIDTHS[w])
+    out = np.empty(len(deltas) + 1, dtype=np.int64)
+    out[0] = first
+    np.cumsum(deltas, out=out[1:])
+    out[1:] += first
+    return out
+
+
+def _day_ord(s) -> Optional[int]:
+    try:
+        return date.fromisoformat(str(s)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _ts(s) -> int:
+    try:
+        return int(datetime.fromisoformat(str(s)).timestamp())
+    except ValueError:
+        return 0
+
+
+def fingerprint(records: Iterable) -> str:
+    """Content hash of a day (order-free: compaction re-sorts rows by source)."""
+    parts = sorted(hashlib.blake2b("\x1f".join(str(r.get(k) or "") for k in DOC_KEYS + FIELDS).encode("utf-8"),
+                                   digest_size=16).digest() for r in records)
+    return hashlib.blake2b(b"".join(parts), digest_size=16).hexdigest()
+
+
+# --- segments ---
+class SegmentData:
+    """What a segment holds, in memory (built from records or merged from other segments)."""
+
+    def __init__(self):
+        self.rows: List[list] = []               # DOC_KEYS values per doc
+        self.day: List[int] = []                 # file day (ordinal)
+        self.pub: List[int] = []                 # publish day (ordinal), file day if unknown
+        self.ts: List[int] = []
+        self.source: List[str] = []
+        self.events: List[int] = []
+        self.postings: Dict[str, list] = {}
+
+    def add_records(self, day: str, records: Iterable, stop: frozenset):
+        fd = date.fromisoformat(day).toordinal()
+        for r in records:
+            i = len(self.rows)
+            row = [r.get(k) for k in DOC_KEYS]
+            self.rows.append(row)
+            self.day.append(fd)
+            self.pub.append(_day_ord(row[4]) or fd)
+            self.ts.append(_ts(row[4]) if row[4] else 0)
+            self.source.append("" if row[1] is None else str(row[1]))
+            self.events.append(-1)
+            for t in set(t for f in FIELDS for t in terms_of(r.get(f), stop)):
+                self.postings.setdefault(t, []).append(i)
+        return self
+
+    def write(self, path) -> dict:
+        """Atomic. Returns the footer."""
+        path = Path(path)
+        sources = sorted(set(self.source))
+        code = {s: i for i, s in enumerate(sources)}
+        terms = sorted(self.postings)
+        firsts, widths, post_offs, blobs, pos = [], [], [0], [], 0
+        for t in terms:
+            f, w, b = encode_postings(np.asarray(self.postings[t], dtype=np.int64))
+            firsts.append(f)
+            widths.append(w)
+            blobs.append(b)
+            pos += len(b)
+            post_offs.append(pos)
+        term_bytes = [t.encode("utf-8") for t in terms]
+        term_offs = np.zeros(len(terms) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in term_bytes], out=term_offs[1:])
+        blocks, block_offs, pos = [], [0], 0
+        for a in range(0, len(self.rows), DOC_BLOCK):
+            b = zlib.compress(json.dumps(self.rows[a:a + DOC_BLOCK], ensure_ascii=False).encode("utf-8"), 6)
+            blocks.append(b)
+            pos += len(b)
+            block_offs.append(pos)
+
+        sections = [
+            ("term_blob", b"".join(term_bytes)),
+            ("term_offs", term_offs),
+            ("first", np.asarray(firsts, dtype=np.int32)),
+            ("width", np.asarray(widths, dtype=np.uint8)),
+            ("post_offs", np.asarray(post_offs, dtype=np.int64)),
+            ("postings", b"".join(blobs)),
+            ("day", np.asarray(self.day, dtype=np.int32)),
+            ("pub", np.asarray(self.pub, dtype=np.int32)),
+            ("ts", np.asarray(self.ts, dtype=np.int64)),
+            ("source", np.asarray([code[s] for s in self.source], dtype=np.uint16)),
+            ("block_offs", np.asarray(block_offs, dtype=np.int64)),
+            ("blocks", b"".join(blocks)),
+        ]
+        footer = {"version": 1, "docs": len(self.rows), "terms": len(terms), "sources": sources,
+                  "days": sorted({date.fromordinal(d).isoformat() for d in self.day}), "sections": {}}
+        tmp = path.with_name(f".{path.name}.tmp{os.getpid()}")
+        try:
+            with tmp.open("wb") as fh:
+                fh.write(MAGIC)
+                for name, data in sections:
+                    fh.write(b"\0" * (-fh.tell() % 8))               # aligned, so arrays map without copies
+                    raw = data.tobytes() if isinstance(data, np.ndarray) else data
+                    dtype = data.dtype.str if isinstance(data, np.ndarray) else "|u1"
+                    footer["sections"][name] = [fh.tell(), len(raw), dtype]
+                    fh.write(raw)
+                meta = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+                fh.write(meta)
+                fh.write(struct.pack("<Q", len(meta)) + TAIL)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        events_path = path.with_suffix(".events.npy")
+        if any(e >= 0 for e in self.events):
+            np.save(events_path, np.asarray(self.events, dtype=np.int32))
+        return footer
+
+
+class Segment:
+    """Read side of one .idx file, memory-mapped."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        n, tail = struct.unpack("<Q", self.mm[-12:-4])[0], self.mm[-4:]
+        if tail != TAIL:
+            raise ValueError(f"not an index segment: {path}")
+        self.footer = json.loads(self.mm[-12 - n:-12].decode("utf-8"))
+        self.sources = self.footer["sources"]
+        self.n_docs = self.footer["docs"]
+        self.n_terms = self.footer["terms"]
+        for name in ("term_offs", "first", "width", "post_offs", "day", "pub", "ts", "source", "block_offs"):
+            setattr(self, name, self._array(name))
+        self._tb = self.footer["sections"]["term_blob"][0]
+        self._pb = self.footer["sections"]["postings"][0]
+        self._bb = self.footer["sections"]["blocks"][0]
+        ev = self.path.with_suffix(".events.npy")
+        self.events = np.load(ev, mmap_mode="r") if ev.exists() else None
+
+    def _array(self, name) -> np.ndarray:
+        off, length, dtype = self.footer["sections"][name]
+        dt = np.dtype(dtype)
+        return np.frombuffer(self.mm, dtype=dt, count=length // dt.itemsize, offset=off)
+
+    def close(self):
+        self.events = None
+        for name in ("term_offs", "first", "width", "post_offs", "day", "pub", "ts", "source", "block_offs"):
+            setattr(self, name, None)
+        try:
+            self.mm.close()
+        except BufferError:                      # an array view is still alive somewhere; the GC will close it
+            pass
+        self._fh.close()
+
+    def term(self, i: int) -> str:
+        a, b = int(self.term_offs[i]), int(self.term_offs[i + 1])
+        return self.mm[self._tb + a:self._tb + b].decode("utf-8")
+
+    def find(self, term: str) -> int:
+        """Index of term, -1 if absent (binary search over the sorted blob)."""
+        key, lo, hi = term.encode("utf-8"), 0, self.n_terms
+        base, offs = self._tb, self.term_offs
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.mm[base + int(offs[mid]):base + int(offs[mid + 1])]
+            if t < key:
+                lo = mid + 1
+            elif t > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def postings_at(self, i: int) -> np.ndarray:
+        a, b = int(self.post_offs[i]), int(self.post_offs[i + 1])
+        return decode_postings(int(self.first[i]), int(self.width[i]), self.mm[self._pb + a:self._pb + b])
+
+    def postings(self, term: str) -> np.ndarray:
+        i = self.find(term)
+        return self.postings_at(i) if i >= 0 else np.empty(0, dtype=np.int64)
+
+    def docs(self, ids: Sequence[int]) -> List[list]:
+        """DOC_KEYS rows for these doc ids (one block decompressed per 64 docs)."""
+        cache: Dict[int, list] = {}
+        out = []
+        for i in ids:
+            b = int(i) // DOC_BLOCK
+            if b not in cache:
+                a, z = int(self.block_offs[b]), int(self.block_offs[b + 1])
+                cache[b] = json.loads(zlib.decompress(self.mm[self._bb + a:self._bb + z]).decode("utf-8"))
+            out.append(cache[b][int(i) % DOC_BLOCK])
+        return out
+
+    def load(self) -> SegmentData:
+        """Everything back in memory (for merges)."""
+        data = SegmentData()
+        data.rows = self.docs(range(self.n_docs))
+        data.day, data.pub, data.ts = self.day.tolist(), self.pub.tolist(), self.ts.tolist()
+        data.source = [self.sources[c] for c in self.source.tolist()]
+        data.events = self.events.tolist() if self.events is not None else [-1] * self.n_docs
+        data.postings = {self.term(i): self.postings_at(i).tolist() for i in range(self.n_terms)}
+        return data
+
+
+# --- the index ---
+class SearchIndex:
+    def __init__(self, root=INDEX_DIR, stopwords: Optional[Iterable[str]] = None):
+        self.root = Path(root)
+        p = self.root / "manifest.json"
+        self.manifest = (json.loads(p.read_text(encoding="utf-8")) if p.exists()
+                         else {"version": 1, "next": 1, "stopwords": sorted(stopwords or ()), "segments": {}, "days": {}})
+        if stopwords is not None:
+            self.manifest["stopwords"] = sorted(stopwords)
+        self.stop = frozenset(self.manifest["stopwords"])
+        self._open: Dict[str, Segment] = {}
+        self._drop: List[str] = []
+
+    @classmethod
+    def exists(cls, root=INDEX_DIR) -> bool:
+        return (Path(root) / "manifest.json").exists()
+
+    def segment(self, name: str) -> Segment:
+        seg = self._open.get(name)
+        if seg is None:
+            seg = self._open[name] = Segment(self.root / f"{name}.idx")
+        return seg
+
+    def close(self):
+        for seg in self._open.values():
+            seg.close()
+        self._open.clear()
+
+    def _new_name(self) -> str:
+        n = self.manifest["next"]
+        self.manifest["next"] = n + 1
+        return f"seg_{n:06d}"
+
+    def _forget_day(self, day: str):
+        """Take a day out of the index: its own segment goes, inside a merged one it is masked."""
+        info = self.manifest["days"].pop(day, None)
+        if not info:
+            return
+        seg = self.manifest["segments"].get(info["segment"])
+        if seg is None:
+            return
+        if seg["days"] == [day]:
+            self.manifest["segments"].pop(info["segment"])
+            self._drop.append(info["segment"])
+        else:
+            seg["dead"] = sorted(set(seg.get("dead", [])) | {day})
+
+    def update_day(self, day: str, records: Sequence, stamp: Optional[list] = None) -> bool:
+        """(Re)index one day's records. False when the day is already indexed with the same content."""
+        fp = fingerprint(records)
+        old = self.manifest["days"].get(day)
+        if old and old.get("fp") == fp:
+            if stamp is not None:
+                old["stamp"] = stamp
+            return False
+        self._forget_day(day)
+        if not records:
+            return True
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = self._new_name()
+        footer = SegmentData().add_records(day, records, self.stop).write(self.root / f"{name}.idx")
+        self.manifest["segments"][name] = {"days": [day], "docs": footer["docs"], "dead": []}
+        self.manifest["days"][day] = {"segment": name, "fp": fp, "docs": footer["docs"], "stamp": stamp}
+        return True
+
+    def merge(self, names: Sequence[str]) -> Optional[str]:
+        """Merge segments into one (dead days dropped). Returns the new segment's name."""
+        names = sorted(names)
+        out = SegmentData()
+        for name in names:
+            seg = self.segment(name)
+            data = seg.load()
+            dead = {date.fromisoformat(d).toordinal() for d in self.manifest["segments"][name].get("dead", [])}
+            keep = np.asarray([d not in dead for d in data.day], dtype=bool)
+            new_id = np.cumsum(keep) - 1 + len(out.rows)
+            for attr in ("rows", "day", "pub", "ts", "source", "events"):
+                vals = getattr(data, attr)
+                getattr(out, attr).extend(v for v, k in zip(vals, keep) if k)
+            for t, ids in data.postings.items():
+                ids = np.asarray(ids, dtype=np.int64)
+                ids = new_id[ids[keep[ids]]]
+                if len(ids):
+                    out.postings.setdefault(t, []).extend(ids.tolist())
+        name = self._new_name()
+        footer = out.write(self.root / f"{name}.idx")
+        for old in names:
+            self.manifest["segments"].pop(old)
+            self._drop.append(old)
+        self.manifest["segments"][name] = {"days": footer["days"], "docs": footer["docs"], "dead": []}
+        for d in footer["days"]:
+            self.manifest["days"][d]["segment"] = name
+        return name
+
+    def merge_closed_months(self) -> List[str]:
+        """One segment per month for every month but the newest (still being written)."""
+        by_month: Dict[str, List[str]] = {}
+        for name, seg in self.manifest["segments"].items():
+            months = {d[:7] for d in seg["days"]}
+            if len(months) == 1:
+                by_month.setdefault(months.pop(), []).append(name)
+        newest = max((d[:7] for d in self.manifest["days"]), default=None)
+        merged = []
+        for month, names in sorted(by_month.items()):
+            if month != newest and len(names) > 1:
+                merged.append(self.merge(names))
+                print(f"[INFO] Index: merged {len(names)} segments of {month} -> {merged[-1]}")
+        return merged
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        p = self.root / "manifest.json"
+        tmp = p.with_name(f".manifest.json.tmp{os.getpid()}")
+        tmp.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, p)
+        for name in self._drop:                  # only after the manifest stops pointing at them
+            seg = self._open.pop(name, None)
+            if seg is not None:
+                seg.close()
+            for f in (self.root / f"{name}.idx", self.root / f"{name}.events.npy"):
+                try:
+                    f.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:             # still mapped by a reader (Windows); next save retries
+                    print(f"[WARN] Could not remove {f}: {e}")
+                    continue
+        self._drop = [n for n in self._drop if (self.root / f"{n}.idx").exists()]
+
+    # --- reading ---
+    def query(self, text: str, date_from=None, date_to=None, sources: Optional[Sequence[str]] = None,
+              limit: int = 20, per_source: Optional[int] = None, any_term: bool = False,
+              top_clusters: int = 10) -> dict:
+        """
+        Articles matching all words of `text` (any word with any_term=True), newest first,
+        + counts per source / publish day / event over every match.
+        Dates filter on the publish day (YYYY-MM-DD, inclusive).
+        """
+        t0 = time.perf_counter()
+        terms = query_terms(text, self.stop)
+        lo = date.fromisoformat(date_from).toordinal() if date_from else None
+        hi = date.fromisoformat(date_to).toordinal() if date_to else None
+        want = set(sources) if sources else None
+        matches = []                             # (segment name, doc ids)
+        for name, info in sorted(self.manifest["segments"].items()):
+            if not terms:
+                break
+            if lo is not None and info["days"][-1] < date.fromordinal(lo).isoformat():
+                continue                         # published <= scraped, so nothing here is recent enough
+            seg = self.segment(name)
+            lists = sorted((seg.postings(t) for t in terms), key=len)
+            if any_term:
+                ids = np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+            else:
+                ids = lists[0]
+                for other in lists[1:]:
+                    if not len(ids):
+                        break
+                    ids = np.intersect1d(ids, other, assume_unique=True)
+            if not len(ids):
+                continue
+            keep = np.ones(len(ids), dtype=bool)
+            pub = seg.pub[ids]
+            if lo is not None:
+                keep &= pub >= lo
+            if hi is not None:
+                keep &= pub <= hi
+            if want is not None:
+                codes = [i for i, s in enumerate(seg.sources) if s in want]
+                keep &= np.isin(seg.source[ids], codes)
+            if info.get("dead"):
+                keep &= ~np.isin(seg.day[ids], [date.fromisoformat(d).toordinal() for d in info["dead"]])
+            if keep.any():
+                matches.append((name, ids[keep]))
+
+        # every match as columns: which segment, doc id, ts, source (global code), pub day, event
+        src_code: Dict[str, int] = {}
+        cols: Dict[str, list] = {"seg": [], "id": [], "ts": [], "src": [], "pub": [], "ev": []}
+        for k, (name, ids) in enumerate(matches):
+            seg = self.segment(name)
+            to_global = np.asarray([src_code.setdefault(x, len(src_code)) for x in seg.sources], dtype=np.int64)
+            cols["seg"].append(np.full(len(ids), k, dtype=np.int64))
+            cols["id"].append(ids)
+            cols["ts"].append(seg.ts[ids])
+            cols["src"].append(to_global[seg.source[ids]])
+            cols["pub"].append(seg.pub[ids])
+            cols["ev"].append(seg.events[ids].astype(np.int64) if seg.events is not None
+                              else np.full(len(ids), -1, dtype=np.int64))
+        m = {c: np.concatenate(v) if v else np.empty(0, dtype=np.int64) for c, v in cols.items()}
+        names, srcs, total = [name for name, _ in matches], list(src_code), len(m["id"])
+
+        by_source = {srcs[i]: int(n) for i, n in enumerate(np.bincount(m["src"], minlength=len(srcs))) if n}
+        by_day = {date.fromordinal(int(d)).isoformat(): int(n) for d, n in zip(*np.unique(m["pub"], return_counts=True))}
+        by_event: Dict[int, Dict[str, int]] = {}
+        has = m["ev"] >= 0
+        if has.any():
+            pairs, counts = np.unique(np.stack([m["ev"][has], m["src"][has]]), axis=1, return_counts=True)
+            for (e, c), n in zip(pairs.T.tolist(), counts.tolist()):
+                by_event.setdefault(e, {})[srcs[c]] = n
+
+        order = np.lexsort((m["id"], m["seg"], -m["ts"]))         # newest first
+        if per_source:
+            ranked = m["src"][order]
+            top = order[np.sort(np.concatenate([np.flatnonzero(ranked == c)[:per_source] for c in range(len(srcs))]
+                                               or [np.empty(0, dtype=np.int64)]))]
+        else:
+            top = order[:limit]
+        rows: Dict[int, list] = {}
+        for k in np.unique(m["seg"][top]).tolist():              # one pass per segment, shared doc blocks
+            pick = top[m["seg"][top] == k]
+            rows.update(zip(pick.tolist(), self.segment(names[k]).docs(m["id"][pick])))
+        hits = []
+        for i in top.tolist():
+            e = int(m["ev"][i])
+            hits.append({**dict(zip(DOC_KEYS, rows[i])), "day": date.fromordinal(int(m["pub"][i])).isoformat(),
+                         "event_id": f"E{e:06d}" if e >= 0 else None})
+        clusters = sorted(({"event_id": f"E{e:06d}", "hits": sum(per.values()), "sources": per}
+                           for e, per in by_event.items()), key=lambda c: (-c["hits"], c["event_id"]))
+        return {"query": text, "terms": terms, "total": total,
+                "by_source": dict(sorted(by_source.items(), key=lambda kv: -kv[1])),
+                "by_day": dict(sorted(by_day.items())), "clusters": clusters[:top_clusters], "hits": hits,
+                "took_ms": round((time.perf_counter() - t0) * 1000, 2)}
+
+    # --- events (cluster_lineage) ---
+    def attach_events(self, lineage_dir=None, events: Optional[Dict[str, str]] = None,
+                      days: Optional[Iterable[str]] = None) -> int:
+        """
+        event_id per indexed doc -> <segment>.events.npy.
+        events: {record_key: "E000123"} of one clustering run (only those docs change);
+                default = all of <lineage_dir>/members.csv.
+        days:   file days the run covered; only segments holding them are opened, and
+                only those days' doc blocks are decompressed. None = every segment.
+        Returns how many of the touched docs carry an event.
+        """
+        if events is None:
+            p = Path(lineage_dir) / "members.csv"
+            if not p.exists():
+                return 0
+            with p.open(encoding="utf-8", newline="") as fh:
+                events = {r["record_key"]: r["event_id"] for r in csv.DictReader(fh)}
+        ev = {k: int(e[1:]) for k, e in events.items() if isinstance(e, str) and e.startswith("E")}
+        days = None if days is None else {d for d in days if d}
+        ords = None if days is None else np.asarray([date.fromisoformat(d).toordinal() for d in days], dtype=np.int32)
+        found = 0
+        for name, info in self.manifest["segments"].items():
+            if days is not None and not days.intersection(info["days"]):
+                continue
+            seg = self.segment(name)
+            ids = np.arange(seg.n_docs) if ords is None else np.flatnonzero(np.isin(seg.day, ords))
+            if seg.events is not None and days is not None:
+                arr = np.array(seg.events, dtype=np.int32)
+            else:
+                arr = np.full(seg.n_docs, -1, dtype=np.int32)
+            new = np.asarray([ev.get(row[0], -1) for row in seg.docs(ids)], dtype=np.int32)
+            if days is not None:
+                new = np.where(new >= 0, new, arr[ids])          # docs this run didn't see keep their event
+            arr[ids] = new
+            seg.events = None
+            tmp = self.root / f".{name}.events.tmp{os.getpid()}.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, self.root / f"{name}.events.npy")
+            self._open.pop(name).close()
+            found += int((new >= 0).sum())
+        return found
+
+
+# --- building from data/processed ---
+def _processed_days(processed_dir) -> List[Tuple[str, list, Callable[[], list]]]:
+    """(day, stamp, reader) for every daily file + every day inside a partition (daily file wins)."""
+    daily = {}
+    for f in data_files(processed_dir, "combined_"):
+        m = DAY_IN_NAME.search(base_name(f))
+        if m:
+            st = f.stat()
+            daily[m.group(1)] = ([f.name, st.st_size, st.st_mtime_ns], lambda f=f: list(iter_records(f)))
+    out = dict(daily)
+    for p in partition_files(processed_dir, "combined_"):
+        st = p.stat()
+        for d in read_footer(p)["days"]:
+            if d not in daily:
+                out[d] = ([p.name, st.st_size, st.st_mtime_ns],
+                          lambda p=p, d=d: list(iter_partition_records(p, days=[d])))
+    return [(d, *out[d]) for d in sorted(out)]
+
+
+def build(processed_dir="data/processed", index_dir=INDEX_DIR, rebuild: bool = False) -> dict:
+    """Index every day on disk whose file changed since the last build; merge closed months."""
+    from analysis.token_cache import read_stopwords          # scipy; only needed when writing
+
+    t0 = time.perf_counter()
+    if rebuild and SearchIndex.exists(index_dir):
+        old = SearchIndex(index_dir)
+        old.manifest["days"] = {}
+        old._drop.extend(old.manifest["segments"])
+        old.manifest["segments"] = {}
+        old.save()
+    index = SearchIndex(index_dir, stopwords=read_stopwords())
+    days = _processed_days(processed_dir)
+    on_disk = {d for d, _, _ in days}
+    stats = {"days": len(days), "indexed": 0, "unchanged": 0, "removed": 0}
+    for d, stamp, read in days:
+        old = index.manifest["days"].get(d)
+        if old and old.get("stamp") == stamp:
+            stats["unchanged"] += 1
+            continue
+        if index.update_day(d, read(), stamp=stamp):
+            stats["indexed"] += 1
+        else:
+            stats["unchanged"] += 1
+    for d in [d for d in index.manifest["days"] if d not in on_disk]:
+        index._forget_day(d)
+        stats["removed"] += 1
+    index.merge_closed_months()
+    index.save()
+    size = sum(f.stat().st_size for f in Path(index_dir).glob("seg_*"))
+    docs = sum(s["docs"] for s in index.manifest["segments"].values())
+    print(f"[INFO] Index: {stats['indexed']} days indexed, {stats['unchanged']} unchanged, {stats['removed']} removed; "
+          f"{docs} docs in {len(index.manifest['segments'])} segments, {size / 2**20:.1f} MB "
+          f"({time.perf_counter() - t0:.1f}s) -> {index_dir}")
+    index.close()
+    return {**stats, "docs": docs, "segments": len(index.manifest["segments"]), "bytes": size}
+
+
+def print_result(res: dict):
+    print(f"[INFO] {res['total']} matches for {' + '.join(res['terms']) or '(no terms)'} in {res['took_ms']} ms")
+    if res["by_source"]:
+        print("  by source: " + ", ".join(f"{s or '?'} {n}" for s, n in res["by_source"].items()))
+    for c in res["clusters"]:
+        print(f"  {c['event_id']}: {c['hits']} hits ({', '.join(f'{s} {n}' for s, n in c['sources'].items())})")
+    for h in res["hits"]:
+        ev = f" [{h['event_id']}]" if h["event_id"] else ""
+        print(f"  {(h.get('published_iso') or h['day'])[:16]} {h.get('source') or '?':6s} {h.get('title')}{ev}")
+        if h.get("url"):
+            print(f"       {h['url']}")
+
+
+def window(days: Optional[int], date_from=None, date_to=None) -> Tuple[Optional[str], Optional[str]]:
+    """--days N (counting today) -> (from, to) unless explicit dates are given."""
+    if days and not date_from:
+        end = date.fromisoformat(date_to) if date_to else date.today()
+        date_from = (end - timedelta(days=days - 1)).isoformat()
+    return date_from, date_to
+
+
+def add_query_arguments(ap: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    ap.add_argument("text", nargs="+", help="Words to look for (all of them, see --any)")
+    ap.add_argument("--index-dir", default=INDEX_DIR)
+    ap.add_argument("--from", dest="date_from", default=None, help="Published on/after YYYY-MM-DD")
+    ap.add_argument("--to", dest="date_to", default=None, help="Published on/before YYYY-MM-DD")
+    ap.add_argument("--days", type=int, default=None, help="Last N days (counting --to or today)")
+    ap.add_argument("--source", nargs="+", default=None, help="Only these sources (n12 c14 ...)")
+    ap.add_argument("--limit", type=int, default=20, help="Articles to show")
+    ap.add_argument("--per-source", type=int, default=None, help="Show up to N articles per source instead")
+    ap.add_argument("--any", action="store_true", help="Match any word instead of all")
+    ap.add_argument("--json", action="store_true", help="Print the result as JSON")
+    return ap
+
+
+def run_query(args) -> dict:
+    if not SearchIndex.exists(args.index_dir):
+        print(f"[WARN] No index in {args.index_dir} (python -m analysis.search_index build)")
+        return {}
+    date_from, date_to = window(args.days, args.date_from, args.date_to)
+    index = SearchIndex(args.index_dir)
+    res = index.query(" ".join(args.text), date_from=date_from, date_to=date_to, sources=args.source,
+                      limit=args.limit, per_source=args.per_source, any_term=args.any)
+    index.close()
+    if args.json:
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+    else:
+        print_result(res)
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inverted index over data/processed.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Index new / changed days")
+    b.add_argument("--processed-dir", default="data/processed")
+    b.add_argument("--index-dir", default=INDEX_DIR)
+    b.add_argument("--rebuild", action="store_true", help="Start from an empty index")
+    add_query_arguments(sub.add_parser("query", help="Search the index"))
+    e = sub.add_parser("events", help="Attach cluster event ids (cluster_lineage members.csv)")
+    e.add_argument("--index-dir", default=INDEX_DIR)
+    e.add_argument("--lineage-dir", default="data/clustered/lineage")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        return build(args.processed_dir, args.index_dir, rebuild=args.rebuild)
+    if args.cmd == "events":
+        index = SearchIndex(args.index_dir)
+        n = index.attach_events(args.lineage_dir)
+        print(f"[INFO] Index: {n} docs linked to events from {args.lineage_dir}")
+        return n
+    return run_query(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# analysis/story_threads.py
+"""
+Cross-day story threads (war coverage, court cases, ... that outlive the 2-day window).
+
+Each clustered day is reduced to one centroid per cluster:
+  HashingVectorizer (no fitted vocabulary -> same feature space every day)
+  -> mean of the member rows (one sparse indicator product)
+  -> fixed seeded sparse random projection to `dim` floats
+  -> L2-normalized float32
+and stored as <index-dir>/centroids_<YYYY-MM-DD>.npz (a few hundred KB per day).
+
+A new day's centroids Q are compared with the previous `lookback` days only,
+in row batches (Q_batch @ P.T), so the cost per day is
+  (#clusters today) x (#clusters in the lookback window)
+and does not grow with the archive. A cluster joins the thread of its most
+similar earlier cluster if cosine >= min_sim, otherwise it starts a new thread.
+
+Files:
+  <index-dir>/centroids_<day>.npz   vecs, clusters, sizes, thread_ids
+  <index-dir>/threads_<day>.csv     thread_id, clusters, example_title (that day's share of each thread)
+  <index-dir>/next_thread_id        counter for new thread ids
+  <index-dir>/threads.csv           thread_id, first_day, last_day, days, clusters, example_title
+                                    (rebuilt from the day files on demand, see rebuild_registry)
+  <run>/cluster_threads.csv         cluster, thread_id, thread_sim, prev_day, prev_cluster
+
+The daily write touches only that day's files and the counter, so it stays
+flat too; re-running a day overwrites its share instead of counting it twice.
+
+Usage:
+  python -m analysis.story_threads --run data/clustered/2025-08-28_15-12-03 --lookback 7
+  python -m analysis.story_threads --rebuild       # write <index-dir>/threads.csv
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+N_FEATURES = 2**18
+DIM = 256
+SEED = 1234
+THREAD_COLS = ["thread_id", "first_day", "last_day", "days", "clusters", "example_title"]
+DAY_COLS = ["thread_id", "clusters", "example_title"]
+
+
+@lru_cache(maxsize=4)
+def projection(n_features: int = N_FEATURES, dim: int = DIM, seed: int = SEED, nnz_per_row: int = 4) -> sp.csr_matrix:
+    """Sparse JL projection (n_features x dim): every feature -> nnz_per_row random dims with random signs."""
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(np.arange(n_features), nnz_per_row)
+    cols = rng.integers(0, dim, size=rows.size)
+    vals = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=rows.size) / np.sqrt(nnz_per_row)
+    return sp.csr_matrix((vals.astype(np.float32), (rows, cols)), shape=(n_features, dim))
+
+
+def _normalize_rows(V: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(V, axis=1, keepdims=True)
+    return (V / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def cluster_centroids(texts: Sequence[str], labels, stop_words=None, dim: int = DIM):
+    """(cluster_ids, sizes, centroids float32 [k x dim], L2-normalized)."""
+    labels = np.asarray(labels)
+    ids, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    hasher = HashingVectorizer(ngram_range=(1, 2), n_features=N_FEATURES, alternate_sign=False,
+                               stop_words=stop_words, norm="l2", dtype=np.float32)
+    X = hasher.transform([str(t) for t in texts])
+    n = X.shape[0]
+    M = sp.csr_matrix((np.ones(n, dtype=np.float32), (inverse, np.arange(n))), shape=(len(ids), n))
+    C = (M @ X) @ projection(N_FEATURES, dim)               # summed member vectors, projected
+    return ids, sizes, _normalize_rows(np.asarray(C.todense() if sp.issparse(C) else C))
+
+
+class ThreadIndex:
+    def __init__(self, root, lookback: int = 7, min_sim: float = 0.5, batch_size: int = 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lookback = lookback
+        self.min_sim = min_sim
+        self.batch_size = batch_size
+
+    def day_path(self, day: str) -> Path:
+        return self.root / f"centroids_{day}.npz"
+
+    def registry_path(self, day: str) -> Path:
+        return self.root / f"threads_{day}.csv"
+
+    def load_window(self, day: str):
+        """Centroids of the `lookback` days before `day` (only those files are opened)."""
+        d0 = date.fromisoformat(day)
+        vecs, tids, days, clusters = [], [], [], []
+        for i in range(1, self.lookback + 1):
+            d = (d0 - timedelta(days=i)).isoformat()
+            p = self.day_path(d)
+            if not p.exists():
+                continue
+            z = np.load(p, allow_pickle=False)
+            vecs.append(z["vecs"])
+            tids.append(z["thread_ids"])
+            clusters.append(z["clusters"])
+            days.append(np.full(len(z["clusters"]), d))
+        if not vecs:
+            return None
+        return (np.vstack(vecs).astype(np.float32), np.concatenate(tids), np.concatenate(days),
+                np.concatenate(clusters))
+
+    def _next_ids(self, n: int) -> List[str]:
+        p = self.root / "next_thread_id"
+        start = int(p.read_text(encoding="utf-8")) if p.exists() else self._scan_next_id()
+        if n:
+            tmp = p.with_suffix(".tmp")
+            tmp.write_text(str(start + n), encoding="utf-8")
+            tmp.replace(p)
+        return [f"T{i:06d}" for i in range(start, start + n)]
+
+    def _scan_next_id(self) -> int:
+        """Counter missing (older index or deleted): one pass over whatever registry files exist."""
+        used = [0]
+        for p in [self.root / "threads.csv", *self.root.glob("threads_*.csv")]:
+            if p.exists():
+                ids = pd.read_csv(p, usecols=["thread_id"], dtype=str)["thread_id"].dropna()
+                used.append(int(ids.str[1:].astype(int).max()) if len(ids) else 0)
+        return max(used) + 1
+
+    def link_day(self, day: str, ids, sizes, vecs: np.ndarray, titles: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Assign thread ids to one day's clusters and store the day's centroids."""
+        k = len(ids)
+        best_sim = np.zeros(k, dtype=np.float32)
+        best_idx = np.full(k, -1)
+        prev = self.load_window(day)
+        if prev is not None and k:
+            P = prev[0]
+            for start in range(0, k, self.batch_size):
+                S = vecs[start:start + self.batch_size] @ P.T        # (batch x window) float32
+                j = S.argmax(axis=1)
+                best_idx[start:start + len(j)] = j
+                best_sim[start:start + len(j)] = S[np.arange(len(j)), j]
+
+        linked = (best_idx >= 0) & (best_sim >= self.min_sim)
+        thread_ids = np.empty(k, dtype=object)
+        if prev is not None:
+            thread_ids[linked] = prev[1][best_idx[linked]]
+        thread_ids[~linked] = self._next_ids(int((~linked).sum()))
+
+        out = pd.DataFrame({
+            "cluster": ids,
+            "thread_id": thread_ids.astype(str),
+            "thread_sim": np.where(best_idx >= 0, best_sim, np.nan).round(3),
+            "prev_day": np.where(linked, prev[2][best_idx] if prev is not None else "", ""),
+            "prev_cluster": np.where(linked, prev[3][best_idx] if prev is not None else -1, -1),
+        })
+        np.savez(self.day_path(day), vecs=vecs.astype(np.float32), clusters=np.asarray(ids),
+                 sizes=np.asarray(sizes), thread_ids=out["thread_id"].to_numpy(dtype=str))
+        self._update_registry(day, out, titles)
+        return out
+
+    def _update_registry(self, day: str, out: pd.DataFrame, titles):
+        """Write this day's share of every thread it touched (threads_<day>.csv)."""
+        per = out.groupby("thread_id").size().rename("clusters").reset_index()
+        if titles is not None:
+            per["example_title"] = pd.Series(list(titles)).groupby(out["thread_id"].to_numpy()).first() \
+                .reindex(per["thread_id"]).to_numpy()
+        else:
+            per["example_title"] = ""
+        per[DAY_COLS].to_csv(self.registry_path(day), index=False, encoding="utf-8")
+
+
+def rebuild_registry(index_dir, write: bool = True) -> pd.DataFrame:
+    """Fold every threads_<day>.csv into one row per thread (and save it as threads.csv)."""
+    root = Path(index_dir)
+    if not root.is_dir():
+        print(f"[WARN] No thread index at {root}")
+        return pd.DataFrame(columns=THREAD_COLS)
+    files = sorted(root.glob("threads_*.csv"))
+    day_names = np.array([p.stem[len("threads_"):] for p in files])
+    parts = []
+    for i, p in enumerate(files):
+        part = pd.read_csv(p, dtype={"thread_id": str, "example_title": str})
+        part["day"] = i                      # position in the sorted file list: int min/max stay vectorized
+        parts.append(part)
+    if not parts:
+        reg = pd.DataFrame(columns=THREAD_COLS)
+    else:
+        days = pd.concat(parts, ignore_index=True)
+        days["example_title"] = days["example_title"].replace("", np.nan)
+        g = days.groupby("thread_id", sort=True)
+        reg = pd.DataFrame({
+            "first_day": day_names[g["day"].min().to_numpy()],
+            "last_day": day_names[g["day"].max().to_numpy()],
+            "days": g["day"].nunique(),
+            "clusters": g["clusters"].sum(),
+            "example_title": g["example_title"].first().fillna(""),       # files are read oldest day first
+        }).reset_index()[THREAD_COLS]
+    if write:
+        reg.to_csv(root / "threads.csv", index=False, encoding="utf-8")
+        print(f"[INFO] {len(reg)} threads -> {root / 'threads.csv'}")
+    return reg
+
+
+def run_day(df: pd.DataFrame, labels, day: str, index_dir, lookback: int = 7, min_sim: float = 0.5,
+            stop_words=None, text_col: str = "text_for_cluster") -> pd.DataFrame:
+    """Centroids for one run's clusters + thread assignment (clusters table aligned to np.unique(labels))."""
+    if text_col in df.columns:
+        texts = df[text_col].fillna("").astype(str).tolist()
+    else:
+        texts = (df.get("title", pd.Series([""] * len(df))).fillna("").astype(str) + " " +
+                 df.get("summary", pd.Series([""] * len(df))).fillna("").astype(str)).tolist()
+    ids, sizes, vecs = cluster_centroids(texts, labels, stop_words=stop_words)
+    titles = None
+    if "title" in df.columns:
+        _, first = np.unique(np.asarray(labels), return_index=True)
+        titles = df["title"].to_numpy()[first]
+    index = ThreadIndex(index_dir, lookback=lookback, min_sim=min_sim)
+    out = index.link_day(day, ids, sizes, vecs, titles=titles)
+    n_linked = int((out["prev_day"] != "").sum())
+    print(f"[INFO] Threads {day}: {n_linked}/{len(out)} clusters continue a thread from the last {lookback} days")
+    return out
+
+
+def run_day_of(df: pd.DataFrame) -> str:
+    """The day a run belongs to = latest published date in it (UTC), falls back to today."""
+    for col in ("_dt", "published_iso", "published"):
+        if col in df.columns:
+            dt = pd.to_datetime(df[col], utc=True, errors="coerce", format="mixed").dropna()
+            if len(dt):
+                return dt.max().date().isoformat()
+    return date.today().isoformat()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Link a clustered run's clusters into multi-day story threads.")
+    ap.add_argument("--run", default=None, help="Run folder with articles.csv (data/clustered/<timestamp>)")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild <index-dir>/threads.csv from the day files")
+    ap.add_argument("--day", default=None, help="YYYY-MM-DD this run stands for (default: latest published date)")
+    ap.add_argument("--index-dir", default="data/threads")
+    ap.add_argument("--lookback", type=int, default=7, help="Compare with clusters from the previous N days")
+    ap.add_argument("--min-sim", type=float, default=0.5, help="Min centroid cosine to continue a thread")
+    args = ap.parse_args()
+    if not args.run and not args.rebuild:
+        ap.error("give --run and/or --rebuild")
+    if not args.run:
+        rebuild_registry(args.index_dir)
+        return
+
+    run = Path(args.run)
+    df = pd.read_csv(run / "articles.csv", encoding="utf-8-sig")
+    day = args.day or run_day_of(df)
+    out = run_day(df, df["cluster"].to_numpy(), day, args.index_dir, lookback=args.lookback, min_sim=args.min_sim)
+    out.to_csv(run / "cluster_threads.csv", index=False, encoding="utf-8-sig")
+    print(f"[INFO] Saved {run / 'cluster_threads.csv'}")
+    if args.rebuild:
+        rebuild_registry(args.index_dir)
+
+
+if __name__ == "__main__":
+    main()
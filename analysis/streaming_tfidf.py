@@ -0,0 +1,298 @@
+# analysis/streaming_tfidf.py
+"""
+Out-of-core TF-IDF over the whole processed archive.
+
+group_similar fits one TfidfVectorizer on a 2-day window; archive-wide work
+(monthly agenda, top terms over months) can't hold every title + the matrix
+in RAM at once. This builds the same matrix in two streaming passes:
+
+  pass 1  read the processed files chunk by chunk (chunk_rows records), count
+          document frequency per term (binary CountVectorizer per chunk, merged
+          into one term -> df table), then apply min_df / max_df / max_features.
+  pass 2  read the files again and write raw term counts for each chunk with the
+          now fixed vocabulary to <out>/part-NNNNN.npz, plus one line per
+          row in rows.csv (record_key, source, published, file date).
+
+Memory = one chunk of text + one chunk of counts + the term -> df table;
+neither the archive's text nor its matrix is ever in memory as a whole.
+
+<out>/manifest.json   n_docs, n_features, params, parts [{file, first_row, rows, nnz}]
+<out>/vocab.txt       one term per line (column order, sorted like sklearn)
+<out>/idf.npy         smooth idf, same formula as TfidfVectorizer
+<out>/rows.csv        row -> article
+
+TfidfArchive reads it back: iter_tfidf() yields L2-normalized float32 TF-IDF
+rows per part (identical to TfidfVectorizer(...).fit_transform on the whole
+corpus), tfidf() stacks them (or a row range) for cluster_planner, and
+class_counts() sums counts per group (month, source, cluster) part by part
+for c-TF-IDF statistics.
+
+Usage:
+  python -m analysis.streaming_tfidf build --processed-dir data/processed --out data/tfidf_archive
+  python -m analysis.streaming_tfidf top-terms --archive data/tfidf_archive --by month --k 15
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import time
+from numbers import Integral
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from adapters.common.day_files import file_date, select_parts
+from adapters.common.partition import SUFFIX as PARTITION_SUFFIX, iter_partition_records
+from adapters.common.storage import iter_records
+from analysis.cluster_labels import HEBREW_TERM, class_scores
+from analysis.cross_link import topk_rows
+from analysis.token_cache import read_stopwords
+
+TEXT_COLS = ("title_norm_min",)
+ROW_COLS = ("record_key", "source", "published_iso", "published", "_file_date")
+
+
+def _iter_records(f: Path, days: Optional[Sequence[str]] = None) -> Iterator[dict]:
+    if f.name.endswith(PARTITION_SUFFIX):        # monthly partition: one day at a time
+        yield from iter_partition_records(f, days=days, day_key="_file_date")
+        return
+    fd = file_date(f)
+    fd = fd.isoformat() if fd else None
+    for rec in iter_records(f):                 # JSONL (plain / gz / zst) streams; a .json list is one day
+        rec["_file_date"] = fd
+        yield rec
+
+
+def iter_chunks(files: Sequence[Path], chunk_rows: int = 50_000,
+                text_cols: Sequence[str] = TEXT_COLS) -> Iterator[Tuple[List[str], Dict[str, list]]]:
+    """(texts, row columns) per chunk of non-empty documents, in file order.
+    files: paths or (path, days) pairs from select_parts."""
+    texts: List[str] = []
+    rows: Dict[str, list] = {c: [] for c in ROW_COLS}
+    for f in files:
+        f, days = f if isinstance(f, tuple) else (f, None)
+        try:
+            for rec in _iter_records(f, days):
+                text = " ".join(str(rec.get(c) or "") for c in text_cols).strip()
+                if not text:
+                    continue
+                texts.append(text)
+                for c in ROW_COLS:
+                    rows[c].append(rec.get(c))
+                if len(texts) >= chunk_rows:
+                    yield texts, rows
+                    texts, rows = [], {c: [] for c in ROW_COLS}
+        except Exception as e:
+            print(f"[WARN] Failed reading {f}: {e}")
+    if texts:
+        yield texts, rows
+
+
+def _doc_count_limit(x, n_docs: int) -> float:
+    return x if isinstance(x, Integral) else x * n_docs
+
+
+def build_archive(processed_dir: str, out_dir: str, chunk_rows: int = 50_000, ngram_range=(1, 2),
+                  min_df=2, max_df=0.8, max_features: Optional[int] = None, stop_words=None,
+                  text_cols: Sequence[str] = TEXT_COLS, date_from=None, date_to=None,
+                  compressed: bool = True) -> dict:
+    """Two passes over processed_dir -> <out_dir> (see module docstring). Returns the manifest."""
+    files = select_parts(processed_dir, date_from=date_from, date_to=date_to)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    opts = {"ngram_range": tuple(ngram_range), "stop_words": list(stop_words) if stop_words else None}
+
+    # pass 1: document frequencies
+    t0 = time.perf_counter()
+    df_total: Dict[str, int] = {}
+    n_docs = 0
+    for texts, _ in iter_chunks(files, chunk_rows, text_cols):
+        n_docs += len(texts)
+        try:
+            cv = CountVectorizer(binary=True, dtype=np.int32, **opts)
+            X = cv.fit_transform(texts)
+        except ValueError:                       # chunk with no terms at all
+            continue
+        get = df_total.get
+        for t, c in zip(cv.get_feature_names_out().tolist(), np.asarray(X.sum(axis=0)).ravel().tolist()):
+            df_total[t] = get(t, 0) + c
+    lo, hi = _doc_count_limit(min_df, n_docs), _doc_count_limit(max_df, n_docs)
+    kept = [(t, c) for t, c in df_total.items() if lo <= c <= hi]
+    if max_features is not None and len(kept) > max_features:
+        kept = sorted(kept, key=lambda tc: (-tc[1], tc[0]))[:max_features]   # by df (sklearn: by total count)
+    kept.sort()
+    n_terms = len(df_total)
+    del df_total
+    if not kept:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    vocab = {t: i for i, (t, _) in enumerate(kept)}
+    df_arr = np.array([c for _, c in kept], dtype=np.float64)
+    idf = np.log((1 + n_docs) / (1 + df_arr)) + 1.0
+    print(f"[INFO] Pass 1: {n_docs} docs, {n_terms} terms -> {len(vocab)} kept "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+    # pass 2: counts per chunk -> part files
+    t0 = time.perf_counter()
+    cv = CountVectorizer(vocabulary=vocab, dtype=np.float32, **opts)
+    parts, first_row = [], 0
+    with (out / "rows.csv").open("w", encoding="utf-8", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["row", *ROW_COLS])
+        for i, (texts, rows) in enumerate(iter_chunks(files, chunk_rows, text_cols)):
+            X = cv.transform(texts).tocsr()
+            name = f"part-{i:05d}.npz"
+            sp.save_npz(out / name, X, compressed=compressed)
+            w.writerows(zip(range(first_row, first_row + len(texts)), *(rows[c] for c in ROW_COLS)))
+            parts.append({"file": name, "first_row": first_row, "rows": len(texts), "nnz": int(X.nnz)})
+            first_row += len(texts)
+    if first_row != n_docs:
+        print(f"[WARN] Processed files changed between passes ({n_docs} -> {first_row} docs)")
+
+    (out / "vocab.txt").write_text("".join(t + "\n" for t in vocab), encoding="utf-8")
+    np.save(out / "idf.npy", idf)
+    manifest = {
+        "n_docs": first_row, "n_features": len(vocab), "parts": parts,
+        "params": {"processed_dir": str(processed_dir), "chunk_rows": chunk_rows, "ngram_range": list(ngram_range),
+                   "min_df": min_df, "max_df": max_df, "max_features": max_features,
+                   "text_cols": list(text_cols), "stop_words": bool(stop_words),
+                   "date_from": date_from, "date_to": date_to},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"[INFO] Pass 2: {len(parts)} parts, nnz={sum(p['nnz'] for p in parts)} "
+          f"({time.perf_counter() - t0:.1f}s) -> {out}")
+    return manifest
+
+
+class TfidfArchive:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.manifest = json.loads((self.root / "manifest.json").read_text(encoding="utf-8"))
+        with (self.root / "vocab.txt").open("r", encoding="utf-8") as f:
+            self.features = np.array([line.rstrip("\n") for line in f], dtype=object)
+        self.idf = np.load(self.root / "idf.npy")
+
+    @property
+    def shape(self):
+        return self.manifest["n_docs"], self.manifest["n_features"]
+
+    def rows(self, usecols=None) -> pd.DataFrame:
+        return pd.read_csv(self.root / "rows.csv", usecols=usecols, keep_default_na=False, dtype=str)
+
+    def iter_counts(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, sp.csr_matrix]]:
+        """(first_row, raw counts) per part overlapping [start, stop)."""
+        stop = self.shape[0] if stop is None else stop
+        for p in self.manifest["parts"]:
+            a, b = p["first_row"], p["first_row"] + p["rows"]
+            if b <= start or a >= stop:
+                continue
+            X = sp.load_npz(self.root / p["file"]).tocsr()
+            lo, hi = max(start, a) - a, min(stop, b) - a
+            yield a + lo, X[lo:hi] if (lo, hi) != (0, p["rows"]) else X
+
+    def iter_tfidf(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, sp.csr_matrix]]:
+        """(first_row, L2-normalized float32 TF-IDF rows) per part."""
+        D = sp.diags(self.idf.astype(np.float32))
+        for first, X in self.iter_counts(start, stop):
+            yield first, normalize(X @ D, copy=False).astype(np.float32, copy=False)
+
+    def tfidf(self, start: int = 0, stop: Optional[int] = None) -> sp.csr_matrix:
+        """Rows [start, stop) as one CSR matrix (only the matrix in RAM, no text)."""
+        blocks = [X for _, X in self.iter_tfidf(start, stop)]
+        if not blocks:
+            return sp.csr_matrix((0, self.shape[1]), dtype=np.float32)
+        return sp.vstack(blocks, format="csr")
+
+    def class_counts(self, groups) -> Tuple[np.ndarray, sp.csr_matrix]:
+        """(group ids, term counts per group) with groups aligned to archive rows."""
+        groups = np.asarray(groups)
+        ids, inverse = np.unique(groups, return_inverse=True)
+        C = sp.csr_matrix((len(ids), self.shape[1]), dtype=np.float32)
+        for first, X in self.iter_counts():
+            g = inverse[first:first + X.shape[0]]
+            M = sp.csr_matrix((np.ones(len(g), dtype=np.float32), (g, np.arange(len(g)))), shape=(len(ids), len(g)))
+            C = C + M @ X
+        return ids, C.tocsr()
+
+
+def group_keys(rows: pd.DataFrame, by: str = "month") -> np.ndarray:
+    """Group label per archive row: month / day (of published, else file date) or source."""
+    if by == "source":
+        return rows["source"].fillna("").to_numpy()
+    dt = pd.to_datetime(rows["published_iso"].where(rows["published_iso"] != "", rows["published"]),
+                        utc=True, errors="coerce", format="mixed")
+    dt = dt.fillna(pd.to_datetime(rows["_file_date"], errors="coerce", utc=True))
+    fmt = "%Y-%m" if by == "month" else "%Y-%m-%d"
+    return dt.dt.strftime(fmt).fillna("unknown").to_numpy()
+
+
+def archive_top_terms(archive: TfidfArchive, by: str = "month", k: int = 15, hebrew_only: bool = True) -> pd.DataFrame:
+    """DataFrame[group, n_docs, top_terms] with c-TF-IDF over the per-group counts."""
+    rows = archive.rows(usecols=["source", "published_iso", "published", "_file_date"])
+    groups = group_keys(rows, by)
+    ids, C = archive.class_counts(groups)
+    S = class_scores(C)
+    if hebrew_only:             # same rule as cluster_labels: every word of the term is Hebrew
+        keep = np.fromiter((all(HEBREW_TERM.fullmatch(w) for w in t.split()) for t in archive.features),
+                           dtype=np.float32, count=len(archive.features))
+        S = (S @ sp.diags(keep)).tocsr()
+        S.eliminate_zeros()
+    terms = {i: [] for i in range(len(ids))}
+    if S.nnz:
+        r, c, _ = topk_rows(S, k)
+        for i, j in zip(r.tolist(), c.tolist()):
+            terms[i].append(archive.features[j])
+    n_docs = pd.Series(groups).value_counts().reindex(ids).to_numpy()
+    return pd.DataFrame({by: ids, "n_docs": n_docs, "top_terms": [", ".join(terms[i]) for i in range(len(ids))]})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Out-of-core TF-IDF over the processed archive.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Two streaming passes: document frequencies, then count parts")
+    b.add_argument("--processed-dir", default="data/processed")
+    b.add_argument("--out", default="data/tfidf_archive")
+    b.add_argument("--chunk-rows", type=int, default=50_000, help="Records per chunk (bounds memory)")
+    b.add_argument("--ngrams", nargs=2, type=int, default=[1, 2])
+    b.add_argument("--min-df", type=float, default=2, help=">=1: documents, <1: fraction")
+    b.add_argument("--max-df", type=float, default=0.8, help="<=1: fraction, >1: documents")
+    b.add_argument("--max-features", type=int, default=None)
+    b.add_argument("--text-cols", nargs="+", default=list(TEXT_COLS))
+    b.add_argument("--date-from", default=None)
+    b.add_argument("--date-to", default=None)
+    b.add_argument("--no-stopwords", action="store_true")
+
+    t = sub.add_parser("top-terms", help="c-TF-IDF top terms per month / day / source")
+    t.add_argument("--archive", default="data/tfidf_archive")
+    t.add_argument("--by", choices=["month", "day", "source"], default="month")
+    t.add_argument("--k", type=int, default=15)
+    t.add_argument("--out", default=None, help="CSV path (default: <archive>/top_terms_<by>.csv)")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        # sklearn semantics: int = number of documents, float = fraction
+        min_df = int(args.min_df) if args.min_df >= 1 else args.min_df
+        max_df = int(args.max_df) if args.max_df > 1 else args.max_df
+        build_archive(args.processed_dir, args.out, chunk_rows=args.chunk_rows, ngram_range=tuple(args.ngrams),
+                      min_df=min_df, max_df=max_df, max_features=args.max_features,
+                      stop_words=None if args.no_stopwords else sorted(read_stopwords()),
+                      text_cols=args.text_cols, date_from=args.date_from, date_to=args.date_to)
+    else:
+        arch = TfidfArchive(args.archive)
+        table = archive_top_terms(arch, by=args.by, k=args.k)
+        out = Path(args.out) if args.out else Path(args.archive) / f"top_terms_{args.by}.csv"
+        table.to_csv(out, index=False, encoding="utf-8-sig")
+        for _, r in table.iterrows():
+            print(f"{r[args.by]} ({r['n_docs']}): {r['top_terms']}")
+        print(f"[INFO] Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
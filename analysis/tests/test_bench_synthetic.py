@@ -0,0 +1,38 @@
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.bench.quality import pairwise_scores
+
+
+def test_corpus_is_deterministic():
+    a = generate_corpus(200, seed=7)
+    b = generate_corpus(200, seed=7)
+    assert [r["title"] for r in a] == [r["title"] for r in b]
+    assert [r["event_id"] for r in a] == [r["event_id"] for r in b]
+    assert [r["title"] for r in generate_corpus(200, seed=8)] != [r["title"] for r in a]
+
+
+def test_corpus_has_processed_shape_and_cross_outlet_events():
+    recs = generate_corpus(300, seed=1)
+    assert len(recs) == 300
+    for col in ["title", "summary", "source", "url", "published", "title_norm_min", "record_key", "event_id"]:
+        assert all(col in r for r in recs)
+    by_event = {}
+    for r in recs:
+        by_event.setdefault(r["event_id"], set()).add(r["source"])
+    multi = [e for e, s in by_event.items() if len(s) >= 2]
+    assert len(multi) > 20
+    # CTA prefixes / site suffixes are planted in the raw title and stripped by norm_min
+    assert any(r["title"].startswith(("צפו:", "תיעוד:", "וידאו:", "פרשנות:", "חשיפה:")) for r in recs)
+    assert not any("N12" in r["title_norm_min"] for r in recs)
+
+
+def test_write_corpus_groups_by_day(tmp_path):
+    recs = generate_corpus(100, seed=2, days=2)
+    paths = write_corpus(recs, tmp_path)
+    assert paths and all(p.name.startswith("combined_2025-08-") for p in paths)
+
+
+def test_pairwise_scores():
+    perfect = pairwise_scores([0, 0, 1, 1, 2], [5, 5, 3, 3, 9])
+    assert perfect["pair_precision"] == 1.0 and perfect["pair_recall"] == 1.0 and perfect["ari"] == 1.0
+    merged = pairwise_scores([0, 0, 1, 1], [0, 0, 0, 0])
+    assert merged["pair_recall"] == 1.0 and merged["pair_precision"] < 0.5
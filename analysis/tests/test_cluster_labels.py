@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cluster_labels import cluster_top_terms, ctfidf, top_terms
+from analysis.cluster_output import save_cluster_outputs
+
+TEXTS = ["הפגנה בתל אביב הערב", "הפגנה גדולה בתל אביב", "גשם כבד בצפון", "גשם ושלג בצפון", "מתכון לקיץ"]
+LABELS = [0, 0, 1, 1, 2]
+
+
+def test_ctfidf_one_row_per_cluster():
+    ids, scores, feats = ctfidf(TEXTS, LABELS, ngram_range=(1, 1))
+    assert list(ids) == [0, 1, 2]
+    assert scores.shape == (3, len(feats))
+
+
+def test_top_terms_prefers_cluster_specific_words():
+    terms = top_terms(TEXTS, LABELS, k=2, ngram_range=(1, 1))
+    assert set(terms[0]) <= {"הפגנה", "בתל", "אביב"}
+    assert set(terms[1]) == {"גשם", "בצפון"}
+    assert set(terms[2]) == {"מתכון", "לקיץ"}
+
+
+def test_top_terms_empty_vocabulary():
+    assert top_terms(["123", "!!"], [5, 6]) == {5: [], 6: []}
+
+
+def test_clusters_summary_has_top_terms(tmp_path):
+    df = pd.DataFrame({"title": TEXTS, "summary": [""] * 5, "source": ["n12", "c14", "n12", "kan11", "c14"],
+                       "published": [None] * 5, "url": list("abcde")})
+    out = save_cluster_outputs(df, np.array(LABELS), out_dir=str(tmp_path), save="csv", label_terms=3)
+    summary = pd.read_csv(out / "clusters_summary.csv", encoding="utf-8-sig")
+    assert "top_terms" in summary.columns
+    by = summary.set_index("cluster")["top_terms"]
+    assert "גשם" in by[1]
+    assert by.equals(cluster_top_terms(df, LABELS, k=3).set_index("cluster")["top_terms"].loc[by.index])
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from analysis.cluster_lineage import LineageStore, update_lineage
+
+
+def _run(root, keys, labels, run_id):
+    store = LineageStore(root)
+    table, events = store.assign(keys, labels, run_id)
+    store.save()
+    return table.set_index("cluster"), events
+
+
+def test_ids_survive_relabeling_and_window_shift(tmp_path):
+    t1, _ = _run(tmp_path, ["a", "b", "c", "d", "e"], [0, 0, 0, 1, 1], "r1")
+    # labels swapped, "a" fell out of the window, "x" is a fresh article
+    t2, _ = _run(tmp_path, ["b", "c", "x", "d", "e"], [5, 5, 5, 2, 2], "r2")
+    assert t2.loc[5, "event_id"] == t1.loc[0, "event_id"]
+    assert t2.loc[2, "event_id"] == t1.loc[1, "event_id"]
+    assert set(t2["status"]) == {"continued"}
+
+
+def test_split_and_merge_are_recorded(tmp_path):
+    t1, _ = _run(tmp_path, list("abcdef"), [0, 0, 0, 0, 1, 2], "r1")
+    t2, events = _run(tmp_path, list("abcdef"), [0, 0, 1, 1, 2, 2], "r2")
+    kinds = {e["type"] for e in events}
+    assert {"split", "merge", "run"} <= kinds
+    split = next(e for e in events if e["type"] == "split")
+    assert split["from"] == t1.loc[0, "event_id"] and len(split["into"]) == 2
+    assert t2.loc[2, "status"] == "merged"
+    lines = (tmp_path / "lineage.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["run"] for l in lines][-1] == "r2"
+
+
+def test_update_lineage_writes_run_table(tmp_path):
+    run = tmp_path / "2025-08-28_15-12-03"
+    run.mkdir()
+    df = pd.DataFrame({"record_key": ["n12:1", "c14:2", "kan11:3"], "title": ["א", "ב", "ג"]})
+    update_lineage(run, df, np.array([0, 0, 1]), tmp_path / "lineage")
+    table = pd.read_csv(run / "cluster_events.csv", encoding="utf-8-sig")
+    assert list(table["event_id"]) == ["E000001", "E000002"]
+    assert update_lineage(run, df, np.array([0, 0, 1]), tmp_path / "lineage") is None   # same run twice
+    reg = pd.read_csv(tmp_path / "lineage" / "events.csv")
+    assert len(reg) == 2
+
+
+def test_members_outside_keep_days_are_pruned(tmp_path):
+    _run(tmp_path, ["a", "b", "c"], [0, 0, 1], "2025-08-01_10-00-00")
+    t2, _ = _run(tmp_path, ["b", "d"], [0, 0], "2025-08-05_10-00-00")
+    store = LineageStore(tmp_path, keep_days=7)
+    store.assign(["d", "e"], [3, 3], "2025-08-10_10-00-00")
+    store.save()
+    members = pd.read_csv(tmp_path / "members.csv")
+    assert sorted(members["record_key"]) == ["b", "d", "e"]           # a, c last seen 9 days before
+    assert members.set_index("record_key").loc["e", "event_id"] == t2.loc[0, "event_id"]
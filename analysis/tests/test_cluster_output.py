@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from analysis.cluster_output import cluster_aggregates, save_cluster_outputs
+
+
+def _df():
+    return pd.DataFrame({
+        "source": ["n12", "c14", "n12", "kan11", ""],
+        "title": ["a", "b", "c", "d", "e"],
+        "summary": ["s1", None, "s3", "s4", "s5"],
+        "url": ["u1", "u2", "u3", "u4", "u5"],
+        "published": ["2025-08-21T10:00", "2025-08-21T09:00", None, "2025-08-21T11:00", "2025-08-22T08:00"],
+    })
+
+
+def test_cluster_aggregates_single_pass():
+    agg = cluster_aggregates(_df(), np.array([7, 7, 3, 7, 3]))
+    assert list(agg["ids"]) == [3, 7] and list(agg["sizes"]) == [2, 3]
+    s = agg["summary"].set_index("cluster")
+    assert s.loc[7, "sources"] == "c14, kan11, n12"
+    assert s.loc[3, "sources"] == "n12"                      # empty source ignored
+    assert s.loc[7, "example_title"] == "a"
+    assert list(agg["summary"]["cluster"]) == [7, 3]          # biggest first
+
+
+def test_save_cluster_outputs_files(tmp_path):
+    out = save_cluster_outputs(_df(), np.array([7, 7, 3, 7, 3]), out_dir=tmp_path, chunk_size=2)
+    arts = pd.read_csv(out / "articles.csv")
+    assert list(arts.columns[:2]) == ["cluster", "cluster_size"]
+    assert list(arts["title"]) == ["a", "b", "c", "d", "e"]
+    assert list(arts["cluster_size"]) == [3, 3, 2, 3, 2]
+    lines = [json.loads(l) for l in (out / "clusters.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [l["cluster"] for l in lines] == [3, 7]
+    # items sorted by published; missing values are JSON null
+    assert [i["title"] for i in lines[1]["items"]] == ["b", "a", "d"]
+    assert lines[1]["items"][0]["summary"] is None
+    assert "Clusters: 2" in (out / "README.txt").read_text(encoding="utf-8")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+
+from analysis import group_similar
+from analysis.bench.synthetic_corpus import generate_corpus
+from analysis import cluster_planner
+from analysis.cluster_planner import blocked_agglomerative, dense_agglomerative, estimate, plan, sparse_agglomerative
+from analysis.vectorize import make_vectorizer
+
+
+def _matrix(n=600):
+    df = pd.DataFrame(generate_corpus(n, seed=2))
+    texts = (df["title_norm_min"] + " " + df["summary_norm_min"]).tolist()
+    return make_vectorizer("tfidf", min_df=1, max_df=0.8).fit_transform(texts)
+
+
+def test_sparse_matches_dense_exactly():
+    X = _matrix()
+    dense = dense_agglomerative(X, 0.7)
+    sparse = sparse_agglomerative(X, 0.7, memory_budget_mb=1024)
+    assert adjusted_rand_score(dense, sparse) == 1.0
+
+
+def test_planner_follows_budget():
+    X = _matrix()
+    assert plan(X, 0.7, memory_budget_mb=1024)["strategy"] == "dense"
+    small = plan(X, 0.7, memory_budget_mb=2)
+    assert small["strategy"] == "sparse"
+    assert small["dense"]["mb"] > 2 >= small["sparse"]["mb"]
+    assert plan(X, 0.7, memory_budget_mb=1024, strategy="blocked")["strategy"] == "blocked"
+
+
+def test_estimate_probe_is_blocked(monkeypatch):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 16)).astype(np.float32)              # dense, like --vectorizer embed
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    full = estimate(X, 0.3, memory_budget_mb=1024)["est_edges"]
+    shapes = []
+    real = cluster_planner.sim_block
+    monkeypatch.setattr(cluster_planner, "sim_block", lambda A, B, t: shapes.append(B.shape[0]) or real(A, B, t))
+    assert estimate(X, 0.3, memory_budget_mb=2)["est_edges"] == full
+    assert len(shapes) > 1 and max(shapes) * 512 * 12 <= 2 * 2**20 / 4
+
+
+def test_blocked_never_links_across_chunks():
+    X = _matrix(300)
+    labels = blocked_agglomerative(X, 0.7, chunk_rows=100)
+    assert not set(labels[:100]) & set(labels[100:])
+
+
+def test_max_articles_keeps_newest():
+    df = pd.DataFrame({
+        "text_for_cluster": ["ישן מאוד", "ישן", "חדש", "חדש מאוד"],
+        "_dt": pd.to_datetime(["2025-08-01", "2025-08-02", "2025-08-03", "2025-08-04"], utc=True),
+    }).sample(frac=1, random_state=0)
+    df2, labels = group_similar.cluster(df, threshold=0.5, min_df=1, max_df=1.0, max_articles=2)
+    assert sorted(df2["text_for_cluster"]) == ["חדש", "חדש מאוד"]
+    assert len(labels) == 2 and df2.attrs["plan"]["strategy"] == "dense"
@@ -0,0 +1,43 @@
+import numpy as np
+import scipy.sparse as sp
+
+from analysis.cross_link import cross_source_link, link_blocks
+
+
+def _rows(*vecs):
+    X = np.array(vecs, dtype=np.float32)
+    return sp.csr_matrix(X / np.linalg.norm(X, axis=1, keepdims=True))
+
+
+def test_link_blocks_mutual_top1():
+    XA = _rows([1, 0, 0], [0, 1, 0])
+    XB = _rows([0.9, 0.1, 0], [0, 1, 0.1], [0, 0, 1])
+    pairs = link_blocks(XA, XB, top_k=1, min_sim=0.5)
+    assert sorted(zip(pairs["a"], pairs["b"])) == [(0, 0), (1, 1)]
+
+
+def test_cross_source_link_never_compares_within_outlet():
+    # rows 0/1 are identical but from the same outlet -> no direct link
+    X = _rows([1, 0, 0], [1, 0, 0], [0, 1, 0], [0.95, 0.05, 0], [0, 0, 1])
+    sources = ["n12", "n12", "c14", "kan11", "c14"]
+    labels, pairs = cross_source_link(X, sources, top_k=2, min_sim=0.5)
+    assert not (pairs["source_i"] == pairs["source_j"]).any()
+    assert labels[0] == labels[3] and labels[1] == labels[3]
+    assert labels[2] != labels[0] and labels[4] != labels[0]
+    assert set(pairs.columns) >= {"i", "j", "similarity", "cluster"}
+
+
+def test_cross_source_link_refines_giant_component_in_chunks(monkeypatch):
+    from analysis import cross_link
+    from analysis.cluster_planner import max_dense_rows
+
+    # a chain of near-duplicates alternating outlets -> one big component
+    rng = np.random.default_rng(0)
+    X = _rows(*(np.array([1.0, 0, 0]) + rng.normal(0, 0.01, 3) for _ in range(300)))
+    sources = ["n12", "c14", "kan11"] * 100
+    sizes = []
+    real = cross_link.pairwise_distances
+    monkeypatch.setattr(cross_link, "pairwise_distances", lambda A, **kw: sizes.append(A.shape[0]) or real(A, **kw))
+    budget = 0.5
+    cross_source_link(X, sources, top_k=3, min_sim=0.5, memory_budget_mb=budget)
+    assert sizes and max(sizes) <= max_dense_rows(budget) < 300
@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+
+from analysis import group_similar
+from analysis.frame_loader import frame_mb, optimize_frame, read_frame
+
+
+def test_read_frame_projects_and_categorizes(tmp_path):
+    recs = [{"cluster_id": i % 3, "title": f"t{i}", "summary": "long " * 50, "source": ["n12", "c14"][i % 2],
+             "published_dt": "2025-08-22T06:44:07+03:00", "extra": i} for i in range(200)]
+    (tmp_path / "g.json").write_text(json.dumps(recs), encoding="utf-8")
+    df = read_frame(tmp_path / "g.json", columns=["cluster_id", "title", "source", "url", "published_dt"],
+                    dates=["published_dt"], report=False)
+    assert list(df.columns) == ["cluster_id", "title", "source", "url", "published_dt"]
+    assert df["url"].isna().all()
+    assert isinstance(df["source"].dtype, pd.CategoricalDtype)
+    assert str(df["published_dt"].dt.tz) == "UTC"
+
+    pd.DataFrame(recs).to_csv(tmp_path / "a.csv", index=False, encoding="utf-8-sig")
+    full = pd.read_csv(tmp_path / "a.csv", encoding="utf-8-sig")
+    small = read_frame(tmp_path / "a.csv", columns=["cluster_id", "source", "title"], report=False)
+    assert sorted(small.columns) == ["cluster_id", "source", "title"]
+    assert small["title"].tolist() == full["title"].tolist()
+    assert frame_mb(small) < frame_mb(full) / 3
+
+
+def test_mixed_types_stay_object():
+    df = pd.DataFrame({"source": ["n12", 5, None], "cluster": [2, 1, 2]})
+    optimize_frame(df)
+    assert df["source"].dtype == object
+    assert isinstance(df["cluster"].dtype, pd.CategoricalDtype) and df["cluster"].to_numpy().tolist() == [2, 1, 2]
+
+
+def test_load_articles_column_projection(tmp_path):
+    recs = [{"title": f"כותרת {i}", "title_norm_min": f"כותרת {i}", "summary": "ס" * 100,
+             "summary_norm_min": "ס" * 100, "source": "n12", "url": f"u{i}", "event_id": i} for i in range(20)]
+    (tmp_path / "combined_2025-08-22.json").write_text(json.dumps(recs, ensure_ascii=False), encoding="utf-8")
+    full = group_similar.load_articles(str(tmp_path), columns=group_similar.LOAD_COLUMNS["all"])
+    slim = group_similar.load_articles(str(tmp_path), columns=group_similar.LOAD_COLUMNS["cluster"])
+    assert "summary_norm_min" in full.columns and "event_id" in full.columns
+    assert "summary_norm_min" not in slim.columns and "event_id" not in slim.columns
+    assert slim["text_for_cluster"].tolist() == full["text_for_cluster"].tolist()
+    assert isinstance(slim["source"].dtype, pd.CategoricalDtype)
+    assert frame_mb(slim) < frame_mb(full)
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from analysis import group_similar
+from analysis.bench.synthetic_corpus import generate_corpus
+from analysis.hebrew_stem import stem, stem_text, stem_vocab
+from analysis.token_cache import TokenColumn, TokenVocab, ensure_tokens, read_stopwords
+
+
+def test_prefix_variants_share_a_stem():
+    assert stem("הממשלה") == stem("בממשלה") == stem("והממשלה") == "ממשלה"
+    assert stem("שהמחאה") == stem("המחאה") == "מחאה"
+
+
+def test_protected_stems_keep_their_first_letters():
+    for w in ("משטרה", "מלחמה", "שלום", "בית", "לבנון", "הסכם"):
+        assert stem(w) == w
+    assert stem("במשטרה") == "משטרה"
+
+
+def test_short_words_and_non_hebrew_untouched():
+    for w in ("של", "לא", "תל", "<NUM>", "idf"):
+        assert stem(w) == w
+
+
+def test_plural_suffix_gets_final_letter():
+    assert stem("מלכים") == "מלך"
+    assert stem("ספרים") == "ספר"
+    assert stem("ירושלים") == stem("בירושלים") == "ירושלים"
+
+
+def test_stem_text_keeps_stopwords():
+    assert stem_text("והממשלה של ישראל", keep=frozenset({"של"})) == "ממשלה של ישראל"
+
+
+def test_stem_vocab_maps_ids():
+    v = TokenVocab(["הממשלה", "בממשלה", "של"], stopwords={"של"})
+    sv, mapping = stem_vocab(v)
+    assert mapping[0] == mapping[1] != mapping[2]
+    assert sv.tokens[mapping[0]] == "ממשלה" and sv.tokens[mapping[2]] == "של"
+
+
+def test_stemmed_token_path_matches_stemmed_text():
+    vocab = TokenVocab(stopwords=read_stopwords())
+    df = pd.DataFrame(generate_corpus(400, seed=5, vocab=vocab))
+    df["text_for_cluster"] = df["title_norm_min"]
+    df = ensure_tokens(df, cols=("title",), vocab=vocab)
+    d_tok, l_tok = group_similar.cluster(df.copy(), threshold=0.6, stem=True)
+    d_str, l_str = group_similar.cluster(df.drop(columns=["title_tok"]), threshold=0.6, stem=True)
+    assert (l_tok == l_str).all()
+    # min_df=1: nothing pruned, so merged prefix variants show up as fewer columns
+    plain, _ = group_similar.cluster(df.copy(), threshold=0.6, min_df=1)
+    stemmed, _ = group_similar.cluster(df.copy(), threshold=0.6, min_df=1, stem=True)
+    assert stemmed.attrs["matrix"]["cols"] < plain.attrs["matrix"]["cols"]
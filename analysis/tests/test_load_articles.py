@@ -0,0 +1,69 @@
+import json
+
+import pandas as pd
+
+from analysis import group_similar
+
+
+def _write(dirpath, day, recs, suffix=".json"):
+    p = dirpath / f"combined_{day}{suffix}"
+    if suffix == ".jsonl":
+        p.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in recs), encoding="utf-8")
+    else:
+        p.write_text(json.dumps(recs, ensure_ascii=False), encoding="utf-8")
+    return p
+
+
+def _rec(i, day, hour=10, **extra):
+    return {"title": f"כותרת {i}", "title_norm_min": f"כותרת {i}", "summary_norm_min": "",
+            "source": "n12", "url": f"u{i}", "published_iso": f"{day}T{hour:02d}:00:00+03:00", **extra}
+
+
+def test_select_files_uses_names_only(tmp_path):
+    for d in ["2025-08-20", "2025-08-21", "2025-08-22", "2025-08-23"]:
+        (tmp_path / f"combined_{d}.json").write_text("not json at all", encoding="utf-8")
+    (tmp_path / "extra.json").write_text("[]", encoding="utf-8")
+    names = [f.name for f in group_similar.select_files(str(tmp_path), window_days=2)]
+    assert names == ["combined_2025-08-22.json", "combined_2025-08-23.json", "extra.json"]
+    names = [f.name for f in group_similar.select_files(str(tmp_path), date_from="2025-08-20", date_to="2025-08-20")]
+    assert names == ["combined_2025-08-20.json", "combined_2025-08-21.json", "extra.json"]
+
+
+def test_load_articles_columnwise_mixed_files(tmp_path):
+    _write(tmp_path, "2025-08-21", [_rec(1, "2025-08-21"), _rec(2, "2025-08-21", record_key="n12:2")])
+    _write(tmp_path, "2025-08-22", [_rec(3, "2025-08-22")], suffix=".jsonl")
+    df = group_similar.load_articles(str(tmp_path), workers=2)
+    assert sorted(df["title"]) == ["כותרת 1", "כותרת 2", "כותרת 3"]
+    assert df["record_key"].isna().sum() == 2
+    assert set(df["_file_date"]) == {"2025-08-21", "2025-08-22"}
+
+
+def test_date_filters_are_enforced(tmp_path):
+    recs = [_rec(i, f"2025-08-{20 + i}") for i in range(4)] + [_rec(9, "2025-08-23", hour=1)]
+    df = pd.DataFrame(recs)
+    df["_dt"] = group_similar.parse_article_dt(df)
+    assert len(group_similar.apply_date_filters(df, window_days=2)) == 3
+    assert len(group_similar.apply_date_filters(df, date_from="2025-08-20", date_to="2025-08-20")) == 1
+    assert len(group_similar.apply_date_filters(df, window_days=4, window_hours=10)) == 2
+
+
+def test_hour_window_across_midnight_opens_previous_day(tmp_path):
+    _write(tmp_path, "2025-08-21", [_rec(0, "2025-08-21", hour=23)])
+    _write(tmp_path, "2025-08-22", [_rec(1, "2025-08-22", hour=20), _rec(2, "2025-08-22", hour=21)])
+    _write(tmp_path, "2025-08-23", [_rec(3, "2025-08-23", hour=1), _rec(4, "2025-08-23", hour=1)])
+    assert group_similar.file_window_days(2, 12) == 2 and group_similar.file_window_days(2, 48) == 3
+    df = group_similar.load_articles(str(tmp_path), window_days=group_similar.file_window_days(2, 12))
+    assert set(df["_file_date"]) == {"2025-08-22", "2025-08-23"}
+    df["_dt"] = group_similar.parse_article_dt(df)
+    assert sorted(group_similar.apply_date_filters(df, window_hours=12)["title"]) == \
+        ["כותרת 1", "כותרת 2", "כותרת 3", "כותרת 4"]
+
+
+def test_empty_window_writes_nothing(tmp_path, capsys):
+    _write(tmp_path, "2025-08-22", [_rec(1, "2025-08-22"), _rec(2, "2025-08-22")])
+    df, labels = group_similar.cluster(pd.DataFrame(columns=["title"]))
+    assert df.empty and labels.dtype.kind == "i" and len(labels) == 0
+    group_similar.main(["--processed-dir", str(tmp_path), "--out-dir", str(tmp_path / "out"),
+                        "--date-from", "2030-01-01", "--index-dir", "", "--no-lineage"])
+    assert "nothing to cluster" in capsys.readouterr().out
+    assert not (tmp_path / "out").exists()
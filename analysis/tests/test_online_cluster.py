@@ -0,0 +1,53 @@
+import numpy as np
+import scipy.sparse as sp
+
+from analysis.bench.quality import pairwise_scores
+from analysis.bench.synthetic_corpus import generate_corpus
+from analysis.online_cluster import OnlineClusterer
+from analysis.token_cache import read_stopwords
+
+
+def _window(n=600, seed=4):
+    recs = generate_corpus(n, seed=seed)
+    return ([r["title_norm_min"] for r in recs], [r["record_key"] for r in recs],
+            np.array([r["event_id"] for r in recs]))
+
+
+def test_incremental_quality_close_to_batch():
+    texts, keys, events = _window(1200)
+    oc = OnlineClusterer(threshold=0.6, stop_words=read_stopwords(), window_hours=0)
+    oc.fit(texts[:800], keys[:800])
+    for t, k in zip(texts[800:], keys[800:]):
+        oc.add(t, k)
+    online = pairwise_scores(events, oc.labels)["pair_f1"]
+    oc.refit()
+    batch = pairwise_scores(events, oc.labels)["pair_f1"]
+    assert online >= 0.8 * batch
+
+
+def test_average_similarity_matches_brute_force():
+    texts, keys, _ = _window(300)
+    oc = OnlineClusterer(threshold=0.6, window_hours=0, flush_rows=4)
+    oc.fit(texts[:250], keys[:250])
+    for t, k in zip(texts[250:], keys[250:]):
+        x = oc.vectorizer.transform([t])
+        X = sp.vstack([oc.X, *oc._pending]) if oc._pending else oc.X
+        sims = (X @ x.T).toarray().ravel()
+        best = max(set(oc.labels.tolist()), key=lambda c: sims[oc.labels == c].mean())
+        expect = sims[oc.labels == best].mean()
+        res = oc.add(t, k)
+        if expect >= 0.4:
+            assert res["cluster"] == best and abs(res["sim"] - expect) < 1e-3
+        else:
+            assert res["new_cluster"]
+
+
+def test_refit_keeps_ids_and_drops_old_rows():
+    texts, keys, _ = _window(400)
+    oc = OnlineClusterer(threshold=0.6, window_hours=24)
+    times = [1000.0] * 100 + [1000.0 + 48 * 3600] * 300        # first 100 are two days older
+    oc.fit(texts, keys, times)
+    assert len(oc) == 300 and oc.keys == keys[100:]
+    before = oc.labels.copy()
+    oc.refit()
+    assert (oc.labels == before).all()
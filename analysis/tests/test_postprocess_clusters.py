@@ -0,0 +1,37 @@
+import json
+
+import pandas as pd
+
+from analysis.bench.bench_postprocess import grouped_records, legacy_main, same_outputs
+from analysis.tools import postprocess_clusters
+
+EDGE = [
+    {"cluster_id": 1, "title": "קצר", "url": "u1", "source": "n12", "published_dt": "2025-08-20T10:00:00+03:00", "scraped_at": "2025-08-20T10:05:00+03:00"},
+    {"cluster_id": 1, "title": "כותרת ארוכה יותר", "url": "u2", "source": "c14", "published_dt": "2025-08-20T10:00:00+03:00", "scraped_at": "2025-08-20T10:05:00+03:00"},
+    {"cluster_id": 1, "title": None, "url": "u3", "source": None, "published_dt": "", "scraped_at": None},
+    {"cluster_id": 2, "title": "רק תאריך RFC", "url": "u4", "source": "kan11", "published_dt": "Wed, 20 Aug 2025 09:00:00 +0300", "scraped_at": "garbage"},
+    {"cluster_id": 2, "title": "בלי תאריך", "url": "u5", "source": "kan11", "published_dt": None, "scraped_at": ""},
+    {"cluster_id": None, "title": "בלי אשכול", "url": "u6", "source": "n12", "published_dt": "2025-08-21T08:00:00+03:00", "scraped_at": None},
+]
+
+
+def _run_both(tmp_path, records):
+    inp = tmp_path / "combined_grouped_2025-08-20.json"
+    inp.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    postprocess_clusters.main(str(inp), str(tmp_path / "new"), quiet=True)
+    legacy_main(str(inp), str(tmp_path / "old"))
+    return tmp_path / "new", tmp_path / "old"
+
+
+def test_matches_legacy_on_edge_cases(tmp_path):
+    new, old = _run_both(tmp_path, EDGE)
+    assert same_outputs(new, old)
+    summary = pd.read_csv(new / "clusters_summary.csv", encoding="utf-8-sig")
+    row = summary.set_index("cluster_id").loc[1]
+    assert row["repr_title"] == "כותרת ארוכה יותר"           # tie on dates -> longer title wins
+    assert row["sources"] == "c14, n12"
+
+
+def test_matches_legacy_on_synthetic(tmp_path):
+    new, old = _run_both(tmp_path, grouped_records(300, seed=3))
+    assert same_outputs(new, old)
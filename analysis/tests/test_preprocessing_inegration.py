@@ -45,7 +45,9 @@ def run_with_fixture(tmp_path: Path, fixture_name: str):
     # 4) Fresh import, then override module-level dirs
     prep = importlib.import_module("analysis.preprocessing")
     prep.RAW_DIR = raw_dir
+    prep.ADAPTED_DIR = tmp_path / "data/adapted"
     prep.PROCESSED_DIR = proc_dir
+    prep.INDEX_DIR = tmp_path / "data/index"
     prep.PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
     # 5) Run and read THIS test’s output
@@ -0,0 +1,122 @@
+from collections import Counter
+
+import numpy as np
+
+from adapters.common import storage
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.search_index import (FIELDS, SearchIndex, build, decode_postings, encode_postings, query_terms,
+                                   terms_of)
+from pipeline.compact import compact
+
+
+def _brute(recs, terms, stop, date_from=None, source=None):
+    out = set()
+    for r in recs:
+        have = {t for f in FIELDS for t in terms_of(r.get(f), stop)}
+        if set(terms) <= have and (date_from is None or r["published_iso"][:10] >= date_from) \
+                and (source is None or r["source"] == source):
+            out.add(r["record_key"])
+    return out
+
+
+def _corpus(tmp_path, n=1500, days=40):
+    recs = generate_corpus(n, seed=7, days=days)
+    write_corpus(recs, tmp_path / "processed", ext=".jsonl.gz")
+    return recs
+
+
+def test_postings_round_trip():
+    for ids in ([5], [0, 1, 2, 300], [7, 70_000, 70_001], list(range(0, 10_000_000, 99_991))):
+        first, w, buf = encode_postings(np.asarray(ids))
+        assert decode_postings(first, w, buf).tolist() == ids
+    assert len(encode_postings(np.arange(1000))[2]) == 999                 # dense -> one byte per doc
+
+
+def test_query_matches_brute_force(tmp_path):
+    recs = _corpus(tmp_path)
+    build(tmp_path / "processed", tmp_path / "index")
+    index = SearchIndex(tmp_path / "index")
+    assert len(index.manifest["segments"]) < 40                            # closed month merged
+    for rec in recs[:30:3]:
+        words = rec["title_norm_min"].split()[:2]
+        terms = query_terms(" ".join(words), index.stop)
+        res = index.query(" ".join(words), limit=10_000)
+        assert {h["record_key"] for h in res["hits"]} == _brute(recs, terms, index.stop)
+        assert sum(res["by_source"].values()) == res["total"] == len(res["hits"])
+    rec = recs[0]
+    word = rec["title"].split()[-1]
+    res = index.query(word, date_from="2025-09-10", sources=["n12"], limit=10_000)
+    assert {h["record_key"] for h in res["hits"]} == _brute(recs, query_terms(word, index.stop), index.stop,
+                                                            date_from="2025-09-10", source="n12")
+    ts = [h["published_iso"] for h in res["hits"]]
+    assert ts == sorted(ts, reverse=True)
+    per = index.query(word, per_source=2)
+    assert max(Counter(h["source"] for h in per["hits"]).values()) <= 2
+    assert index.query("מילהשלאקיימת")["total"] == 0
+
+
+def test_incremental_updates_and_compaction(tmp_path):
+    recs = _corpus(tmp_path, n=600, days=20)
+    processed, idx = tmp_path / "processed", tmp_path / "index"
+    build(processed, idx)
+    assert build(processed, idx)["indexed"] == 0                          # nothing changed
+
+    # rewrite one day of the merged (closed) month: it gets its own segment, the old copy is masked
+    day = "2025-08-25"
+    f = storage.data_files(processed, f"combined_{day}")[0]
+    old = storage.read_records(f)
+    new = [dict(old[0], record_key="x:1", title_norm_min="זברה סגולה", summary_norm_min="")]
+    storage.write_records(f, new)
+    assert build(processed, idx)["indexed"] == 1
+    index = SearchIndex(idx)
+    assert index.query("זברה סגולה")["hits"][0]["record_key"] == "x:1"
+    gone = old[0]["record_key"]
+    assert all(h["record_key"] != gone or h["day"] != day for h in index.query(old[0]["title"], limit=10_000)["hits"])
+    assert index.query("זברה", date_from="2025-08-26")["total"] == 0
+
+    # compaction moves the files into partitions; the index sees the same content and keeps it
+    compact(processed, today="2025-10-01")
+    out = build(processed, idx)
+    assert out["indexed"] == 0 and out["removed"] == 0
+    assert SearchIndex(idx).query("זברה סגולה")["total"] == 1
+
+
+def test_events_attach(tmp_path):
+    recs = _corpus(tmp_path, n=300, days=5)
+    build(tmp_path / "processed", tmp_path / "index")
+    lineage = tmp_path / "lineage"
+    lineage.mkdir()
+    keys = [r["record_key"] for r in recs[:40]]
+    (lineage / "members.csv").write_text("record_key,event_id,last_run\n" +
+                                         "".join(f"{k},E{7 + i % 2:06d},r\n" for i, k in enumerate(keys)),
+                                         encoding="utf-8")
+    index = SearchIndex(tmp_path / "index")
+    assert index.attach_events(lineage) == 40
+    word = recs[0]["title_norm_min"].split()[0]
+    res = SearchIndex(tmp_path / "index").query(word, limit=10_000)
+    tagged = {h["record_key"]: h["event_id"] for h in res["hits"] if h["event_id"]}
+    assert tagged and all(keys.index(k) % 2 == int(e[1:]) - 7 for k, e in tagged.items())
+    assert sum(c["hits"] for c in res["clusters"]) == len(tagged)
+
+
+def test_events_attach_only_touches_the_runs_days(tmp_path):
+    from analysis import group_similar
+
+    recs = _corpus(tmp_path, n=400, days=6)
+    processed, idx, out = tmp_path / "processed", tmp_path / "index", tmp_path / "clustered"
+    build(processed, idx)
+    first = sorted({r["published_iso"][:10] for r in recs})[0]
+    old = {r["record_key"]: "E000042" for r in recs if r["published_iso"][:10] == first}
+    SearchIndex(idx).attach_events(events=old, days=[first])
+    stamps = {p.name: p.stat().st_mtime_ns for p in idx.glob("*.events.npy")}
+    assert len(stamps) == 1
+
+    group_similar.main(["--processed-dir", str(processed), "--out-dir", str(out), "--window-days", "2",
+                        "--index-dir", str(idx), "--threshold", "0.5"])
+    after = {p.name: p.stat().st_mtime_ns for p in idx.glob("*.events.npy")}
+    assert all(after[n] == t for n, t in stamps.items())           # the run's 2 days only; day 1 untouched
+    assert len(after) == 3
+    res = SearchIndex(idx).query(recs[0]["title_norm_min"].split()[0], limit=10_000)
+    ev = {h["record_key"]: h["event_id"] for h in res["hits"]}
+    assert all(ev[k] == "E000042" for k in old if k in ev)
+    assert any(e and e != "E000042" for e in ev.values())
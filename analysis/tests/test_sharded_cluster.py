@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+
+from analysis.bench.synthetic_corpus import generate_corpus
+from analysis.cluster_planner import sparse_agglomerative
+from analysis.sharded_cluster import merge_pass, shard_bounds, sharded_cluster
+from analysis.vectorize import make_vectorizer
+
+
+def test_shard_bounds_cover_and_overlap():
+    b = shard_bounds(2500, 1000, 200)
+    assert b[0] == (0, 1000) and b[-1][1] == 2500
+    assert all(b[i][1] - b[i + 1][0] == 200 for i in range(len(b) - 1))
+    assert shard_bounds(10, 1000, 200) == [(0, 10)]
+
+
+def test_merge_pass_joins_split_story():
+    X = np.array([[1, 0], [1, 0.05], [0.99, 0.02], [0, 1]], dtype=np.float32)
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    labels = merge_pass(X, np.array([0, 1, 1, 2]), min_sim=0.5)
+    assert labels[0] == labels[1] == labels[2] != labels[3]
+
+
+def test_sharded_matches_single_process_within_tolerance():
+    df = pd.DataFrame(generate_corpus(3000, seed=5, days=4))
+    df = df.sort_values("published_iso", kind="mergesort").reset_index(drop=True)
+    X = make_vectorizer("tfidf", min_df=2, max_df=0.8).fit_transform(
+        (df["title_norm_min"] + " " + df["summary_norm_min"]).tolist())
+    single = sparse_agglomerative(X, 0.7, memory_budget_mb=1024)
+    sharded = sharded_cluster(X, 0.7, workers=2, shard_rows=1000, overlap_rows=250)
+    assert len(sharded) == len(single)
+    assert adjusted_rand_score(single, sharded) >= 0.95
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from analysis.story_threads import ThreadIndex, cluster_centroids, rebuild_registry, run_day
+
+COURT = ["בית המשפט העליון דן בעתירה נגד הממשלה", "העליון דן בעתירה נגד הממשלה היום"]
+COURT_NEXT = ["בית המשפט העליון ימשיך לדון בעתירה נגד הממשלה", "עתירה נגד הממשלה בעליון"]
+OTHER = ["מזג אוויר חם בצפון", "חום כבד בצפון הארץ"]
+
+
+def test_centroids_are_normalized_float32():
+    ids, sizes, V = cluster_centroids(COURT + OTHER, [7, 7, 9, 9])
+    assert list(ids) == [7, 9] and list(sizes) == [2, 2]
+    assert V.dtype == np.float32 and np.allclose(np.linalg.norm(V, axis=1), 1.0, atol=1e-5)
+
+
+def test_thread_continues_across_days(tmp_path):
+    d1 = run_day(pd.DataFrame({"text_for_cluster": COURT + OTHER}), [0, 0, 1, 1], "2025-08-20", tmp_path)
+    d2 = run_day(pd.DataFrame({"text_for_cluster": COURT_NEXT + ["בחירות בארצות הברית"]}), [5, 5, 6], "2025-08-21",
+                 tmp_path)
+    by1, by2 = d1.set_index("cluster"), d2.set_index("cluster")
+    assert by2.loc[5, "thread_id"] == by1.loc[0, "thread_id"]
+    assert by2.loc[5, "prev_day"] == "2025-08-20"
+    assert by2.loc[6, "thread_id"] not in set(d1["thread_id"])
+    assert not (tmp_path / "threads.csv").exists()                # daily writes stay per day
+    run_day(pd.DataFrame({"text_for_cluster": COURT_NEXT + ["בחירות בארצות הברית"]}), [5, 5, 6], "2025-08-21",
+            tmp_path)                                             # re-run of a day replaces its share
+    reg = rebuild_registry(tmp_path).set_index("thread_id")
+    t = by1.loc[0, "thread_id"]
+    assert reg.loc[t, ["first_day", "last_day", "days", "clusters"]].tolist() == ["2025-08-20", "2025-08-21", 2, 2]
+    assert pd.read_csv(tmp_path / "threads.csv")["thread_id"].tolist() == reg.index.tolist()
+    assert (tmp_path / "next_thread_id").read_text() == "5"       # T1, T2, T3 + T4 from the re-run
+
+
+def test_lookback_only_reads_window(tmp_path):
+    run_day(pd.DataFrame({"text_for_cluster": COURT}), [0, 0], "2025-08-01", tmp_path)
+    out = run_day(pd.DataFrame({"text_for_cluster": COURT_NEXT}), [0, 0], "2025-08-20", tmp_path, lookback=3)
+    assert out["prev_day"].tolist() == [""]                   # 19 days back is outside the window
+    assert ThreadIndex(tmp_path, lookback=3).load_window("2025-08-20") is None
+
+
+def test_missing_counter_is_recovered_from_day_files(tmp_path):
+    run_day(pd.DataFrame({"text_for_cluster": COURT + OTHER}), [0, 0, 1, 1], "2025-08-20", tmp_path)
+    (tmp_path / "next_thread_id").unlink()
+    assert ThreadIndex(tmp_path)._next_ids(1) == ["T000003"]
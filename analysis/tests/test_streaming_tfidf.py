@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.streaming_tfidf import TfidfArchive, archive_top_terms, build_archive
+
+
+def _archive(tmp_path, n=800, chunk_rows=150):
+    recs = generate_corpus(n, seed=11, days=4)
+    write_corpus(recs, tmp_path / "processed")
+    build_archive(str(tmp_path / "processed"), str(tmp_path / "arch"), chunk_rows=chunk_rows)
+    texts = []
+    for f in sorted((tmp_path / "processed").glob("*.json")):
+        texts += [r["title_norm_min"].strip() for r in json.loads(f.read_text(encoding="utf-8"))
+                  if (r.get("title_norm_min") or "").strip()]
+    return TfidfArchive(tmp_path / "arch"), texts
+
+
+def test_streamed_matrix_equals_in_memory_tfidf(tmp_path):
+    arch, texts = _archive(tmp_path)
+    v = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.8, dtype=np.float32)
+    X = v.fit_transform(texts)
+    assert len(arch.manifest["parts"]) == -(-len(texts) // 150)
+    assert list(arch.features) == list(v.get_feature_names_out())
+    assert abs(arch.tfidf() - X).max() < 1e-6
+    assert abs(arch.tfidf(200, 470) - X[200:470]).max() < 1e-6
+
+
+def test_class_counts_add_up(tmp_path):
+    arch, _ = _archive(tmp_path, n=300, chunk_rows=64)
+    rows = arch.rows()
+    ids, C = arch.class_counts(rows["source"].to_numpy())
+    total = sum(X.sum() for _, X in arch.iter_counts())
+    assert len(ids) == rows["source"].nunique()
+    assert np.isclose(C.sum(), total)
+
+
+def test_top_terms_by_day(tmp_path):
+    arch, _ = _archive(tmp_path, n=300, chunk_rows=64)
+    table = archive_top_terms(arch, by="day", k=5)
+    assert table["n_docs"].sum() == arch.shape[0]
+    assert all(t for t in table["top_terms"])
+    assert "num" not in ", ".join(table["top_terms"]).split(", ")
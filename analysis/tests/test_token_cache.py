@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from analysis import group_similar
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.cluster_labels import ctfidf
+from analysis.token_cache import VOCAB_FILE, TokenColumn, TokenVocab, ensure_tokens, read_stopwords
+from analysis.vectorize import TfidfBackend
+
+
+def _corpus(n=600, seed=4):
+    vocab = TokenVocab(stopwords=read_stopwords())
+    return pd.DataFrame(generate_corpus(n, seed=seed, vocab=vocab)), vocab
+
+
+def test_token_tfidf_matches_string_tfidf():
+    df, vocab = _corpus()
+    stop = list(group_similar.load_stopwords(group_similar.STOPWORDS_PATH))
+    b = TfidfBackend(stop_words=stop)
+    X_str = b.fit_transform(df["title_norm_min"].tolist())
+    f_str = np.array([str(f) for f in b.vectorizer.get_feature_names_out()])
+    X_tok = b.fit_transform(None, tokens=(TokenColumn.from_lists(df["title_tok"].tolist()), vocab))
+    f_tok = np.array([str(f) for f in b.token_features_])
+    assert set(f_str) == set(f_tok)
+    diff = X_str[:, np.argsort(f_str)] - X_tok[:, np.argsort(f_tok)]
+    assert abs(diff).max() < 1e-6
+
+
+def test_cluster_labels_same_with_tokens():
+    df, vocab = _corpus()
+    df.attrs["token_vocab"] = vocab
+    df["text_for_cluster"] = df["title_norm_min"]
+    _, with_tok = group_similar.cluster(df, threshold=0.6)
+    _, without = group_similar.cluster(df.drop(columns=["title_tok"]), threshold=0.6)
+    assert (with_tok == without).all()
+
+
+def test_row_keys_dedup_like_strings():
+    vocab = TokenVocab()
+    titles = ["ירי בצפון", "ירי בצפון", "ירי  בדרום", "", "ירי בדרום"]
+    col = TokenColumn.from_lists(vocab.encode_many(titles))
+    keys = col.row_keys()
+    assert keys[0] == keys[1] and keys[2] == keys[4] and keys[0] != keys[2]
+    assert keys[3] == b""
+
+
+def test_contains_any_and_stop_flags():
+    vocab = TokenVocab(stopwords={"של"})
+    col = TokenColumn.from_lists(vocab.encode_many(["פיגוע בירושלים", "מזג האוויר של מחר", "פיגוע"]))
+    assert col.contains_any(vocab.ids_for(["פיגוע", "לא-קיים"])).tolist() == [True, False, True]
+    assert vocab.is_stop[vocab.index["של"]] and not vocab.is_stop[vocab.index["מחר"]]
+
+
+def test_ctfidf_from_tokens_matches_strings():
+    df, vocab = _corpus(300, seed=6)
+    labels = df["event_id"].astype(str).to_numpy()
+    _, S_str, f_str = ctfidf(df["title_norm_min"].tolist(), labels)
+    _, S_tok, f_tok = ctfidf(None, labels, tokens=(TokenColumn.from_lists(df["title_tok"].tolist()), vocab))
+    f_str, f_tok = np.array([str(f) for f in f_str]), np.array([str(f) for f in f_tok])
+    assert set(f_str) == set(f_tok)
+    assert abs(S_str[:, np.argsort(f_str)] - S_tok[:, np.argsort(f_tok)]).max() < 1e-6
+
+
+def test_vocab_is_append_only(tmp_path):
+    v = TokenVocab()
+    first = v.encode("שלום עולם")
+    v.save(tmp_path / VOCAB_FILE)
+    v2 = TokenVocab.load(tmp_path / VOCAB_FILE)
+    assert v2.encode("שלום עולם") == first
+    assert v2.encode("עולם חדש") == [first[1], 2]
+
+
+def test_load_articles_uses_stored_ids(tmp_path):
+    df0, vocab = _corpus(200, seed=9)
+    write_corpus(df0.to_dict("records"), tmp_path, vocab=vocab)
+    df = group_similar.load_articles(str(tmp_path))
+    assert df.attrs["token_vocab"] is not None
+    assert len(df.attrs["token_vocab"]) == len(vocab)
+    row = df.iloc[0]
+    assert " ".join(df.attrs["token_vocab"].tokens[i] for i in row["title_tok"]) == row["title_norm_min"]
+
+
+def test_ensure_tokens_without_vocab_encodes_once():
+    df = pd.DataFrame({"title_norm_min": ["ירי בצפון", None], "title_tok": [[5, 9], []]})
+    ensure_tokens(df, cols=("title",))
+    v = df.attrs["token_vocab"]
+    assert [v.tokens[i] for i in df["title_tok"][0]] == ["ירי", "בצפון"]
+    assert df["title_tok"][1] == []
+
+
+def test_missing_vocab_file_reencodes_every_token_column(tmp_path):
+    from analysis.cluster_labels import cluster_top_terms
+
+    df0, vocab = _corpus(200)
+    write_corpus(df0.to_dict("records"), tmp_path, vocab=vocab)
+    (tmp_path / VOCAB_FILE).unlink()
+    df = group_similar.load_articles(str(tmp_path))
+    v = df.attrs["token_vocab"]
+    for col in ("title", "summary"):
+        row = df.iloc[0]
+        assert " ".join(v.tokens[i] for i in row[f"{col}_tok"]) == row[f"{col}_norm_min"]
+    labels = np.arange(len(df)) % 7
+    assert len(cluster_top_terms(df, labels)) == 7
+
+    # output columns load summary_tok without summary_norm_min -> the stale ids are dropped
+    df = group_similar.load_articles(str(tmp_path), columns=group_similar.LOAD_COLUMNS["output"])
+    assert "title_tok" in df.columns and "summary_tok" not in df.columns
+    assert len(cluster_top_terms(df, np.arange(len(df)) % 7)) == 7
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.vector_cache import VectorCache
+from analysis.vectorize import FakeEmbedder, DenseBackend, make_vectorizer
+from analysis import group_similar
+
+TEXTS = ["המשטרה עצרה חשוד בתל אביב", "חשוד נעצר בתל אביב", "מתכון לקיץ", "המשטרה עצרה חשוד בתל אביב"]
+KEYS = ["n12:a", "c14:b", "kan11:c", "n12:d"]
+
+
+def test_fake_embedder_is_deterministic():
+    a = FakeEmbedder(32).encode(TEXTS)
+    b = FakeEmbedder(32).encode(TEXTS)
+    assert a.shape == (4, 32) and a.dtype == np.float32
+    assert np.allclose(a, b)
+    assert np.allclose(a[0], a[3])
+
+
+def test_dense_backend_embeds_each_key_once(tmp_path):
+    emb = FakeEmbedder(16)
+    backend = DenseBackend(emb, cache_dir=tmp_path, dtype="float16", batch_size=2, n_threads=2)
+    X1 = backend.fit_transform(TEXTS, keys=KEYS)
+    assert emb.calls == 4
+    X2 = backend.fit_transform(TEXTS[:2] + ["טקסט חדש"], keys=KEYS[:2] + ["n12:new"])
+    assert emb.calls == 5                                     # only the unseen key was embedded
+    assert np.allclose(X1[:2], X2[:2], atol=1e-3)
+    assert np.allclose(np.linalg.norm(X1, axis=1), 1.0, atol=1e-2)
+
+
+def test_vector_cache_reload_is_memmap(tmp_path):
+    cache = VectorCache(tmp_path, "fake-8", 8, "float32")
+    cache.add(["a", "b", "a"], np.arange(24, dtype=np.float32).reshape(3, 8))
+    assert len(cache) == 2
+    again = VectorCache(tmp_path, "fake-8", 8, "float32")
+    m = again.matrix()
+    assert isinstance(m, np.memmap) and m.shape == (2, 8)
+    assert again.get(["b"])[0, 0] == 8.0
+    assert list(again.lookup(["b", "zzz"])) == [1, -1]
+    with pytest.raises(ValueError):
+        VectorCache(tmp_path, "fake-8", 16, "float32")
+
+
+@pytest.mark.parametrize("name", ["tfidf", "hashing"])
+def test_sparse_backends_shape(name):
+    X = make_vectorizer(name, min_df=1, max_df=1.0).fit_transform(TEXTS)
+    assert X.shape[0] == 4
+
+
+def test_cluster_with_fake_vectorizer(tmp_path):
+    df = pd.DataFrame({"text_for_cluster": TEXTS, "record_key": KEYS})
+    _, labels = group_similar.cluster(df, threshold=0.3, vectorizer="fake",
+                                      vector_opts={"cache_dir": str(tmp_path)})
+    assert labels[0] == labels[3]
+    assert labels[0] != labels[2]
+
+
+@pytest.mark.parametrize("features", ["word", "char", "hybrid"])
+def test_tfidf_feature_modes_are_float32_csr(features):
+    backend = make_vectorizer("tfidf", min_df=1, max_df=1.0, char_min_df=1, char_max_df=1.0, features=features)
+    X = backend.fit_transform(TEXTS)
+    assert X.format == "csr" and X.dtype == np.float32
+    assert np.allclose(np.sqrt(X.multiply(X).sum(axis=1)).A1, 1.0, atol=1e-5)
+    assert backend.stats["total"]["nnz"] == X.nnz
+    if features == "hybrid":
+        assert X.shape[1] == backend.stats["word"]["cols"] + backend.stats["char"]["cols"]
+
+
+def test_tfidf_memory_budget_caps_matrix():
+    texts = [f"כותרת מספר {i} על הממשלה והכנסת בירושלים" for i in range(200)]
+    full = make_vectorizer("tfidf", min_df=1, max_df=1.0, char_min_df=1, char_max_df=1.0, features="hybrid")
+    X_full = full.fit_transform(texts)
+    budget_mb = full.stats["total"]["mb"] / 2
+    capped = make_vectorizer("tfidf", min_df=1, max_df=1.0, char_min_df=1, char_max_df=1.0, features="hybrid",
+                             memory_budget_mb=budget_mb)
+    X = capped.fit_transform(texts)
+    assert X.nnz < X_full.nnz
+    assert capped.stats["total"]["mb"] <= budget_mb + 0.01
+
+
+def test_dense_backend_reembeds_edited_text(tmp_path):
+    emb = FakeEmbedder(16)
+    backend = DenseBackend(emb, cache_dir=tmp_path, dtype="float32", n_threads=1)
+    X1 = backend.fit_transform(TEXTS[:1], keys=KEYS[:1])
+    X2 = backend.fit_transform(["מתכון לקיץ"], keys=KEYS[:1])          # same URL, headline edited
+    assert emb.calls == 2 and not np.allclose(X1, X2)
+    X3 = DenseBackend(emb, cache_dir=tmp_path, dtype="float32").fit_transform(TEXTS[:1], keys=KEYS[:1])
+    assert emb.calls == 2 and np.allclose(X1, X3)
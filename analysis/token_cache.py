@@ -0,0 +1,269 @@
+# analysis/token_cache.py
+"""
+Tokenize each article once.
+
+preprocess() already produces norm_min text (lowercased, punctuation stripped,
+space separated). With a TokenVocab it also stores the tokens as interned ids:
+
+    "title_tok": [17, 4, 2051, ...]      (ids into <processed_dir>/token_vocab.txt)
+
+and everything downstream works on ids instead of re-splitting strings:
+- TokenColumn     : one flat int32 array + row offsets (CSR style) for a whole column
+- ngram_counts()  : doc x (uni+bi-gram) count matrix straight from ids -- the same
+                    features TfidfVectorizer(stop_words=...) builds from the strings
+- row_keys()      : bytes per row for dedup (same tokens <=> same norm_min string)
+- contains_any()  : lexicon hits per row with one np.isin over the flat array
+
+The vocab is append-only (line number = id), so ids in older processed files stay
+valid. Stopwords are flagged per vocab entry (TokenVocab.is_stop), not per
+occurrence, so changing the stopword file does not require re-processing.
+"""
+from __future__ import annotations
+
+import re
+import sys
+from functools import lru_cache
+from itertools import chain
+from numbers import Integral
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+VOCAB_FILE = "token_vocab.txt"
+STOPWORDS_PATH = Path("analysis/utils/hebrew_stopswords_list_extended.txt")
+TERM_RE = re.compile(r"(?u)\b\w\w+\b")           # TfidfVectorizer's default token_pattern
+
+
+def read_stopwords(path=STOPWORDS_PATH) -> frozenset:
+    """Stopword set; cached per (path, mtime), so long-running processes read the file once."""
+    p = Path(path)
+    if not p.exists():
+        return frozenset()
+    return _read_stopwords(str(p.resolve()), p.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _read_stopwords(path: str, mtime_ns: int) -> frozenset:
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(w for w in (line.strip() for line in f) if w and not w.startswith("#"))
+
+
+class TokenVocab:
+    """token <-> id, plus the sklearn-style term every token analyzes to ("<NUM>" -> "num")."""
+
+    def __init__(self, tokens: Iterable[str] = (), stopwords: Optional[Iterable[str]] = None):
+        self.tokens: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.stopwords = frozenset(stopwords or ())
+        self._arrays = None                      # cached term arrays, rebuilt when the vocab grows
+        for t in tokens:
+            self.add(t)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __deepcopy__(self, memo):
+        return self         # append-only and shared; newer pandas deep-copies df.attrs on every op
+
+    def add(self, tok: str) -> int:
+        i = self.index.get(tok)
+        if i is None:
+            i = len(self.tokens)
+            tok = sys.intern(tok)
+            self.tokens.append(tok)
+            self.index[tok] = i
+        return i
+
+    def encode(self, text) -> List[int]:
+        if not isinstance(text, str) or not text:
+            return []
+        add = self.add
+        return [add(t) for t in text.split()]
+
+    def encode_many(self, texts: Iterable) -> List[List[int]]:
+        return [self.encode(t) for t in texts]
+
+    def ids_for(self, words: Iterable[str]) -> np.ndarray:
+        """Ids of the words that are in the vocab (lexicon lookups)."""
+        return np.array([self.index[w] for w in words if w in self.index], dtype=np.int32)
+
+    # --- term view (what TfidfVectorizer would see) ---
+    def _term_arrays(self):
+        if self._arrays is None or self._arrays[0] != len(self.tokens):
+            terms = np.empty(len(self.tokens), dtype=object)
+            terms[:] = [" ".join(TERM_RE.findall(t.lower())) for t in self.tokens]
+            names, term_id = np.unique(terms, return_inverse=True)
+            if len(names) and names[0] == "":            # tokens with no \w\w+ part are dropped
+                term_id = term_id - 1
+                names = names[1:]
+            self._arrays = (len(self.tokens), term_id.astype(np.int32), names)
+        return self._arrays[1], self._arrays[2]
+
+    @property
+    def term_ids(self) -> np.ndarray:
+        return self._term_arrays()[0]
+
+    @property
+    def term_names(self) -> np.ndarray:
+        return self._term_arrays()[1]
+
+    def term_stop_mask(self, stop_words=True) -> np.ndarray:
+        """Bool per term: True = stopword. stop_words=True -> the vocab's own list."""
+        words = self.stopwords if stop_words is True else frozenset(stop_words or ())
+        names = self.term_names
+        return np.fromiter((n in words for n in names), dtype=bool, count=len(names))
+
+    @property
+    def is_stop(self) -> np.ndarray:
+        """Bool per token id."""
+        tid = self.term_ids
+        mask = self.term_stop_mask(True)
+        return np.where(tid >= 0, mask[np.maximum(tid, 0)] if len(mask) else False, False)
+
+    # --- persistence ---
+    @classmethod
+    def load(cls, path, stopwords: Optional[Iterable[str]] = None) -> "TokenVocab":
+        p = Path(path)
+        stop = read_stopwords() if stopwords is None else stopwords
+        if not p.exists():
+            return cls(stopwords=stop)
+        with p.open("r", encoding="utf-8") as f:
+            return cls((line.rstrip("\n") for line in f), stopwords=stop)
+
+    def save(self, path):
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(".tmp")
+        tmp.write_text("".join(t + "\n" for t in self.tokens), encoding="utf-8")
+        tmp.replace(p)
+
+
+class TokenColumn:
+    """A whole column of token id lists as flat ids + row offsets."""
+    __slots__ = ("indptr", "ids")
+
+    def __init__(self, indptr: np.ndarray, ids: np.ndarray):
+        self.indptr = indptr
+        self.ids = ids
+
+    @classmethod
+    def from_lists(cls, rows: Sequence) -> "TokenColumn":
+        rows = [r if r is not None and not (isinstance(r, float)) else [] for r in rows]
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        ids = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(indptr[-1]))
+        return cls(indptr, ids)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row_index(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    def row_keys(self) -> List[bytes]:
+        """Hashable key per row (dedup); equal keys <=> equal token sequences."""
+        b = self.ids.tobytes()
+        off = (self.indptr * self.ids.itemsize).tolist()
+        return [b[off[i]:off[i + 1]] for i in range(len(self))]
+
+    def contains_any(self, ids) -> np.ndarray:
+        """Bool per row: row has at least one of ids (e.g. vocab.ids_for(lexicon))."""
+        hit = np.isin(self.ids, np.asarray(ids, dtype=np.int32))
+        return np.bincount(self.row_index()[hit], minlength=len(self)) > 0
+
+
+def _ids_fit(values, vocab: TokenVocab) -> bool:
+    n = len(vocab)
+    return all(isinstance(r, list) and (not r or max(r) < n) for r in values)
+
+
+def ensure_tokens(df, cols=("title", "summary"), vocab: Optional[TokenVocab] = None):
+    """
+    Make sure df has <col>_tok id lists + df.attrs["token_vocab"] (in place, returns df).
+    Stored ids are used when the vocab covers them; otherwise (old processed files,
+    vocab file missing) <col>_norm_min is encoded here, once. A reset vocab re-encodes
+    every <x>_tok column in df, not just cols (summary_tok loaded for output would
+    otherwise keep ids from the old vocab); one without <x>_norm_min is dropped.
+    """
+    vocab = vocab if vocab is not None else df.attrs.get("token_vocab")
+    present = [str(c)[:-4] for c in df.columns if str(c).endswith("_tok")]
+    stored_ok = vocab is not None and all(_ids_fit(df[f"{c}_tok"], vocab) for c in present)
+    if not stored_ok:
+        vocab = TokenVocab(stopwords=read_stopwords())     # ids from an unknown vocab are useless
+    todo = list(cols) if stored_ok else list(dict.fromkeys([*cols, *present]))
+    for col in todo:
+        if stored_ok and col in present:
+            continue
+        if f"{col}_norm_min" in df.columns:
+            df[f"{col}_tok"] = vocab.encode_many(df[f"{col}_norm_min"].tolist())
+        elif col in present:
+            del df[f"{col}_tok"]
+    df.attrs["token_vocab"] = vocab
+    return df
+
+
+def token_column(df, col: str = "title") -> TokenColumn:
+    """TokenColumn for df[<col>_tok] (call ensure_tokens first)."""
+    return TokenColumn.from_lists(df[f"{col}_tok"].tolist())
+
+
+def ngram_counts(col: TokenColumn, vocab: TokenVocab, ngram_range=(1, 2), stop_words=True,
+                 term_filter: Optional[np.ndarray] = None):
+    """
+    (counts CSR [docs x features] float32, feature names) for uni/bi-grams built from ids.
+    Like TfidfVectorizer: tokens analyze to \\w\\w+ terms, stopwords are removed before
+    bigrams are formed. stop_words: True = vocab flags, a collection, or None/False.
+    term_filter: optional bool per term (e.g. Hebrew-only) applied like a stopword.
+    """
+    lo, hi = ngram_range
+    if hi > 2 or lo < 1:
+        raise ValueError("token n-grams support ngram_range within (1, 2)")
+    tid_all = vocab.term_ids
+    names = vocab.term_names
+    T = len(names)
+    tid = tid_all[col.ids] if col.ids.size else np.array([], dtype=np.int32)
+    keep = tid >= 0
+    drop_term = np.zeros(T, dtype=bool)
+    if stop_words:
+        drop_term |= vocab.term_stop_mask(stop_words)
+    if term_filter is not None:
+        drop_term |= ~term_filter
+    keep[keep] &= ~drop_term[tid[keep]]
+    rows = col.row_index()[keep]
+    t = tid[keep].astype(np.int64)
+
+    r_parts, k_parts = [], []
+    if lo <= 1:
+        r_parts.append(rows)
+        k_parts.append(t)
+    if hi >= 2 and t.size > 1:
+        same = rows[1:] == rows[:-1]
+        r_parts.append(rows[1:][same])
+        k_parts.append(T + t[:-1][same] * T + t[1:][same])
+    r = np.concatenate(r_parts) if r_parts else np.array([], dtype=np.int64)
+    k = np.concatenate(k_parts) if k_parts else np.array([], dtype=np.int64)
+    keys, cols = np.unique(k, return_inverse=True)
+    X = sp.csr_matrix((np.ones(k.size, dtype=np.float32), (r, cols)), shape=(len(col), len(keys)))
+    X.sum_duplicates()
+
+    uni = keys < T
+    feat = np.empty(len(keys), dtype=object)
+    feat[uni] = names[keys[uni]]
+    bi = keys[~uni] - T
+    feat[~uni] = names[bi // T] + " " + names[bi % T] if bi.size else np.array([], dtype=object)
+    return X, feat
+
+
+def df_prune(X: sp.csr_matrix, min_df=1, max_df=1.0):
+    """Column mask by document frequency, with TfidfVectorizer's int/float semantics."""
+    n = X.shape[0]
+    df_col = np.bincount(X.indices, minlength=X.shape[1])
+    lo = min_df if isinstance(min_df, Integral) else min_df * n
+    hi = max_df if isinstance(max_df, Integral) else max_df * n
+    mask = (df_col >= lo) & (df_col <= hi)
+    if not mask.any():
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    return mask
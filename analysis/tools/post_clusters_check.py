@@ -1,10 +1,12 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from analysis.cluster_labels import cluster_top_terms
+from analysis.frame_loader import read_frame
 
 #change the date of the articles.csv to the latest one
-df = pd.read_csv("data/clustered/2025-08-28_16-21-40/articles.csv")
+# only the columns used below; cluster/source as categories
+df = read_frame("data/clustered/2025-08-28_16-21-40/articles.csv", columns=["cluster", "source", "title", "summary"])
 
-by = df.groupby("cluster")
+by = df.groupby("cluster", observed=True)
 summary = pd.DataFrame({
     "cluster_size": by.size(),
     "n_sources": by["source"].nunique()
@@ -23,21 +25,13 @@ print(summary.sort_values(["n_sources","cluster_size"], ascending=False).head(10
 
 #####################
 # Top terms in clusters
-def top_terms_for_cluster(df, cid, k=12):
-    texts = (df.loc[df.cluster==cid, "title"].fillna("") + " " +
-             df.loc[df.cluster==cid, "summary"].fillna("")).tolist()
-    v = TfidfVectorizer(
-        token_pattern=r"(?u)\b[\u05D0-\u05EA]{2,}\b",  # Hebrew words only
-        ngram_range=(1,2), min_df=1, max_df=0.95
-    )
-    X = v.fit_transform(texts)
-    weights = X.mean(axis=0).A1
-    feats = v.get_feature_names_out()
-    top = sorted(zip(feats, weights), key=lambda x: x[1], reverse=True)[:k]
-    return [t for t,_ in top]
+# one class-based TF-IDF pass for all clusters (was: one TfidfVectorizer per cluster)
+terms = cluster_top_terms(df, k=12).set_index("cluster")["top_terms"]
+sizes = df["cluster"].value_counts()
+titles = df.groupby("cluster", observed=True)["title"].head(3).groupby(df["cluster"], observed=True).agg(list)
 
 # Inspect the 5 biggest clusters
-for cid in df["cluster"].value_counts().head(5).index:
-    print(f"\n=== Cluster {cid} (size={ (df.cluster==cid).sum() }) ===")
-    print(", ".join(top_terms_for_cluster(df, cid)))
-    print(df.loc[df.cluster==cid, "title"].head(3).to_list())
+for cid in sizes.head(5).index:
+    print(f"\n=== Cluster {cid} (size={sizes[cid]}) ===")
+    print(terms[cid])
+    print(titles[cid])
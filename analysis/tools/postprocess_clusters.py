@@ -1,34 +1,119 @@
 # postprocess_clusters.py
-import json, os, argparse
-from datetime import datetime
+"""
+Post-process a combined_grouped_<date>.json file:
+- clusters_summary.csv   : one row per cluster (representative article, sources, first/last publish time)
+- articles_by_cluster.csv: every article, ordered by cluster then publish time
+
+Everything is column-wise (no per-cluster loop / iterrows):
+dates are parsed as whole columns, the representatives come from ONE sort over
+(cluster, published, scraped, -title_len), and first/last/size from one groupby.
+Benchmark: python -m analysis.bench.bench_postprocess (--compare runs the old loop).
+"""
+import os, argparse
+import numpy as np
 import pandas as pd
 
-def parse_dt(s):
-    if not isinstance(s, str) or not s.strip():
-        return pd.NaT
-    return pd.to_datetime(s, utc=True, errors="coerce")
-
-def pick_representative(group: pd.DataFrame) -> pd.Series:
-    g = group.copy()
-    g["title_len"] = g["title"].apply(lambda x: len(x) if isinstance(x, str) else 0)
-    g = g.sort_values(
-        by=["published_dt_parsed", "scraped_at_parsed", "title_len"],
-        ascending=[True, True, False],
-    )
-    return g.iloc[0]
-
-def main(inp, out_dir):
-    with open(inp, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
-
-    # Ensure expected columns exist
-    for col in ["cluster_id","title","summary","url","source","published_dt","scraped_at","clean_title"]:
-        if col not in df.columns:
-            df[col] = None
-
-    df["published_dt_parsed"] = df["published_dt"].apply(parse_dt)
-    df["scraped_at_parsed"] = df["scraped_at"].apply(parse_dt)
+from analysis.frame_loader import read_frame
+
+EXPECTED_COLS = ["cluster_id", "title", "summary", "url", "source", "published_dt", "scraped_at", "clean_title"]
+ARTICLE_COLS = ["cluster_id", "title", "summary", "url", "source", "published_dt", "scraped_at"]
+
+
+def _as_str(s: pd.Series) -> pd.Series:
+    """Strings stay, everything else (None / NaN / numbers) -> NaN."""
+    s = s.astype(object)
+    return s.where(s.map(type).eq(str))
+
+
+def parse_dt(s: pd.Series) -> pd.Series:
+    """Column -> UTC timestamps. Blank / non-string / unparseable -> NaT."""
+    txt = _as_str(s)
+    stripped = txt.str.strip()
+    txt = txt.where(stripped.notna() & stripped.ne(""))
+    out = pd.to_datetime(txt, utc=True, errors="coerce", format="ISO8601")
+    # whatever isn't ISO (e.g. RFC-822 "Fri, 22 Aug 2025 ...") gets the slow per-value parser
+    retry = txt.notna() & out.isna()
+    if retry.any():
+        out[retry] = pd.to_datetime(txt[retry], utc=True, errors="coerce", format="mixed")
+    return out
+
+
+def _title_len(s: pd.Series) -> pd.Series:
+    return _as_str(s).str.len().fillna(0).astype(int)
+
+
+def pick_representatives(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per cluster (indexed by cluster_id): earliest published, then earliest
+    scraped, then longest title. Single stable sort + first row per cluster.
+    """
+    keys = pd.DataFrame({
+        "c": df["cluster_id"],
+        "p": df["published_dt_parsed"],
+        "s": df["scraped_at_parsed"],
+        "l": -_title_len(df["title"]),
+    })
+    keys = keys.sort_values(["c", "p", "s", "l"], kind="mergesort", na_position="last")
+    first = keys.drop_duplicates("c").index
+    return df.loc[first].set_index("cluster_id", drop=False)
+
+
+def _iso(ts: pd.Series) -> pd.Series:
+    return ts.map(lambda t: t.isoformat() if pd.notna(t) else "")
+
+
+def cluster_summary(df: pd.DataFrame) -> pd.DataFrame:
+    g = df.groupby("cluster_id", dropna=False)
+    agg = pd.DataFrame({
+        "size": g.size(),
+        "first": g["published_dt_parsed"].min(),
+        "last": g["published_dt_parsed"].max(),
+    })
+
+    # "a, b, c" per cluster: one presence mask per distinct source (a handful of outlets),
+    # instead of a Python join per group
+    pos = g.ngroup().to_numpy()                          # row -> position in agg (same order)
+    src = df["source"]
+    has_src = src.notna().to_numpy()
+    src_str = src[has_src].astype(str).to_numpy()
+    sources = np.full(len(agg), "", dtype=object)
+    for name in sorted(set(src_str.tolist())):
+        has = np.zeros(len(agg), dtype=bool)
+        has[pos[has_src][src_str == name]] = True
+        sources = np.where(has, np.where(sources == "", name, sources + ", " + name), sources)
+
+    rep = pick_representatives(df).reindex(agg.index)
+    out = pd.DataFrame({
+        "cluster_id": agg.index,
+        "size": agg["size"].to_numpy(),
+        "repr_title": rep["title"].to_numpy(),
+        "repr_url": rep["url"].to_numpy(),
+        "repr_source": rep["source"].to_numpy(),
+        "sources": sources,
+        "first_published_dt": _iso(agg["first"]).to_numpy(),
+        "last_published_dt": _iso(agg["last"]).to_numpy(),
+    })
+    return out.sort_values(["size", "cluster_id"], ascending=[False, True], kind="mergesort")
+
+
+def articles_by_cluster(df: pd.DataFrame) -> pd.DataFrame:
+    """Articles ordered by cluster, then (published, source, url) inside each cluster."""
+    order = df.sort_values(["cluster_id", "published_dt_parsed", "source", "url"],
+                           kind="mergesort", na_position="last")
+    return order[ARTICLE_COLS]
+
+
+def load_grouped(inp, report: bool = False) -> pd.DataFrame:
+    # only the expected columns are built (missing ones come back empty); source -> category
+    df = read_frame(inp, columns=EXPECTED_COLS, categories=("source",), report=report)
+
+    df["published_dt_parsed"] = parse_dt(df["published_dt"])
+    df["scraped_at_parsed"] = parse_dt(df["scraped_at"])
+    return df
+
+
+def main(inp, out_dir, quiet=False):
+    df = load_grouped(inp, report=not quiet)
 
     # Metrics
     n_articles = len(df)
@@ -36,45 +121,18 @@ def main(inp, out_dir):
     n_clusters = cluster_counts.shape[0]
     n_singletons = (cluster_counts == 1).sum()
     pct_singletons = (n_singletons / max(n_clusters, 1)) * 100.0
-    print("=== Metrics ===")
-    print(f"Articles: {n_articles}")
-    print(f"Clusters: {n_clusters}")
-    print(f"Singleton clusters: {n_singletons} ({pct_singletons:.1f}%)")
-    print("Top 10 cluster sizes:")
-    print(cluster_counts.sort_values(ascending=False).head(10))
+    if not quiet:
+        print("=== Metrics ===")
+        print(f"Articles: {n_articles}")
+        print(f"Clusters: {n_clusters}")
+        print(f"Singleton clusters: {n_singletons} ({pct_singletons:.1f}%)")
+        print("Top 10 cluster sizes:")
+        print(cluster_counts.sort_values(ascending=False).head(10))
 
     # Representatives & exports
-    repr_rows, article_rows = [], []
-    for cid, group in df.groupby("cluster_id", dropna=False):
-        rep = pick_representative(group)
-        sources = ", ".join(sorted(set(group["source"].dropna().astype(str).tolist())))
-        first_pub = group["published_dt_parsed"].min()
-        last_pub = group["published_dt_parsed"].max()
-        repr_rows.append({
-            "cluster_id": cid,
-            "size": len(group),
-            "repr_title": rep.get("title",""),
-            "repr_url": rep.get("url",""),
-            "repr_source": rep.get("source",""),
-            "sources": sources,
-            "first_published_dt": first_pub.isoformat() if pd.notna(first_pub) else "",
-            "last_published_dt": last_pub.isoformat() if pd.notna(last_pub) else "",
-        })
-        for _, r in group.sort_values(["published_dt_parsed","source","url"]).iterrows():
-            article_rows.append({
-                "cluster_id": cid,
-                "title": r.get("title",""),
-                "summary": r.get("summary",""),
-                "url": r.get("url",""),
-                "source": r.get("source",""),
-                "published_dt": r.get("published_dt",""),
-                "scraped_at": r.get("scraped_at",""),
-            })
-
     os.makedirs(out_dir, exist_ok=True)
-    pd.DataFrame(repr_rows).sort_values(["size","cluster_id"], ascending=[False,True])\
-        .to_csv(os.path.join(out_dir, "clusters_summary.csv"), index=False, encoding="utf-8-sig")
-    pd.DataFrame(article_rows).to_csv(os.path.join(out_dir, "articles_by_cluster.csv"), index=False, encoding="utf-8-sig")
+    cluster_summary(df).to_csv(os.path.join(out_dir, "clusters_summary.csv"), index=False, encoding="utf-8-sig")
+    articles_by_cluster(df).to_csv(os.path.join(out_dir, "articles_by_cluster.csv"), index=False, encoding="utf-8-sig")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -85,4 +143,4 @@ if __name__ == "__main__":
 
 
 ## Run this script with:
-# python analysis/tools/postprocess_clusters.py --in data/final/combined_grouped_YYYY-MM-DD.json --out data/final/
\ No newline at end of file
+# python -m analysis.tools.postprocess_clusters --in data/final/combined_grouped_YYYY-MM-DD.json --out data/final/
\ No newline at end of file
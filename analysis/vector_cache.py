@@ -0,0 +1,117 @@
+# analysis/vector_cache.py
+"""
+Append-only, memory-mapped cache of dense article vectors keyed by record_key.
+
+Layout (one folder per model, so switching models never mixes vectors):
+  <cache_dir>/<model_slug>/
+      meta.json          {"model_id", "dim", "dtype", "rows"}
+      vectors.bin        raw row-major matrix (rows x dim) in float16/float32
+      keys.txt           record_key of each row, one per line (row i = line i)
+
+Each article is embedded once; later runs only embed unseen record_keys and
+append them. Reloads open vectors.bin with np.memmap (no copy, no parse).
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+_SLUG_RE = re.compile(r"[^0-9A-Za-z._-]+")
+
+
+class VectorCache:
+    def __init__(self, cache_dir, model_id: str, dim: int, dtype: str = "float16"):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"dtype must be float16 or float32, got {dtype!r}")
+        self.model_id = model_id
+        self.dim = int(dim)
+        self.dtype = np.dtype(dtype)
+        self.path = Path(cache_dir) / (_SLUG_RE.sub("_", model_id).strip("_") or "model")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._vec_path = self.path / "vectors.bin"
+        self._keys_path = self.path / "keys.txt"
+        self._meta_path = self.path / "meta.json"
+        self._keys: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._load()
+
+    # --- persistence ---
+    def _load(self):
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            if meta.get("dim") != self.dim or meta.get("dtype") != self.dtype.name:
+                raise ValueError(
+                    f"Vector cache at {self.path} has dim={meta.get('dim')} dtype={meta.get('dtype')}, "
+                    f"expected dim={self.dim} dtype={self.dtype.name}"
+                )
+        if self._keys_path.exists():
+            with self._keys_path.open("r", encoding="utf-8") as fh:
+                self._keys = [line.rstrip("\n") for line in fh]
+        # a crash between the two appends can leave them out of sync -> keep the common prefix
+        row_bytes = self.dim * self.dtype.itemsize
+        n_vec = self._vec_path.stat().st_size // row_bytes if self._vec_path.exists() else 0
+        n = min(n_vec, len(self._keys))
+        if n != n_vec or n != len(self._keys):
+            print(f"[WARN] Vector cache {self.path} out of sync ({n_vec} vectors, {len(self._keys)} keys); truncating to {n}")
+            self._keys = self._keys[:n]
+            with self._vec_path.open("ab") as fh:
+                fh.truncate(n * row_bytes)
+            self._keys_path.write_text("".join(k + "\n" for k in self._keys), encoding="utf-8")
+        self.index = {k: i for i, k in enumerate(self._keys)}
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {"model_id": self.model_id, "dim": self.dim, "dtype": self.dtype.name, "rows": len(self._keys)}
+        self._meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def __len__(self):
+        return len(self._keys)
+
+    # --- access ---
+    def matrix(self) -> np.ndarray:
+        """Zero-copy read-only view of all cached vectors (rows x dim)."""
+        if not self._keys:
+            return np.empty((0, self.dim), dtype=self.dtype)
+        return np.memmap(self._vec_path, dtype=self.dtype, mode="r", shape=(len(self._keys), self.dim))
+
+    def lookup(self, keys: Sequence[str]) -> np.ndarray:
+        """Row index per key, -1 where the key isn't cached."""
+        get = self.index.get
+        return np.fromiter((get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray):
+        """Append vectors for new keys (keys already cached are skipped)."""
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"expected (n, {self.dim}) vectors, got {vectors.shape}")
+        fresh = [i for i, k in enumerate(keys) if k not in self.index]
+        # drop repeated keys inside the same batch
+        seen, keep = set(), []
+        for i in fresh:
+            if keys[i] not in seen:
+                seen.add(keys[i])
+                keep.append(i)
+        if not keep:
+            return
+        block = np.ascontiguousarray(vectors[keep], dtype=self.dtype)
+        with self._vec_path.open("ab") as fh:
+            fh.write(block.tobytes())
+        with self._keys_path.open("a", encoding="utf-8") as fh:
+            for i in keep:
+                fh.write(keys[i] + "\n")
+        for i in keep:
+            self.index[keys[i]] = len(self._keys)
+            self._keys.append(keys[i])
+        self._write_meta()
+
+    def get(self, keys: Sequence[str]) -> np.ndarray:
+        """float32 matrix for keys (all must be cached)."""
+        rows = self.lookup(keys)
+        if (rows < 0).any():
+            missing = [k for k, r in zip(keys, rows) if r < 0][:5]
+            raise KeyError(f"{int((rows < 0).sum())} keys not in vector cache, e.g. {missing}")
+        return np.asarray(self.matrix()[rows], dtype=np.float32)
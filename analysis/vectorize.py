@@ -0,0 +1,288 @@
+# analysis/vectorize.py
+"""
+Vectorizer backends for group_similar.cluster().
+
+Every backend has the same interface:
+    X = backend.fit_transform(texts, keys=None, tokens=None)
+returning one row per text (scipy CSR for sparse backends, float32 ndarray
+for dense ones), rows L2-normalized so cosine distance works as-is.
+
+Backends:
+- "tfidf"   : TF-IDF on word n-grams (the original behaviour), char n-grams,
+              or a weighted word + char "hybrid"; float32 CSR, optional memory budget
+- "hashing" : HashingVectorizer + IDF; no vocabulary to fit/store, stable across runs
+- "embed"   : local transformer model (mean-pooled), batched + multi-threaded
+- "fake"    : deterministic token-hash embedder for tests/benchmarks (no model needed)
+
+Dense backends go through a VectorCache keyed by record_key + a hash of the
+embedded text, so each article is embedded once and re-used on every later run,
+and an edited headline (same URL) or a different text recipe gets a fresh vector.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from analysis.token_cache import df_prune, ngram_counts
+from analysis.vector_cache import VectorCache
+
+VECTORIZERS = ("tfidf", "hashing", "embed", "fake")
+FEATURE_MODES = ("word", "char", "hybrid")
+DEFAULT_EMBED_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+# --- sparse helpers ---
+def matrix_stats(X) -> dict:
+    """Shape / nnz / bytes of a sparse (or dense) feature matrix."""
+    if sp.issparse(X):
+        X = X.tocsr()
+        nbytes = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+        nnz = int(X.nnz)
+    else:
+        nbytes = X.nbytes
+        nnz = int(np.count_nonzero(X))
+    return {"rows": int(X.shape[0]), "cols": int(X.shape[1]), "nnz": nnz,
+            "mb": round(nbytes / 2**20, 2), "dtype": str(X.dtype)}
+
+
+def prune_to_budget(X, budget_bytes: int):
+    """
+    Drop columns until a float32 CSR matrix fits budget_bytes
+    (nnz * (4 data + 4 index) + indptr). The most frequent features go first:
+    they cost the most nnz and carry the least IDF weight.
+    Returns (X_pruned, kept_column_indices).
+    """
+    X = X.tocsr()
+    nnz_budget = max(0, (budget_bytes - (X.shape[0] + 1) * 4) // 8)
+    if X.nnz <= nnz_budget:
+        return X, np.arange(X.shape[1])
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    order = np.argsort(df, kind="stable")              # rarest first
+    keep = np.sort(order[np.cumsum(df[order]) <= nnz_budget])
+    return X[:, keep], keep
+
+
+# --- sparse backends ---
+class TfidfBackend:
+    """
+    features="word"   : word n-grams (ngram_range), stopwords removed
+    features="char"   : char_wb n-grams (char_ngram_range) -- handles Hebrew prefixes (ו/ה/ב/ל...)
+    features="hybrid" : hstack([word * word_weight, char * char_weight]), rows re-normalized
+
+    Both blocks are float32 CSR and pruned by min_df/max_df before stacking. With
+    memory_budget_mb the stacked matrix is capped to that size: the word block
+    keeps what it needs (it is small) and the char block gets the rest.
+
+    tokens=(TokenColumn, TokenVocab) (see analysis/token_cache.py) builds the word
+    block from the stored token ids instead of re-tokenizing the texts; same
+    features and weights as the string path for ngram_range up to bigrams.
+    """
+    name = "tfidf"
+
+    def __init__(self, ngram_range=(1, 2), min_df=2, max_df=0.8, stop_words=None,
+                 features: str = "word", char_ngram_range=(3, 5), char_min_df=2, char_max_df=0.8,
+                 word_weight: float = 1.0, char_weight: float = 0.5, memory_budget_mb: Optional[float] = None):
+        if features not in FEATURE_MODES:
+            raise ValueError(f"features must be one of {FEATURE_MODES}, got {features!r}")
+        self.features = features
+        self.word_weight = word_weight
+        self.char_weight = char_weight
+        self.memory_budget_mb = memory_budget_mb
+        self.stats = {}
+        self.vectorizer = TfidfVectorizer(
+            ngram_range=tuple(ngram_range),
+            min_df=min_df,
+            max_df=max_df,
+            stop_words=stop_words,
+            dtype=np.float32,
+        )
+        self.char_vectorizer = TfidfVectorizer(
+            analyzer="char_wb",
+            ngram_range=tuple(char_ngram_range),
+            min_df=char_min_df,
+            max_df=char_max_df,
+            dtype=np.float32,
+        )
+
+    def _word_from_tokens(self, tokens):
+        col, vocab = tokens
+        v = self.vectorizer
+        counts, feats = ngram_counts(col, vocab, v.ngram_range, stop_words=v.stop_words or False)
+        keep = df_prune(counts, v.min_df, v.max_df)
+        self.token_features_ = feats[keep]
+        return TfidfTransformer().fit_transform(counts[:, keep]).astype(np.float32, copy=False)
+
+    def fit_transform(self, texts: Sequence[str], keys: Optional[Sequence[str]] = None, tokens=None):
+        budget = int(self.memory_budget_mb * 2**20) if self.memory_budget_mb else None
+        blocks, weights = [], []
+        if self.features in ("word", "hybrid"):
+            if tokens is not None and self.vectorizer.ngram_range[1] <= 2:
+                X_word = self._word_from_tokens(tokens)
+            else:
+                X_word = self.vectorizer.fit_transform(texts)
+            if budget is not None:
+                X_word, _ = prune_to_budget(X_word, budget)
+                budget -= X_word.data.nbytes + X_word.indices.nbytes + X_word.indptr.nbytes
+            self.stats["word"] = matrix_stats(X_word)
+            blocks.append(X_word)
+            weights.append(self.word_weight)
+        if self.features in ("char", "hybrid"):
+            X_char = self.char_vectorizer.fit_transform(texts)
+            if budget is not None:
+                X_char, _ = prune_to_budget(X_char, max(budget, 0))
+            self.stats["char"] = matrix_stats(X_char)
+            blocks.append(X_char)
+            weights.append(self.char_weight)
+
+        if len(blocks) == 1:
+            X = blocks[0].tocsr()
+        else:
+            X = sp.hstack([b * np.float32(w) for b, w in zip(blocks, weights)], format="csr", dtype=np.float32)
+        X = normalize(X, copy=False).astype(np.float32, copy=False)
+        self.stats["total"] = matrix_stats(X)
+        parts = ", ".join(f"{k}: {v['cols']} cols nnz={v['nnz']} {v['mb']}MB" for k, v in self.stats.items())
+        print(f"[INFO] TF-IDF features ({self.features}) -> {parts}")
+        return X
+
+
+class HashingBackend:
+    name = "hashing"
+
+    def __init__(self, ngram_range=(1, 2), stop_words=None, n_features: int = 2**18):
+        self.hasher = HashingVectorizer(
+            ngram_range=tuple(ngram_range),
+            stop_words=stop_words,
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32,
+        )
+        self.idf = TfidfTransformer()
+
+    def fit_transform(self, texts: Sequence[str], keys: Optional[Sequence[str]] = None, tokens=None):
+        return self.idf.fit_transform(self.hasher.transform(texts))
+
+
+# --- dense embedders (encode() -> float32, not necessarily normalized) ---
+class FakeEmbedder:
+    """Sum of per-token pseudo-random vectors (seeded by a hash of the token)."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.model_id = f"fake-{dim}"
+        self.calls = 0          # number of texts encoded (tests check cache hits with it)
+        self._tok_cache = {}
+
+    def _token_vec(self, tok: str) -> np.ndarray:
+        v = self._tok_cache.get(tok)
+        if v is None:
+            seed = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little")
+            v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._tok_cache[tok] = v
+        return v
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        self.calls += len(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for tok in str(t).split():
+                out[i] += self._token_vec(tok)
+        return out
+
+
+class TransformerEmbedder:
+    """Mean-pooled sentence vectors from a local Hugging Face model (transformers + torch)."""
+
+    def __init__(self, model: str = DEFAULT_EMBED_MODEL, max_length: int = 64, device: str = "cpu"):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:  # optional dependency
+            raise ImportError("vectorizer 'embed' needs `transformers` and `torch` installed") from e
+        self._torch = torch
+        self.model_id = model
+        self.max_length = max_length
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.model = AutoModel.from_pretrained(model).to(device).eval()
+        self.dim = int(self.model.config.hidden_size)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        torch = self._torch
+        enc = self.tokenizer(list(texts), padding=True, truncation=True,
+                             max_length=self.max_length, return_tensors="pt").to(self.device)
+        with torch.inference_mode():
+            hidden = self.model(**enc).last_hidden_state
+            mask = enc["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        return pooled.cpu().numpy().astype(np.float32)
+
+
+class DenseBackend:
+    """Wraps an embedder with batching, a thread pool and the record_key vector cache."""
+
+    @staticmethod
+    def cache_key(key: str, text: str) -> str:
+        """record_key + short hash of the text that gets embedded."""
+        return f"{key}#{hashlib.blake2b(text.encode('utf-8'), digest_size=6).hexdigest()}"
+
+    def __init__(self, embedder, cache_dir: Optional[str] = None, dtype: str = "float16",
+                 batch_size: int = 64, n_threads: int = 4):
+        self.embedder = embedder
+        self.name = embedder.model_id
+        self.batch_size = max(1, batch_size)
+        self.n_threads = max(1, n_threads)
+        self.cache = VectorCache(cache_dir, embedder.model_id, embedder.dim, dtype) if cache_dir else None
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.n_threads == 1 or len(batches) == 1:
+            parts = [self.embedder.encode(b) for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as ex:
+                parts = list(ex.map(self.embedder.encode, batches))
+        return normalize(np.vstack(parts)).astype(np.float32, copy=False)
+
+    def fit_transform(self, texts: Sequence[str], keys: Optional[Sequence[str]] = None, tokens=None) -> np.ndarray:
+        texts = list(texts)
+        if self.cache is None or keys is None:
+            return self._encode(texts)
+        keys = [self.cache_key(str(k), t) for k, t in zip(keys, texts)]
+        rows = self.cache.lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+        if missing.size:
+            print(f"[INFO] Embedding {missing.size} new articles ({len(texts) - missing.size} from cache)")
+            self.cache.add([keys[i] for i in missing], self._encode([texts[i] for i in missing]))
+        return self.cache.get(keys)
+
+
+def make_vectorizer(name: str = "tfidf", *, ngram_range=(1, 2), min_df=2, max_df=0.8, stop_words=None,
+                    features: str = "word", char_ngram_range=(3, 5), char_min_df=2, char_max_df=0.8,
+                    word_weight: float = 1.0, char_weight: float = 0.5, memory_budget_mb: Optional[float] = None,
+                    model: Optional[str] = None, cache_dir: Optional[str] = None, dtype: str = "float16",
+                    batch_size: int = 64, n_threads: Optional[int] = None, dim: int = 64):
+    """Build a backend by name (see VECTORIZERS). Feature-mode options only apply to "tfidf"."""
+    n_threads = n_threads or min(4, os.cpu_count() or 1)
+    if name == "tfidf":
+        return TfidfBackend(ngram_range=ngram_range, min_df=min_df, max_df=max_df, stop_words=stop_words,
+                            features=features, char_ngram_range=char_ngram_range, char_min_df=char_min_df,
+                            char_max_df=char_max_df, word_weight=word_weight, char_weight=char_weight,
+                            memory_budget_mb=memory_budget_mb)
+    if name == "hashing":
+        return HashingBackend(ngram_range=ngram_range, stop_words=stop_words)
+    if name == "embed":
+        return DenseBackend(TransformerEmbedder(model or DEFAULT_EMBED_MODEL), cache_dir=cache_dir,
+                            dtype=dtype, batch_size=batch_size, n_threads=n_threads)
+    if name == "fake":
+        return DenseBackend(FakeEmbedder(dim), cache_dir=cache_dir, dtype=dtype,
+                            batch_size=batch_size, n_threads=n_threads)
+    raise ValueError(f"Unknown vectorizer {name!r}; choose one of {VECTORIZERS}")
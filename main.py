@@ -1,54 +1,253 @@
-from scraping.n12_scraper import get_n12_rss_headlines
-from scraping.channel14_scraper import get_c14_headlines
-from adapters.c14_adapter import main as c14_adapter_main
-from analysis.preprocessing import main as preprocess_main
-from analysis.group_similar import main as group_similar_main
+"""
+Command line entry point for the media monitor.
+
+  python main.py [run]                  # scrape -> adapt -> preprocess, cached (see pipeline/)
+  python main.py run --until cluster    # ... and group similar articles
+  python main.py scrape [n12] [c14]     # just the scrapers
+  python main.py adapt
+  python main.py preprocess
+  python main.py cluster --threshold 0.8 --window-days 3    # any analysis/group_similar.py flag
+  python main.py report [--top 10]      # latest clustering run + last stage metrics
+  python main.py worker                 # resident mode: warm model, incremental clustering (pipeline/worker.py)
+  python main.py worker --ctl status    # ask a running worker (status / poll / refit / refresh / stop)
+  python main.py migrate [--to .jsonl.zst]   # rewrite old .json data files as compressed JSONL (adapters/common/storage.py)
+  python main.py compact [--dry-run]    # closed days -> monthly partitions, prune old clustering runs (pipeline/compact.py)
+  python main.py query "עזה" --days 7 --per-source 5   # search the archive (analysis/search_index.py)
+  python main.py serve [--port 8766]    # local read-only JSON API: clusters, outlets, search (pipeline/service.py)
+
+Only the stage that actually runs imports its module, so `scrape` never loads
+pandas/sklearn and `report` reads CSV/JSONL with the stdlib. Keep it that way:
+cron polls this every few minutes and pays the startup each time
+(tests/test_cli_startup.py checks what gets imported).
+
+`run` skips stages whose inputs and code didn't change; scrape/adapt/preprocess/
+cluster always rerun the named stage (same as `run --only <stage> --force`).
+Every stage appends a line to data/metrics/metrics.jsonl; --profile adds
+cProfile/tracemalloc dumps (pipeline/instrument.py).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
 
 #get_kan11_rss_headlines()      #doesnt work with rss
 
-if __name__ == "__main__":
+COMMANDS = ("run", "scrape", "adapt", "preprocess", "cluster", "report", "worker", "migrate", "compact", "query", "serve")
+SCRAPE_STAGES = {"n12": "scrape_n12", "c14": "scrape_c14"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    common.add_argument("--state-dir", default="data/.pipeline", help="Where stage hashes are kept")
+    common.add_argument("--metrics", default="data/metrics/metrics.jsonl", help="JSONL file for per-stage metrics ('' = off)")
+    common.add_argument("--profile", nargs="*", default=None,
+                        help="cProfile + tracemalloc dumps for these stages (no names = every stage); runs stages serially")
+    common.add_argument("--profile-dir", default="data/metrics/profiles")
+
+    ap = argparse.ArgumentParser(description="Israeli media monitor.", allow_abbrev=False)
+    sub = ap.add_subparsers(dest="cmd", metavar="{" + ",".join(COMMANDS) + "}")
+
+    run = sub.add_parser("run", parents=[common], allow_abbrev=False, help="Run the pipeline (default)")
+    run.add_argument("--from", dest="start", nargs="+", default=None, help="Start at these stages (and run what depends on them)")
+    run.add_argument("--until", nargs="+", default=None, help="Stop after these stages (running what they need first)")
+    run.add_argument("--only", nargs="+", default=None, help="Run exactly these stages")
+    run.add_argument("--force", action="store_true", help="Ignore the cache and rerun every selected stage")
+    run.add_argument("--dry-run", action="store_true", help="Only print what would run")
+    run.add_argument("--workers", type=int, default=4, help="Max stages running at the same time")
+    run.add_argument("--list", action="store_true", help="List stages and their last status")
+    run.add_argument("--cluster-args", nargs=argparse.REMAINDER, default=[],
+                     help="Everything after this goes to analysis/group_similar.py")
+
+    scrape = sub.add_parser("scrape", parents=[common], allow_abbrev=False, help="Run the scrapers")
+    scrape.add_argument("sources", nargs="*", metavar="{" + ",".join(SCRAPE_STAGES) + "}",
+                        help="Which scrapers (default: all)")
+    scrape.add_argument("--workers", type=int, default=4, help="Scrapers running at the same time")
+    sub.add_parser("adapt", parents=[common], allow_abbrev=False, help="Adapt raw Channel 14 files")
+    sub.add_parser("preprocess", parents=[common], allow_abbrev=False, help="Build data/processed/combined_*.json")
+    sub.add_parser("cluster", parents=[common], allow_abbrev=False,
+                   help="Group similar articles; other flags go to analysis/group_similar.py")
+
+    report = sub.add_parser("report", allow_abbrev=False, help="Summarize the latest clustering run")
+    report.add_argument("--clustered-dir", default="data/clustered")
+    report.add_argument("--run", default=None, help="Run folder (default: newest under --clustered-dir)")
+    report.add_argument("--top", type=int, default=10, help="Biggest clusters to show")
+    report.add_argument("--metrics", default="data/metrics/metrics.jsonl")
+
+    worker = sub.add_parser("worker", allow_abbrev=False, help="Long-running worker with a local control socket")
+    worker.add_argument("--ctl", choices=["status", "poll", "refit", "refresh", "stop"], default=None,
+                        help="Send a command to a running worker instead of starting one")
+    worker.add_argument("--port", type=int, default=8765, help="Control socket port (127.0.0.1)")
+    worker.add_argument("--interval", type=float, default=300, help="Seconds between scrape cycles")
+    worker.add_argument("--polls", type=int, default=None, help="Exit after this many cycles (default: run until stopped)")
+    worker.add_argument("--threshold", type=float, default=0.83, help="Same meaning as group_similar --threshold")
+    worker.add_argument("--window-hours", type=float, default=48, help="Articles kept in memory for matching")
+    worker.add_argument("--refit-every", type=int, default=500, help="Rerun batch linkage after this many new articles")
+    worker.add_argument("--processed-dir", default="data/processed")
+    worker.add_argument("--out-dir", default="data/worker", help="Folder for assignments_<date>.jsonl")
+    worker.add_argument("--metrics", default="data/metrics/metrics.jsonl", help="JSONL file for per-cycle metrics ('' = off)")
+
+    # migrate / compact take their flags from the modules themselves (both stdlib-only imports)
+    from adapters.common.storage import build_parser as add_migrate_arguments
+    from pipeline.compact import add_arguments as add_compact_arguments
+
+    add_migrate_arguments(sub.add_parser("migrate", allow_abbrev=False, help="Convert data files to compressed JSONL"))
+    add_compact_arguments(sub.add_parser("compact", allow_abbrev=False,
+                                         help="Merge closed days into monthly partitions and prune old clustering runs"))
+
+    # same flags as analysis.search_index.add_query_arguments, repeated because importing
+    # that module loads numpy; test_query_parser_matches_search_index keeps the two in step
+    query = sub.add_parser("query", allow_abbrev=False, help="Search the article index")
+    query.add_argument("text", nargs="+", help="Words to look for (all of them, see --any)")
+    query.add_argument("--index-dir", default="data/index")
+    query.add_argument("--from", dest="date_from", default=None, help="Published on/after YYYY-MM-DD")
+    query.add_argument("--to", dest="date_to", default=None, help="Published on/before YYYY-MM-DD")
+    query.add_argument("--days", type=int, default=None, help="Last N days (counting --to or today)")
+    query.add_argument("--source", nargs="+", default=None, help="Only these sources (n12 c14 ...)")
+    query.add_argument("--limit", type=int, default=20, help="Articles to show")
+    query.add_argument("--per-source", type=int, default=None, help="Show up to N articles per source instead")
+    query.add_argument("--any", action="store_true", help="Match any word instead of all")
+    query.add_argument("--json", action="store_true", help="Print the result as JSON")
 
-    print("-------------- Scraping --------------")
-    try:
-        get_n12_rss_headlines()
-    except Exception as e:
-        print(f"Failed to scrape N12: {e}")
-    try:
-        get_c14_headlines()
-    except Exception as e:
-        print(f"Failed to scrape Channel 14: {e}")
-    print("-------------- Scraping Complete --------------")
-
-    print("-------------- Adapting --------------")
-    # Adapters
-    try:
-        print("Starting Channel14 adapter...")
-        c14_adapter_main()
-    except Exception as e:
-        print(f"Channel14 adapter failed: {e}")
-    print("-------------- Adapting Complete --------------")
-
-    print("-------------- Preprocessing --------------")
-    try:
-        print("Starting preprocessing...")
-        preprocess_main()
-    except Exception as e:
-        print(f"Preprocessing failed: {e}")
-    print("-------------- Preprocessing Complete --------------")
-
-    # try:
-    #     print("Starting grouping similar articles...")
-    #     group_similar_main()
-    # except Exception as e:
-    #     print(f"Grouping failed: {e}")
-    # print("Grouping completed.")
+    serve = sub.add_parser("serve", allow_abbrev=False, help="Local read-only HTTP API over runs + search index")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8766)
+    serve.add_argument("--clustered-dir", default="data/clustered")
+    serve.add_argument("--index-dir", default="data/index")
+    serve.add_argument("--cache-size", type=int, default=256, help="Cached responses (LRU)")
+    serve.add_argument("--ttl", type=float, default=300, help="Seconds a cached response may be reused")
+    serve.add_argument("--verbose", action="store_true", help="Log every request")
+    return ap
 
 
+def run_pipeline(args, cluster_args=(), only=None, force=False, workers=4):
+    from pipeline import Pipeline, default_stages
 
+    profile = None if args.profile is None else (args.profile or True)
+    pipe = Pipeline(default_stages(cluster_args), state_dir=args.state_dir, workers=workers,
+                    metrics_path=args.metrics or None, profile=profile, profile_dir=args.profile_dir)
+    if getattr(args, "list", False):
+        for lvl in pipe.levels:
+            for n in lvl:
+                s, st = pipe.stages[n], pipe.state.get(n) or {}
+                flag = "" if s.enabled else " (off by default)"
+                print(f"{n:12s} deps={','.join(s.deps) or '-':22s} last={st.get('status', '-')} {st.get('finished', '')}{flag}")
+        return {}
+
+    names = pipe.select(start=getattr(args, "start", None), until=getattr(args, "until", None), only=only)
+    print(f"-------------- Pipeline: {' -> '.join(names)} --------------")
+    report = pipe.run(names, force=force, dry_run=getattr(args, "dry_run", False))
+    failed = [n for n, r in report.items() if r["status"] == "failed"]
+    for n, r in report.items():
+        m = r.get("metrics") or {}
+        if m:
+            print(f"[INFO] {n}: wall {m.get('wall_s')}s cpu {m.get('cpu_s')}s peak RSS {m.get('peak_rss_mb')}MB "
+                  f"records {m.get('records_in', '-')}->{m.get('records_out', '-')}")
+    print(f"-------------- Pipeline Complete ({len(report) - len(failed)}/{len(report)} ok) --------------")
+    return report
+
+
+def latest_run(clustered_dir) -> Path | None:
+    runs = sorted(p.parent for p in Path(clustered_dir).glob("*/clusters_summary.csv"))
+    return runs[-1] if runs else None
+
+
+def show_report(args) -> dict:
+    """Print the biggest clusters of a run and the last metrics line per stage (stdlib only)."""
+    run_dir = Path(args.run) if args.run else latest_run(args.clustered_dir)
+    out = {"run": str(run_dir) if run_dir else None, "clusters": [], "stages": {}}
+    if run_dir is None or not (run_dir / "clusters_summary.csv").exists():
+        print(f"[WARN] No clustering run found under {args.clustered_dir}")
+    else:
+        with (run_dir / "clusters_summary.csv").open(encoding="utf-8-sig", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        rows.sort(key=lambda r: -int(r.get("cluster_size") or 0))
+        out["clusters"] = rows[:args.top]
+        multi = sum(1 for r in rows if int(r.get("cluster_size") or 0) > 1)
+        print(f"@@@@@@@@@@@@@@@@@@@ -- {run_dir.name} -- @@@@@@@@@@@@@@@@@@@@@@")
+        print(f"Clusters: {len(rows)} ({multi} with 2+ articles)\n")
+        for r in out["clusters"]:
+            print(f"  [{r.get('cluster_size')}] {r.get('sources', '')}: {r.get('example_title', '')}")
+            if r.get("top_terms"):
+                print(f"       {r['top_terms']}")
+
+    metrics = Path(args.metrics)
+    if metrics.exists():
+        with metrics.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    m = json.loads(line)
+                    out["stages"][m.get("stage")] = m
+        print("\nLast stage runs:")
+        for n, m in out["stages"].items():
+            print(f"  {n:12s} {m.get('started', '')} {m.get('status', '-'):6s} wall {m.get('wall_s')}s "
+                  f"peak RSS {m.get('peak_rss_mb')}MB records {m.get('records_in', '-')}->{m.get('records_out', '-')}")
+    return out
+
+
+def run_worker(args):
+    if args.ctl:
+        from pipeline.worker import send_command
+        reply = send_command(args.ctl, port=args.port)
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
+        return reply
+
+    from pipeline.worker import Worker
+    w = Worker(processed_dir=args.processed_dir, out_dir=args.out_dir, threshold=args.threshold,
+               window_hours=args.window_hours, refit_every=args.refit_every, metrics_path=args.metrics or None)
+    w.load_window()
+    w.serve(port=args.port, interval=args.interval, max_polls=args.polls)
+    return w.status()
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["run", *argv]                    # old style: `python main.py --from preprocess`
+    ap = build_parser()
+    args, extra = ap.parse_known_args(argv)
+    if extra and args.cmd != "cluster":
+        ap.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.cmd == "run":
+        return run_pipeline(args, cluster_args=args.cluster_args, only=args.only, force=args.force,
+                            workers=args.workers)
+    if args.cmd == "scrape":
+        unknown = [s for s in args.sources if s not in SCRAPE_STAGES]
+        if unknown:
+            ap.error(f"unknown source(s) {unknown}; choose from {', '.join(SCRAPE_STAGES)}")
+        stages = [SCRAPE_STAGES[s] for s in (args.sources or SCRAPE_STAGES)]
+        return run_pipeline(args, only=stages, force=True, workers=args.workers)
+    if args.cmd in ("adapt", "preprocess"):
+        return run_pipeline(args, only=["adapt_c14" if args.cmd == "adapt" else args.cmd], force=True)
+    if args.cmd == "cluster":
+        return run_pipeline(args, cluster_args=extra, only=["cluster"], force=True)
+    if args.cmd == "worker":
+        return run_worker(args)
+    if args.cmd == "migrate":
+        from adapters.common import storage
+        return storage.migrate(args.paths, to=args.to, keep=args.keep, dry_run=args.dry_run)
+    if args.cmd == "compact":
+        from pipeline.compact import run as run_compact
+        return run_compact(args)
+    if args.cmd == "query":
+        from analysis.search_index import run_query
+        return run_query(args)
+    if args.cmd == "serve":
+        from pipeline.service import serve
+        return serve(args.host, args.port, clustered_dir=args.clustered_dir, index_dir=args.index_dir,
+                     cache_size=args.cache_size, ttl=args.ttl, verbose=args.verbose)
+    return show_report(args)
+
+
+if __name__ == "__main__":
+    main()
 
 
 # main flow on terminal:
-# python scraping/scrape_all.py         # to scrape all channels    # implement that later
-# python analysis/preprocessing.py
-# python analysis/group_similar.py
+# python main.py                        # scrape + adapt + preprocess (cached where possible)
+# python main.py run --until cluster    # ... and group similar articles
+# python main.py report
 # python analysis/test_group_similar.py
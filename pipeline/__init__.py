@@ -0,0 +1,4 @@
+from pipeline.runner import Pipeline, Stage
+from pipeline.stages import default_stages
+
+__all__ = ["Pipeline", "Stage", "default_stages"]
@@ -0,0 +1,214 @@
+# pipeline/compact.py
+"""
+Archive housekeeping: closed days -> monthly partitions, old clustering runs -> gone.
+
+data/processed/ gets one combined_<date> file per day forever, and every loader
+lists the folder, opens the files it needs and parses each one whole. Days older
+than --open-days don't change any more (scrapers only write today's files), so
+they're merged into one columnar file per month (adapters/common/partition.py):
+
+    combined_2025-08-01.jsonl.gz ... combined_2025-08-31.jsonl.gz  ->  combined_2025-08.partition
+
+with a footer index (day -> row range, source -> row range, column chunk offsets).
+A window read decompresses only the days and columns it asks for.
+load_articles / streaming_tfidf read partitions and daily files side by side
+(adapters.common.day_files.select_parts); a daily file wins over the same day in a
+partition. Each month is written to a temp file, read back and compared with the
+daily files before anything is deleted; an existing partition gets the new days merged in.
+
+Clustering runs (data/clustered/<YYYY-MM-DD_HH-MM-SS>/) pile up at one per cron
+run. prune_runs keeps the last --keep-runs, the last run of each day for
+--daily-days, and the last run of each older month; data/clustered/lineage is never touched.
+
+    python main.py compact                         # compact + prune
+    python main.py compact --dry-run
+    python -m pipeline.compact --open-days 7 --keep-runs 10 --no-prune
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from adapters.common.partition import iter_partition_records, partition_path, write_partition
+from adapters.common.storage import base_name, data_files, read_records
+
+RUN_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})_\d{2}-\d{2}-\d{2}$")     # cluster_output.save_cluster_outputs
+
+
+def _today(today) -> date:
+    if today is None:
+        return date.today()
+    return date.fromisoformat(today) if isinstance(today, str) else today
+
+
+def _daily_files(processed_dir, prefix: str) -> Dict[str, List[Path]]:
+    """{"2025-08-01": [combined_2025-08-01.jsonl.gz]} (a day can have stray copies in two formats)."""
+    pat = re.compile(rf"^{re.escape(prefix)}_(\d{{4}}-\d{{2}}-\d{{2}})$")
+    out: Dict[str, List[Path]] = {}
+    for f in data_files(processed_dir, prefix + "_"):
+        m = pat.match(base_name(f))
+        if m:
+            out.setdefault(m.group(1), []).append(f)
+    return out
+
+
+def _by_source(recs: list) -> list:
+    return sorted(recs, key=lambda r: "" if r.get("source") is None else str(r.get("source")))
+
+
+def compact_month(processed_dir, prefix: str, month: str, day_files: Dict[str, List[Path]],
+                  keep: bool = False) -> dict:
+    """Merge these daily files into <prefix>_<month>.partition; verified before the files go."""
+    target = partition_path(processed_dir, prefix, month)
+    days: Dict[str, list] = {}
+    bytes_before = 0
+    if target.exists():
+        bytes_before += target.stat().st_size
+        for rec in iter_partition_records(target, day_key="_day"):
+            days.setdefault(rec.pop("_day"), []).append(rec)
+    fresh: Dict[str, list] = {}
+    for day, files in day_files.items():
+        newest = max(files, key=lambda f: f.stat().st_mtime)
+        if len(files) > 1:
+            print(f"[WARN] {day}: {len(files)} daily files, using {newest.name}")
+        fresh[day] = read_records(newest)                  # a daily file replaces that day in the partition
+        bytes_before += sum(f.stat().st_size for f in files)
+    days.update(fresh)
+
+    tmp = target.with_name(f".{target.name}.new")
+    try:
+        footer = write_partition(tmp, days)
+        for day, recs in fresh.items():                    # read back before deleting anything
+            if list(iter_partition_records(tmp, days=[day])) != _by_source(recs):
+                raise RuntimeError(f"read-back mismatch for {day}; nothing deleted")
+        if footer["rows"] != sum(len(r) for r in days.values()):
+            raise RuntimeError(f"row count mismatch for {month}; nothing deleted")
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    if not keep:
+        for files in day_files.values():
+            for f in files:
+                f.unlink()
+    return {"partition": str(target), "days": len(fresh), "records": sum(len(r) for r in fresh.values()),
+            "bytes_before": bytes_before, "bytes_after": target.stat().st_size}
+
+
+def compact(processed_dir="data/processed", prefix: str = "combined", open_days: int = 2, today=None,
+            keep: bool = False, dry_run: bool = False) -> dict:
+    """
+    Every daily file at least open_days old (today and yesterday stay open with the
+    default) -> its month's partition. Returns totals.
+    """
+    cutoff = (_today(today) - timedelta(days=open_days)).isoformat()
+    closed = {d: fs for d, fs in _daily_files(processed_dir, prefix).items() if d <= cutoff}
+    months: Dict[str, Dict[str, List[Path]]] = {}
+    for day, files in sorted(closed.items()):
+        months.setdefault(day[:7], {})[day] = files
+
+    total = {"months": 0, "days": 0, "records": 0, "bytes_before": 0, "bytes_after": 0}
+    for month, day_files in months.items():
+        if dry_run:
+            print(f"[INFO] would compact {len(day_files)} days -> {partition_path(processed_dir, prefix, month).name}")
+            total["months"] += 1
+            total["days"] += len(day_files)
+            continue
+        try:
+            r = compact_month(processed_dir, prefix, month, day_files, keep=keep)
+        except Exception as e:
+            print(f"[WARN] {month}: {e}")
+            continue
+        total["months"] += 1
+        for k in ("days", "records", "bytes_before", "bytes_after"):
+            total[k] += r[k]
+        print(f"[INFO] {month}: {r['days']} days ({r['records']} records) -> {Path(r['partition']).name}")
+    if total["months"] and not dry_run:
+        print(f"[INFO] Compacted {total['days']} days into {total['months']} partitions: "
+              f"{total['bytes_before'] / 2**20:.1f} MB -> {total['bytes_after'] / 2**20:.1f} MB")
+    elif not total["months"]:
+        print(f"[INFO] Nothing to compact in {processed_dir} (no closed days before {cutoff})")
+    return total
+
+
+def _dir_bytes(p: Path) -> int:
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+
+
+def prune_runs(clustered_dir="data/clustered", keep_last: int = 5, daily_days: int = 30, monthly: bool = True,
+               today=None, dry_run: bool = False) -> dict:
+    """
+    Retention for data/clustered/<run>/ folders:
+      - the newest keep_last runs
+      - the last run of each day in the last daily_days days
+      - the last run of each month before that (monthly=True)
+    Folders that aren't named like a run (lineage/, anything by hand) are left alone.
+    """
+    root = Path(clustered_dir)
+    runs = sorted(p for p in root.iterdir() if p.is_dir() and RUN_NAME.match(p.name)) if root.is_dir() else []
+    since = (_today(today) - timedelta(days=daily_days)).isoformat()
+    keep = set(runs[-keep_last:]) if keep_last > 0 else set()
+    last_of: Dict[str, Path] = {}
+    for r in runs:                                       # sorted -> the last one per bucket wins
+        day = RUN_NAME.match(r.name).group(1)
+        if day >= since:
+            last_of["d" + day] = r
+        elif monthly:
+            last_of["m" + day[:7]] = r
+    keep.update(last_of.values())
+
+    out = {"runs": len(runs), "kept": len(keep), "removed": 0, "bytes": 0}
+    for r in runs:
+        if r in keep:
+            continue
+        size = _dir_bytes(r)
+        if dry_run:
+            print(f"[INFO] would remove {r}")
+        else:
+            shutil.rmtree(r)
+        out["removed"] += 1
+        out["bytes"] += size
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"[INFO] {verb} {out['removed']} of {len(runs)} clustering runs ({out['bytes'] / 2**20:.1f} MB), kept {len(keep)}")
+    return out
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    ap.add_argument("--processed-dir", default="data/processed")
+    ap.add_argument("--prefix", default="combined", help="Daily files are <prefix>_<date>.*")
+    ap.add_argument("--open-days", type=int, default=2, help="Days (counting today) that stay as daily files")
+    ap.add_argument("--today", default=None, help="YYYY-MM-DD (default: today)")
+    ap.add_argument("--keep", action="store_true", help="Keep the daily files after compacting")
+    ap.add_argument("--clustered-dir", default="data/clustered")
+    ap.add_argument("--keep-runs", type=int, default=5, help="Always keep the newest N clustering runs")
+    ap.add_argument("--daily-days", type=int, default=30, help="Keep the last run of each day for this many days")
+    ap.add_argument("--no-monthly", action="store_true", help="Don't keep a run per month beyond --daily-days")
+    ap.add_argument("--no-compact", action="store_true", help="Only prune clustering runs")
+    ap.add_argument("--no-prune", action="store_true", help="Only compact processed files")
+    ap.add_argument("--dry-run", action="store_true", help="Only print what would happen")
+    return ap
+
+
+def run(args) -> dict:
+    out = {}
+    if not args.no_compact:
+        out["compact"] = compact(args.processed_dir, prefix=args.prefix, open_days=args.open_days, today=args.today,
+                                 keep=args.keep, dry_run=args.dry_run)
+    if not args.no_prune:
+        out["prune"] = prune_runs(args.clustered_dir, keep_last=args.keep_runs, daily_days=args.daily_days,
+                                  monthly=not args.no_monthly, today=args.today, dry_run=args.dry_run)
+    return out
+
+
+def main(argv=None):
+    ap = add_arguments(argparse.ArgumentParser(description="Compact closed days into monthly partitions; prune old clustering runs."))
+    return run(ap.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
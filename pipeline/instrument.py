@@ -0,0 +1,207 @@
+# pipeline/instrument.py
+"""
+Per-stage metrics for the pipeline.
+
+    with measure("preprocess", metrics_path="data/metrics/metrics.jsonl", run_id=rid) as m:
+        preprocess_main()
+
+appends one JSON line per stage:
+
+    {"run_id", "stage", "status", "started", "wall_s", "cpu_s", "peak_rss_mb", "rss_source",
+     "records_in", "records_out", "bytes_read", "bytes_written", "spans": {name: seconds}, ...}
+
+Entry points report their own numbers through the module-level helpers, which
+are no-ops when nothing is being measured (so scripts run standalone unchanged):
+
+    count("records_in", len(records))
+    with span("json_write"):
+        json.dump(...)
+
+Peak RSS: psutil when installed (RSS sampled every 20ms while the stage runs),
+else resource.ru_maxrss (the process high-water mark, so it never goes down
+between stages), else None. Bytes read/written come from psutil io_counters or
+/proc/self/io. cpu_s, bytes and ru_maxrss are process-wide: with stages
+running concurrently they include the neighbours.
+
+profile_dir=... also writes <run_id>_<stage>.prof (cProfile; open with
+`python -m pstats` or snakeviz) and <run_id>_<stage>.tracemalloc.txt (top
+allocation sites). Profiling should run stages one at a time, main.py does that.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:  # optional
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+_current: contextvars.ContextVar = contextvars.ContextVar("pipeline_stage_metrics", default=None)
+_write_lock = threading.Lock()
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y-%m-%d_%H-%M-%S") + f"_{os.getpid()}"
+
+
+def count(key: str, n) -> None:
+    """Add n to a counter (records_in, records_out, ...) of the stage being measured."""
+    m = _current.get()
+    if m is not None and n is not None:
+        m[key] = m.get(key, 0) + n
+
+
+@contextmanager
+def span(name: str):
+    """Time a block inside the current stage; repeated spans add up, nested ones are counted in both."""
+    m = _current.get()
+    if m is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans = m.setdefault("spans", {})
+        spans[name] = round(spans.get(name, 0.0) + time.perf_counter() - t0, 4)
+
+
+def _io_bytes():
+    """(read, written) bytes of this process so far, or (None, None)."""
+    if psutil is not None:
+        try:
+            io = psutil.Process().io_counters()
+            return getattr(io, "read_chars", io.read_bytes), getattr(io, "write_chars", io.write_bytes)
+        except (AttributeError, psutil.Error):
+            pass
+    try:
+        fields = dict(line.split(":") for line in Path("/proc/self/io").read_text().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _maxrss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10     # bytes on macOS, KB on Linux
+
+
+class _RssSampler:
+    """Background thread keeping the max RSS seen (psutil only)."""
+
+    def __init__(self, interval: float = 0.02):
+        self.proc = psutil.Process()
+        self.peak = self.proc.memory_info().rss
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.proc.memory_info().rss)
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.proc.memory_info().rss)
+        return self.peak / 2**20
+
+
+def _delta(a, b):
+    return None if a is None or b is None else b - a
+
+
+@contextmanager
+def measure(stage: str, metrics_path=None, run_id: Optional[str] = None, profile_dir=None):
+    """Measure the block as one stage; yields the metrics dict (counters may be added directly)."""
+    m = {"run_id": run_id or new_run_id(), "stage": stage,
+         "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    token = _current.set(m)
+    sampler = _RssSampler() if psutil is not None else None
+    prof, own_trace = None, False
+    if profile_dir is not None:
+        import cProfile, tracemalloc            # only when profiling
+        prof = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            own_trace = True
+    r0, w0 = _io_bytes()
+    t0, c0 = time.perf_counter(), time.process_time()
+    if prof is not None:
+        prof.enable()
+    try:
+        yield m
+        m["status"] = "ok"
+    except BaseException as e:
+        m["status"], m["error"] = "failed", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if prof is not None:
+            prof.disable()
+        m["wall_s"] = round(time.perf_counter() - t0, 4)
+        m["cpu_s"] = round(time.process_time() - c0, 4)
+        r1, w1 = _io_bytes()
+        m["bytes_read"], m["bytes_written"] = _delta(r0, r1), _delta(w0, w1)
+        if sampler is not None:
+            m["peak_rss_mb"], m["rss_source"] = round(sampler.stop(), 1), "psutil"
+        else:
+            peak = _maxrss_mb()
+            m["peak_rss_mb"] = round(peak, 1) if peak is not None else None
+            m["rss_source"] = "ru_maxrss" if peak is not None else None
+        if prof is not None:
+            _dump_profiles(m, prof, Path(profile_dir), own_trace)
+        _current.reset(token)
+        if metrics_path is not None:
+            write_metrics(m, metrics_path)
+
+
+def _dump_profiles(m: dict, prof, profile_dir: Path, own_trace: bool) -> None:
+    import tracemalloc
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    base = profile_dir / f"{m['run_id']}_{m['stage']}"
+    prof.dump_stats(str(base) + ".prof")
+    m["profile"] = str(base) + ".prof"
+    if own_trace:
+        snap = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = [f"# {m['stage']}: traced peak {peak / 2**20:.1f} MB, top allocation sites"]
+        lines += [str(stat) for stat in snap.statistics("lineno")[:25]]
+        Path(str(base) + ".tracemalloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        m["tracemalloc"] = str(base) + ".tracemalloc.txt"
+        m["traced_peak_mb"] = round(peak / 2**20, 2)
+
+
+def write_metrics(m: dict, metrics_path) -> None:
+    path = Path(metrics_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _write_lock, path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(m, ensure_ascii=False, default=str) + "\n")
+
+
+def instrumented(stage: str, **measure_kwargs):
+    """Decorator form of measure()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with measure(stage, **measure_kwargs):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
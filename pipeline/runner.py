@@ -0,0 +1,276 @@
+# pipeline/runner.py
+"""
+Small DAG runner for main.py.
+
+A Stage declares what it reads and writes:
+
+    Stage("preprocess", "analysis.preprocessing:main",
+          inputs=["data/raw/n12_rss_*.json", "data/adapted/c14_adapted_*.json"],
+          outputs=["data/processed/combined_*.json"],
+          deps=["scrape_n12", "adapt_c14"],
+          code=["analysis.text_norm"])
+
+Before running a stage the runner computes its key:
+  sha256( content hash of every input file
+        + source of the target module and of `code` modules (the code version)
+        + kwargs )
+If the key equals the one stored after the last successful run and every
+output pattern still matches a file, the stage is skipped. File digests are
+memoized by (size, mtime) in the state file, so unchanged inputs are not
+re-read. Stages with always=True (scrapers: their input is the network) run
+every time they are selected.
+
+Targets are "module:function" strings imported only when the stage runs, so
+a cached or unselected stage never imports its heavy dependencies.
+
+Stages whose deps are done run together: each topological level goes through
+a thread pool (scrapers are network bound, adapters are small). A failing stage
+is reported and the run goes on, like the old try/except blocks in main.py;
+downstream stages see whatever inputs exist.
+
+State: <state_dir>/state.json  {stage: {key, status, seconds, finished}, "_files": {path: [size, mtime, digest]}}
+
+Every stage that runs is wrapped in pipeline.instrument.measure(): with
+metrics_path set, one JSONL line per stage (wall/cpu, peak RSS, records and
+bytes in/out); profile=[names] (or True for all) adds cProfile/tracemalloc dumps.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from pipeline.instrument import measure, new_run_id
+
+Target = Union[str, Callable]
+
+
+class Stage:
+    def __init__(self, name: str, target: Target, inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+                 deps: Sequence[str] = (), code: Sequence[str] = (), kwargs: Optional[dict] = None,
+                 always: bool = False, enabled: bool = True):
+        self.name = name
+        self.target = target
+        self.inputs = list(inputs)        # glob patterns, content-hashed
+        self.outputs = list(outputs)      # glob patterns that must exist for a skip
+        self.deps = list(deps)            # upstream stage names (ordering)
+        self.code = list(code)            # extra modules that count as this stage's code
+        self.kwargs = dict(kwargs or {})
+        self.always = always              # no cache (e.g. network scrapers)
+        self.enabled = enabled            # False = only runs when asked for by name
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+    def resolve(self) -> Callable:
+        if callable(self.target):
+            return self.target
+        mod, _, fn = self.target.partition(":")
+        return getattr(importlib.import_module(mod), fn or "main")
+
+
+def _module_source(name: str) -> bytes:
+    """Source bytes of a module without importing it (b'' when it can't be found)."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return b""
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return b""
+    return Path(spec.origin).read_bytes()
+
+
+def code_hash(stage: Stage) -> str:
+    h = hashlib.sha256()
+    if callable(stage.target):
+        import inspect                          # only test/callable stages need it; keeps CLI startup lean
+        try:
+            h.update(inspect.getsource(stage.target).encode("utf-8"))
+        except (OSError, TypeError):
+            h.update(repr(stage.target).encode("utf-8"))
+    else:
+        h.update(stage.target.encode("utf-8"))
+        h.update(_module_source(stage.target.partition(":")[0]))
+    for m in stage.code:
+        h.update(m.encode("utf-8"))
+        h.update(_module_source(m))
+    return h.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, stages: Iterable[Stage], state_dir="data/.pipeline", workers: int = 4,
+                 metrics_path=None, profile=None, profile_dir="data/metrics/profiles"):
+        self.stages: Dict[str, Stage] = {}
+        for s in stages:
+            if s.name in self.stages:
+                raise ValueError(f"Duplicate stage {s.name!r}")
+            self.stages[s.name] = s
+        for s in self.stages.values():
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {s.name!r} depends on unknown {missing}")
+        self.levels = self._levels()
+        self.state_path = Path(state_dir) / "state.json"
+        self.state = json.loads(self.state_path.read_text(encoding="utf-8")) if self.state_path.exists() else {}
+        self.workers = max(1, workers)
+        self.metrics_path = metrics_path
+        self.profile = profile              # None/False, True (every stage) or a list of stage names
+        self.profile_dir = profile_dir
+        self.run_id = new_run_id()
+
+    # --- graph ---
+    def _levels(self) -> List[List[str]]:
+        """Topological levels (Kahn); stages inside a level don't depend on each other."""
+        indeg = {n: len(s.deps) for n, s in self.stages.items()}
+        children: Dict[str, List[str]] = {n: [] for n in self.stages}
+        for n, s in self.stages.items():
+            for d in s.deps:
+                children[d].append(n)
+        level = [n for n in self.stages if indeg[n] == 0]
+        levels, seen = [], 0
+        while level:
+            levels.append(level)
+            seen += len(level)
+            nxt = []
+            for n in level:
+                for c in children[n]:
+                    indeg[c] -= 1
+                    if indeg[c] == 0:
+                        nxt.append(c)
+            level = nxt
+        if seen != len(self.stages):
+            raise ValueError("Pipeline has a dependency cycle")
+        return levels
+
+    def _closure(self, names: Iterable[str], down: bool) -> set:
+        out, todo = set(), list(names)
+        while todo:
+            n = todo.pop()
+            if n in out:
+                continue
+            out.add(n)
+            if down:
+                todo += [c for c, s in self.stages.items() if n in s.deps]
+            else:
+                todo += self.stages[n].deps
+        return out
+
+    def select(self, start: Optional[Sequence[str]] = None, until: Optional[Sequence[str]] = None,
+               only: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        only  : exactly these stages
+        start : these stages + everything downstream (--from)
+        until : these stages + everything upstream (--until); both -> the part in between.
+        Disabled stages are dropped unless named explicitly.
+        """
+        named = set(only or []) | set(start or []) | set(until or [])
+        for n in named:
+            if n not in self.stages:
+                raise ValueError(f"Unknown stage {n!r}; stages: {', '.join(self.stages)}")
+        if only:
+            chosen = set(only)
+        else:
+            chosen = set(self.stages)
+            if start:
+                chosen &= self._closure(start, down=True)
+            if until:
+                chosen &= self._closure(until, down=False)
+        return [n for lvl in self.levels for n in lvl if n in chosen and (self.stages[n].enabled or n in named)]
+
+    # --- cache ---
+    def _file_digest(self, path: str) -> str:
+        st = os.stat(path)
+        memo = self.state.setdefault("_files", {})
+        hit = memo.get(path)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        memo[path] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return memo[path][2]
+
+    def stage_key(self, s: Stage) -> str:
+        h = hashlib.sha256()
+        for pattern in s.inputs:
+            for p in sorted(glob.glob(pattern)):
+                h.update(p.encode("utf-8"))
+                h.update(self._file_digest(p).encode("ascii"))
+        h.update(code_hash(s).encode("ascii"))
+        h.update(json.dumps(s.kwargs, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def is_fresh(self, s: Stage, key: str) -> bool:
+        prev = self.state.get(s.name) or {}
+        return (not s.always and prev.get("status") == "ok" and prev.get("key") == key
+                and all(glob.glob(p) for p in s.outputs))
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    # --- run ---
+    def _run_stage(self, name: str) -> dict:
+        s = self.stages[name]
+        profiled = self.profile is True or (bool(self.profile) and name in self.profile)
+        t0, m = time.perf_counter(), {}
+        try:
+            with measure(name, metrics_path=self.metrics_path, run_id=self.run_id,
+                         profile_dir=self.profile_dir if profiled else None) as m:
+                s.resolve()(**s.kwargs)
+            status, err = "ok", None
+        except (Exception, SystemExit) as e:    # SystemExit from an argparse main counts as a failure too;
+            # Ctrl-C propagates, so the next run resumes from the state saved after the last level
+            status, err = "failed", f"{type(e).__name__}: {e}"
+        return {"status": status, "error": err, "seconds": round(time.perf_counter() - t0, 3), "metrics": m}
+
+    def run(self, names: Optional[Sequence[str]] = None, force: bool = False, dry_run: bool = False) -> Dict[str, dict]:
+        names = list(names) if names is not None else self.select()
+        chosen = set(names)
+        report: Dict[str, dict] = {}
+        for lvl in self.levels:
+            todo, keys = [], {}
+            for n in lvl:
+                if n not in chosen:
+                    continue
+                s = self.stages[n]
+                keys[n] = self.stage_key(s)         # inputs are final once the level before finished
+                if not force and self.is_fresh(s, keys[n]):
+                    report[n] = {"status": "cached", "seconds": 0.0}
+                    print(f"[INFO] {n}: up to date, skipped")
+                elif dry_run:
+                    report[n] = {"status": "would-run", "seconds": 0.0}
+                    print(f"[INFO] {n}: would run")
+                else:
+                    todo.append(n)
+            if not todo:
+                continue
+            print(f"-------------- {' | '.join(todo)} --------------")
+            if len(todo) == 1 or self.workers == 1 or self.profile:     # profilers are per process
+                results = [self._run_stage(n) for n in todo]
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(todo))) as ex:
+                    results = list(ex.map(self._run_stage, todo))
+            for n, r in zip(todo, results):
+                report[n] = r
+                if r["status"] == "ok":
+                    self.state[n] = {"key": keys[n],
+                                     "status": "ok", "seconds": r["seconds"],
+                                     "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    print(f"[INFO] {n}: done in {r['seconds']}s")
+                else:
+                    self.state[n] = {"key": None, "status": "failed", "error": r["error"],
+                                     "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    print(f"[WARN] {n} failed: {r['error']}")
+            self._save_state()
+        return report
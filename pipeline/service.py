@@ -0,0 +1,375 @@
+# pipeline/service.py
+"""
+Read-only local HTTP service over the clustering runs and the search index,
+so nobody has to open data/clustered/<timestamp>/ folders by hand.
+
+    GET /health
+    GET /runs                                   clustering runs, newest first
+    GET /clusters/latest?top=20&min_size=2&source=n12
+    GET /clusters/<cluster>?run=<run>           summary row + event id + every article
+    GET /outlets?q=&days=7                      per-outlet coverage: latest run, or the
+                                                search index when q is given
+    GET /search?q=עזה&days=7&source=n12,c14&per_source=5&limit=20&any=1
+    (every endpoint takes ?run=<name>; default is the newest run)
+
+JSON only, stdlib only (http.server.ThreadingHTTPServer + csv), bound to
+127.0.0.1. Responses are cached in-process (LRU with a TTL) by path + query.
+The cache is cleared as soon as a new clustering run lands, the newest run's
+files change (group_similar writes cluster_events.csv after clusters_summary.csv)
+or the search index changes. All of it is checked on every request (one
+directory listing + a few stats), so a cached answer is never older than the
+data it came from. Every
+response carries an ETag; `If-None-Match` gets a 304 without a body.
+
+    python main.py serve                        # http://127.0.0.1:8766
+    python main.py serve --port 9000 --ttl 60 --cache-size 512
+    python -m analysis.bench.bench_service      # load test against a synthetic archive
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_PORT = 8766                              # worker's control socket is 8765
+ARTICLE_FIELDS = ("source", "published", "title", "url", "record_key")
+
+
+class TTLCache:
+    """LRU dict whose entries also expire after ttl seconds. Thread-safe."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._d: "OrderedDict[tuple, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._d.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._d[key]
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._d[key] = (time.monotonic(), value)
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._d.clear()
+
+    def __len__(self):
+        return len(self._d)
+
+
+def _read_csv(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8-sig", newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+def _int(v, default=0) -> int:
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return default
+
+
+RUN_FILES = ("clusters_summary.csv", "articles.csv", "cluster_events.csv")     # what RunData reads
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class RunData:
+    """One clustering run folder, parsed once: summary rows, articles per cluster, event ids."""
+
+    def __init__(self, run_dir: Path):
+        self.name = run_dir.name
+        self.summary = _read_csv(run_dir / "clusters_summary.csv")
+        for r in self.summary:
+            r["cluster_size"] = _int(r.get("cluster_size"))
+        self.summary.sort(key=lambda r: -r["cluster_size"])
+        self.events = {r["cluster"]: r for r in _read_csv(run_dir / "cluster_events.csv")}
+        self.members: Dict[str, List[dict]] = {}
+        for r in _read_csv(run_dir / "articles.csv"):
+            self.members.setdefault(r.get("cluster", ""), []).append({k: r.get(k) for k in ARTICLE_FIELDS})
+        self.n_articles = sum(len(m) for m in self.members.values())
+
+
+class QueryService:
+    """Routing + caching, no HTTP (tests and the load test call get() directly too)."""
+
+    def __init__(self, clustered_dir="data/clustered", index_dir="data/index", cache_size: int = 256,
+                 ttl: float = 300.0):
+        self.clustered_dir = Path(clustered_dir)
+        self.index_dir = Path(index_dir)
+        self.cache = TTLCache(cache_size, ttl)
+        self._lock = threading.Lock()
+        self._gen: Optional[tuple] = None
+        self._runs: "OrderedDict[str, RunData]" = OrderedDict()
+        self._index = None
+        self.invalidations = 0
+
+    # --- what's on disk ---
+    def run_names(self) -> List[str]:
+        if not self.clustered_dir.is_dir():
+            return []
+        return sorted((p.name for p in self.clustered_dir.iterdir() if (p / "clusters_summary.csv").exists()),
+                      reverse=True)
+
+    def generation(self) -> tuple:
+        names = self.run_names()
+        m = self.index_dir / "manifest.json"
+        # the newest run may still be getting its events/articles written
+        stamp = tuple(_mtime(self.clustered_dir / names[0] / f) for f in RUN_FILES) if names else ()
+        return (names[0] if names else None, len(names), stamp, _mtime(m))
+
+    def _refresh(self):
+        gen = self.generation()
+        if gen != self._gen:
+            with self._lock:
+                if gen != self._gen:
+                    if self._gen is not None:
+                        self.invalidations += 1
+                    self._gen = gen
+                    self.cache.clear()
+                    self._runs.clear()
+                    self._index = None
+
+    def run(self, name: Optional[str] = None) -> RunData:
+        names = self.run_names()
+        name = name or (names[0] if names else None)
+        if name is None or name not in names:
+            raise LookupError(f"no clustering run {name!r} under {self.clustered_dir}" if name else
+                              f"no clustering runs under {self.clustered_dir}")
+        with self._lock:
+            data = self._runs.get(name)
+            if data is None:
+                data = self._runs[name] = RunData(self.clustered_dir / name)
+                while len(self._runs) > 3:
+                    self._runs.popitem(last=False)
+            return data
+
+    def index(self):
+        from analysis.search_index import SearchIndex
+
+        with self._lock:
+            if self._index is None:
+                if not SearchIndex.exists(self.index_dir):
+                    raise LookupError(f"no search index in {self.index_dir} (python -m analysis.search_index build)")
+                self._index = SearchIndex(self.index_dir)
+            return self._index
+
+    # --- endpoints ---
+    def ep_health(self, q):
+        return {"ok": True, "runs": len(self.run_names()), "cache": len(self.cache), "hits": self.cache.hits,
+                "misses": self.cache.misses, "invalidations": self.invalidations}
+
+    def ep_runs(self, q):
+        return {"runs": self.run_names()}
+
+    def ep_latest(self, q):
+        run = self.run(q.get("run"))
+        top, min_size = _int(q.get("top"), 20), _int(q.get("min_size"), 1)
+        want = set(filter(None, q.get("source", "").split(",")))
+        rows = []
+        for r in run.summary:
+            if r["cluster_size"] < min_size:
+                break                           # sorted by size
+            if want and not want & {s.strip() for s in (r.get("sources") or "").split(",")}:
+                continue
+            ev = run.events.get(r["cluster"], {})
+            rows.append({**r, "event_id": ev.get("event_id"), "status": ev.get("status")})
+            if len(rows) >= top:
+                break
+        return {"run": run.name, "clusters": len(run.summary), "articles": run.n_articles, "top": rows}
+
+    def ep_cluster(self, q, cluster: str):
+        run = self.run(q.get("run"))
+        row = next((r for r in run.summary if r["cluster"] == cluster), None)
+        if row is None:
+            raise LookupError(f"no cluster {cluster} in run {run.name}")
+        articles = sorted(run.members.get(cluster, []), key=lambda a: a.get("published") or "")
+        return {"run": run.name, **row, **{k: v for k, v in run.events.get(cluster, {}).items() if k != "cluster"},
+                "articles": articles}
+
+    def ep_outlets(self, q):
+        if q.get("q"):                          # coverage of one topic, from the search index
+            date_from, date_to = _window(q)
+            res = self.index().query(q["q"], date_from=date_from, date_to=date_to,
+                                     per_source=_int(q.get("per_source"), 5), any_term=bool(q.get("any")))
+            by_src: Dict[str, list] = {}
+            for h in res["hits"]:
+                by_src.setdefault(h["source"] or "", []).append(h)
+            return {"query": q["q"], "terms": res["terms"], "from": date_from, "to": date_to,
+                    "outlets": {s: {"articles": n, "latest": by_src.get(s, [])} for s, n in res["by_source"].items()},
+                    "clusters": res["clusters"]}
+        run = self.run(q.get("run"))
+        out: Dict[str, dict] = {}
+        pairs: Dict[str, int] = {}
+        for cluster, arts in run.members.items():
+            srcs = sorted({a["source"] or "" for a in arts})
+            for a in arts:
+                o = out.setdefault(a["source"] or "", {"articles": 0, "clusters": 0, "shared": 0, "exclusive": 0})
+                o["articles"] += 1
+            for s in srcs:
+                out[s]["clusters"] += 1
+                if len(srcs) > 1:
+                    out[s]["shared"] += 1
+                elif len(arts) > 1:
+                    out[s]["exclusive"] += 1     # a multi-article story only this outlet covered
+            for i, a in enumerate(srcs):
+                for b in srcs[i + 1:]:
+                    pairs[f"{a}|{b}"] = pairs.get(f"{a}|{b}", 0) + 1
+        return {"run": run.name, "outlets": dict(sorted(out.items(), key=lambda kv: -kv[1]["articles"])),
+                "shared_clusters": dict(sorted(pairs.items(), key=lambda kv: -kv[1]))}
+
+    def ep_search(self, q):
+        if not q.get("q"):
+            raise ValueError("missing ?q=")
+        date_from, date_to = _window(q)
+        sources = [s for s in q.get("source", "").split(",") if s] or None
+        return self.index().query(q["q"], date_from=date_from, date_to=date_to, sources=sources,
+                                  limit=_int(q.get("limit"), 20), per_source=_int(q.get("per_source"), 0) or None,
+                                  any_term=bool(q.get("any")))
+
+    def route(self, path: str, q: dict):
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        if parts == ["health"]:
+            return self.ep_health(q)
+        if parts == ["runs"]:
+            return self.ep_runs(q)
+        if parts == ["clusters", "latest"] or parts == ["clusters"]:
+            return self.ep_latest(q)
+        if len(parts) == 2 and parts[0] == "clusters":
+            return self.ep_cluster(q, parts[1])
+        if parts == ["outlets"]:
+            return self.ep_outlets(q)
+        if parts == ["search"]:
+            return self.ep_search(q)
+        raise FileNotFoundError(path)
+
+    def get(self, path: str, q: dict) -> Tuple[int, bytes, str, str]:
+        """(status, JSON body, ETag, "hit" / "miss") for GET path?q."""
+        self._refresh()
+        key = (path, tuple(sorted(q.items())))
+        if path.rstrip("/") != "/health":
+            cached = self.cache.get(key)
+            if cached is not None:
+                return (*cached, "hit")
+        try:
+            status, body = 200, self.route(path, q)
+        except FileNotFoundError:
+            status, body = 404, {"error": f"unknown endpoint {path}"}
+        except LookupError as e:
+            status, body = 404, {"error": str(e)}
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        raw = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        etag = '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+        if status == 200 and path.rstrip("/") != "/health":
+            self.cache.put(key, (status, raw, etag))
+        return status, raw, etag, "miss"
+
+
+def _window(q: dict) -> Tuple[Optional[str], Optional[str]]:
+    date_from, date_to = q.get("from"), q.get("to")
+    for d in (date_from, date_to):
+        if d:
+            date.fromisoformat(d)                # ValueError -> 400
+    days = _int(q.get("days"), 0)
+    if days and not date_from:
+        end = date.fromisoformat(date_to) if date_to else date.today()
+        date_from = (end - timedelta(days=days - 1)).isoformat()
+    return date_from, date_to
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "media-monitor"
+    protocol_version = "HTTP/1.1"                # keep-alive for the load test / browsers
+    disable_nagle_algorithm = True               # headers + body are two writes; without it keep-alive waits ~40 ms on ACKs
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head: bool):
+        url = urlsplit(self.path)
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        status, body, etag, state = self.server.service.get(url.path, q)
+        if status == 200 and etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")      # clients may keep it, but revalidate with the ETag
+        self.send_header("X-Cache", state)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _read_only(self):
+        self.send_response(405)
+        self.send_header("Allow", "GET, HEAD")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_POST = do_PUT = do_DELETE = do_PATCH = _read_only
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, service: QueryService, verbose: bool = False):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.verbose = verbose
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, clustered_dir="data/clustered", index_dir="data/index",
+          cache_size: int = 256, ttl: float = 300.0, verbose: bool = False):
+    service = QueryService(clustered_dir, index_dir, cache_size=cache_size, ttl=ttl)
+    server = ServiceServer((host, port), service, verbose=verbose)
+    print(f"[INFO] Serving {clustered_dir} + {index_dir} on http://{host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return service.ep_health({})
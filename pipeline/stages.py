@@ -0,0 +1,45 @@
+# pipeline/stages.py
+"""
+The stages main.py runs, in the order data flows:
+
+  scrape_n12 ─────────────────┐
+  scrape_c14 ── adapt_c14 ────┴── preprocess ── cluster (off by default)
+
+Scrapers always run (their input is the network). The others are skipped when
+their input files and code are unchanged since their last successful run.
+`cluster` needs to be asked for: `python main.py --until cluster`.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+from pipeline.runner import Stage
+
+RAW_N12 = "data/raw/n12_rss_*.json*"              # .json / .jsonl / .jsonl.gz ... (adapters/common/storage.py)
+RAW_C14 = "data/raw/c14_scraped_*.json*"
+ADAPTED_C14 = "data/adapted/c14_adapted_*.json*"
+PROCESSED = "data/processed/combined_*.json*"
+PARTITIONS = "data/processed/combined_*.partition"  # closed months (pipeline/compact.py)
+
+
+def default_stages(cluster_args: Optional[Sequence[str]] = None) -> List[Stage]:
+    return [
+        Stage("scrape_n12", "scraping.n12_scraper:get_n12_rss_headlines",
+              outputs=[RAW_N12], always=True),
+        Stage("scrape_c14", "scraping.channel14_scraper:get_c14_headlines",
+              outputs=[RAW_C14], always=True),
+        Stage("adapt_c14", "adapters.c14_adapter:main",
+              inputs=[RAW_C14], outputs=[ADAPTED_C14], deps=["scrape_c14"],
+              code=["analysis.utils.time_labels", "adapters.common.article"]),
+        Stage("preprocess", "analysis.preprocessing:main",
+              inputs=[RAW_N12, ADAPTED_C14], outputs=[PROCESSED], deps=["scrape_n12", "adapt_c14"],
+              code=["adapters.common.url_utils", "adapters.common.article", "analysis.text_norm",
+                    "analysis.token_cache", "analysis.dataframe_hygiene", "adapters.common.partition",
+                    "analysis.search_index"]),
+        Stage("cluster", "analysis.group_similar:main",
+              inputs=[PROCESSED, PARTITIONS], outputs=["data/clustered/*/clusters_summary.csv"], deps=["preprocess"],
+              code=["analysis.vectorize", "analysis.token_cache", "analysis.hebrew_stem",
+                    "analysis.cluster_planner", "analysis.cluster_output", "analysis.frame_loader",
+                    "adapters.common.partition"],
+              kwargs={"argv": list(cluster_args or [])}, enabled=False),
+    ]
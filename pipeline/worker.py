@@ -0,0 +1,274 @@
+# pipeline/worker.py
+"""
+Resident worker: scrape -> preprocess -> cluster without paying startup every cycle.
+
+A cron run of main.py re-imports pandas/sklearn, re-reads the stopword file,
+reloads the processed window, rebuilds the dedup set and refits TF-IDF just to
+place a handful of new headlines. The worker does that once and keeps it:
+
+- stopwords       : frozenset (analysis.token_cache.read_stopwords)
+- seen keys       : record_key of every article in the window + everything ingested since
+- vector model    : the fitted TfidfVectorizer inside analysis.online_cluster.OnlineClusterer
+- window matrix   : L2-normalized rows of the last --window-hours, with their cluster ids
+
+Every --interval seconds it calls the scrapers, runs preprocess() in memory,
+drops keys it has seen, and places each new article with OnlineClusterer.add()
+(a few ms each). Assignments are appended to <out_dir>/assignments_<date>.jsonl.
+The scrapers still write data/raw/ as before; `main.py run` remains the batch
+path that builds data/processed/ and the full clustering outputs.
+
+Control socket (TCP, 127.0.0.1 only): one JSON line in, one JSON line out.
+
+    {"cmd": "status"}    counters, latency, window/cluster sizes
+    {"cmd": "poll"}      run a cycle now
+    {"cmd": "refit"}     rerun batch linkage on the in-memory window
+    {"cmd": "refresh"}   reload the window from data/processed and refit
+    {"cmd": "stop"}
+
+    python main.py worker                      # start (port 8765, poll every 5 min)
+    python main.py worker --ctl status         # talk to a running worker
+"""
+from __future__ import annotations
+
+import json
+import math
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from analysis.group_similar import apply_date_filters, load_articles, parse_article_dt
+from analysis.online_cluster import OnlineClusterer
+from analysis.preprocessing import preprocess
+from analysis.token_cache import read_stopwords
+from pipeline.instrument import count, measure, span
+
+DEFAULT_PORT = 8765
+Fetcher = Callable[[], List[dict]]
+
+
+def _fetch_n12() -> List[dict]:
+    from scraping.n12_scraper import get_n12_rss_headlines
+    return get_n12_rss_headlines() or []
+
+
+def _fetch_c14() -> List[dict]:
+    from adapters.c14_adapter import adapt_records
+    from scraping.channel14_scraper import get_c14_headlines
+    return adapt_records(get_c14_headlines() or [])
+
+
+DEFAULT_FETCHERS: Dict[str, Fetcher] = {"n12": _fetch_n12, "c14": _fetch_c14}
+
+
+def _epoch(values) -> List[Optional[float]]:
+    return [None if v is None or v != v else v.timestamp() for v in values]
+
+
+def _record_time(rec: dict) -> Optional[float]:
+    """Epoch seconds of a record's published_iso / scraped_at (None when neither parses)."""
+    for col in ("published_iso", "scraped_at"):
+        v = rec.get(col)
+        if v:
+            try:
+                return datetime.fromisoformat(str(v)).timestamp()
+            except ValueError:
+                continue
+    return None
+
+
+class Worker:
+    def __init__(self, processed_dir="data/processed", out_dir="data/worker", fetchers: Optional[Dict[str, Fetcher]] = None,
+                 threshold: float = 0.83, window_hours: float = 48, refit_every: int = 500,
+                 min_df: int = 2, max_df: float = 0.75, metrics_path=None):
+        self.processed_dir = processed_dir
+        self.out_dir = Path(out_dir)
+        self.fetchers = DEFAULT_FETCHERS if fetchers is None else fetchers
+        self.window_hours = window_hours
+        self.metrics_path = metrics_path
+        self.stopwords = read_stopwords()
+        self.clusterer = OnlineClusterer(threshold=threshold, min_df=min_df, max_df=max_df,
+                                         stop_words=self.stopwords, window_hours=window_hours,
+                                         refit_every=refit_every)
+        self.seen: set = set()
+        self.lock = threading.RLock()               # poll / control commands never overlap
+        self.latency_ms: deque = deque(maxlen=2000)
+        self.counters = {"polls": 0, "fetched": 0, "duplicates": 0, "ingested": 0, "new_clusters": 0,
+                         "fetch_errors": 0, "refits": 0}
+        self.started = time.time()
+        self.last_poll = None
+        self.address = None                         # (host, port) once serve() is listening
+
+    # --- state ---
+    def load_window(self) -> dict:
+        """(Re)load the recent window from processed files: seen keys + fitted model."""
+        with self.lock, span("load_window"):
+            df = load_articles(self.processed_dir, window_days=math.ceil(self.window_hours / 24) + 1)
+            if len(df):
+                df["_dt"] = parse_article_dt(df)
+                df = apply_date_filters(df, window_hours=int(self.window_hours))
+            keys = df["record_key"].astype(str).tolist() if "record_key" in df.columns else [str(i) for i in range(len(df))]
+            self.seen = set(keys)
+            info = self.clusterer.fit(df["text_for_cluster"].tolist() if len(df) else [], keys,
+                                      _epoch(df["_dt"]) if len(df) else [])
+            self.counters["refits"] += 1
+            print(f"[INFO] Worker window: {info['rows']} articles, {info['cols']} features, "
+                  f"{info['clusters']} clusters ({info['seconds']}s)")
+            return info
+
+    def refit(self) -> dict:
+        with self.lock:
+            info = self.clusterer.refit()
+            self.counters["refits"] += 1
+            return info
+
+    # --- ingest ---
+    def ingest(self, records: List[dict]) -> List[dict]:
+        """Preprocess + dedup + place a batch of raw/adapted records; returns the new assignments."""
+        with self.lock:
+            out = []
+            for raw in records:
+                t0 = time.perf_counter()                     # latency = preprocess + dedup + placement
+                processed = preprocess([raw])
+                if not processed:
+                    continue
+                rec = processed[0]
+                key = str(rec.get("record_key") or "")
+                text = str(rec.get("title_norm_min") or "").strip()
+                if not text:
+                    continue
+                if key in self.seen:
+                    self.counters["duplicates"] += 1
+                    continue
+                res = self.clusterer.add(text, key, _record_time(rec))
+                self.seen.add(key)
+                ms = (time.perf_counter() - t0) * 1000
+                self.latency_ms.append(ms)
+                self.counters["ingested"] += 1
+                self.counters["new_clusters"] += int(res["new_cluster"])
+                out.append({"record_key": key, "source": rec.get("source"), "title": rec.get("title"),
+                            "url": rec.get("url"), "published_iso": rec.get("published_iso"),
+                            **res, "latency_ms": round(ms, 3),
+                            "ingested_at": datetime.now().isoformat(timespec="seconds")})
+            if self.clusterer.needs_refit() and len(self.clusterer):
+                self.refit()
+            count("records_out", len(out))
+            self._write(out)
+            return out
+
+    def _write(self, rows: List[dict]) -> None:
+        if not rows:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with (self.out_dir / f"assignments_{datetime.now().date()}.jsonl").open("a", encoding="utf-8") as fh:
+            for r in rows:
+                fh.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    def poll(self) -> dict:
+        with measure("worker_poll", metrics_path=self.metrics_path):
+            records, errors = [], 0
+            for name, fetch in self.fetchers.items():        # network: outside the lock, status stays responsive
+                try:
+                    with span(f"fetch_{name}"):
+                        records += fetch() or []
+                except Exception as e:
+                    errors += 1
+                    print(f"[WARN] Worker fetch {name} failed: {e}")
+            count("records_in", len(records))
+            with self.lock:
+                self.counters["polls"] += 1
+                self.counters["fetched"] += len(records)
+                self.counters["fetch_errors"] += errors
+                with span("ingest"):
+                    new = self.ingest(records)
+            self.last_poll = datetime.now().isoformat(timespec="seconds")
+            print(f"[INFO] Worker poll: {len(records)} fetched, {len(new)} new, "
+                  f"{sum(r['new_cluster'] for r in new)} new clusters")
+            return {"fetched": len(records), "new": len(new)}
+
+    def status(self) -> dict:
+        lat = np.array(self.latency_ms) if self.latency_ms else None
+        return {"uptime_s": round(time.time() - self.started, 1), "last_poll": self.last_poll,
+                **self.counters, "seen_keys": len(self.seen), **self.clusterer.stats(),
+                "latency_ms_mean": round(float(lat.mean()), 3) if lat is not None else None,
+                "latency_ms_p95": round(float(np.percentile(lat, 95)), 3) if lat is not None else None}
+
+    # --- control ---
+    def handle(self, cmd: str) -> dict:
+        if cmd == "status":
+            return self.status()
+        if cmd == "poll":
+            return self.poll()
+        if cmd == "refit":
+            return self.refit()
+        if cmd == "refresh":
+            return self.load_window()
+        raise ValueError(f"unknown command {cmd!r}; expected status/poll/refit/refresh/stop")
+
+    def serve(self, port: int = DEFAULT_PORT, interval: float = 300, max_polls: Optional[int] = None) -> None:
+        stop = threading.Event()
+        server = ControlServer(("127.0.0.1", port), self, stop)
+        self.address = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[INFO] Worker listening on 127.0.0.1:{self.address[1]}, polling every {interval}s")
+        try:
+            polls = 0
+            while not stop.is_set():
+                self.poll()
+                polls += 1
+                if max_polls is not None and polls >= max_polls:
+                    break
+                stop.wait(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            print("[INFO] Worker stopped")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                cmd = json.loads(line).get("cmd")
+                if cmd == "stop":
+                    self.server.stop_event.set()
+                    reply = {"ok": True, "stopping": True}
+                else:
+                    reply = {"ok": True, **self.server.worker.handle(cmd)}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, worker: Worker, stop_event: threading.Event):
+        super().__init__(address, _Handler)
+        self.worker = worker
+        self.stop_event = stop_event
+
+
+def send_command(cmd: str, port: int = DEFAULT_PORT, host: str = "127.0.0.1", timeout: float = 60) -> dict:
+    with socket.create_connection((host, port), timeout=timeout) as s:
+        s.sendall((json.dumps({"cmd": cmd}) + "\n").encode("utf-8"))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode("utf-8"))
+
@@ -87,13 +87,15 @@
 
 # -*- coding: utf-8 -*-
 import os
-import json
 import re
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+
+from adapters.common.article import Article, write_articles
+from adapters.common.storage import data_path
+from pipeline.instrument import count as count_metric, span       # `count` is the item counter below
 
 MAX_ITEMS = 14 # TODO - Remove whenever needs more stories
 
@@ -210,6 +212,8 @@ def get_c14_headlines():
         print(f"Failed to fetch page: {resp.status_code}")
         return []
 
+    from bs4 import BeautifulSoup      # heavy; only needed once a page is actually fetched
+
     soup = BeautifulSoup(resp.text, "html.parser")
     now = datetime.now(DEFAULT_TZ)
 
@@ -252,21 +256,22 @@ def get_c14_headlines():
 
         published_iso = parse_hebrew_time(published_text_raw) if published_text_raw else None
 
-        headlines.append({
-            "title": title_raw,
-            "summary": summary_raw,                      # blank if it's a time label
-            "url": url_raw,
-            "published": published_text_raw,             # keep raw label for debugging (optional)
-            "published_iso": "",                         # add tho the adapter the ISO 8601 format later - YYYY-MM-DDTHH:MM:SS
-            "source": "c14",
-            "scraped_at": now.isoformat(timespec="seconds"),
-        })
+        headlines.append(Article(
+            title=title_raw,
+            summary=summary_raw,                         # blank if it's a time label
+            url=url_raw,
+            published=published_text_raw,                # keep raw label for debugging (optional)
+            published_iso="",                            # add tho the adapter the ISO 8601 format later - YYYY-MM-DDTHH:MM:SS
+            source="c14",
+            scraped_at=now.isoformat(timespec="seconds"),
+        ))
         count += 1
 
     os.makedirs("data/raw", exist_ok=True)
-    out_fn = f"data/raw/c14_scraped_{now.date()}.json"
-    with open(out_fn, "w", encoding="utf-8") as f:
-        json.dump(headlines, f, ensure_ascii=False, indent=2)
+    out_fn = data_path(f"data/raw/c14_scraped_{now.date()}")
+    with span("json_write"):
+        write_articles(out_fn, headlines)
+    count_metric("records_out", len(headlines))
 
     print(f"Saved {len(headlines)} headlines to {out_fn}")
     return headlines
@@ -1,9 +1,10 @@
 import feedparser
-import json
 import os
 from datetime import datetime
 from time import mktime
 
+from adapters.common.storage import data_path, write_records
+
 def get_kan11_rss_headlines():
     url = "https://www.kan.org.il/rss/news.xml"  # Main news RSS
     feed = feedparser.parse(url)
@@ -27,9 +28,8 @@ def get_kan11_rss_headlines():
         })
 
     os.makedirs("data/raw", exist_ok=True)
-    filename = f"data/raw/kan11_rss_{datetime.now().date()}.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(headlines, f, ensure_ascii=False, indent=2)
+    filename = data_path(f"data/raw/kan11_rss_{datetime.now().date()}")
+    write_records(filename, headlines)
 
     print(f"Saved {len(headlines)} headlines to {filename}")
     return headlines
@@ -0,0 +1,55 @@
+import json
+
+from adapters.common.article import Article, ArticleBatch, read_articles, write_articles
+from analysis.bench.synthetic_corpus import generate_raw
+from analysis.preprocessing import preprocess
+
+
+def test_json_round_trip_is_exact(tmp_path):
+    raw = generate_raw(50, seed=4)                 # includes event_id -> Article.extra
+    del raw[0]["summary"]                          # a missing field stays missing
+    path = tmp_path / "raw.json"
+    write_articles(path, [Article.from_dict(r) for r in raw])
+    assert json.loads(path.read_text(encoding="utf-8")) == raw
+    back = read_articles(path)
+    assert [a.to_dict() for a in back] == raw
+    assert "summary" not in back[0] and back[0].get("summary") is None
+    assert Article.from_json(back[1].to_json()) == raw[1]
+
+
+def test_dict_style_access_and_interned_source():
+    a = Article(title="כותרת", source="".join(["n", "12"]), url="https://x/1")
+    b = Article.from_dict(json.loads('{"source": "n12", "title": "t"}'))
+    assert a.source is b.source
+    assert a["title"] == "כותרת" and a.get("published") is None and "url" in a and "summary" not in a
+    a["event_id"] = 3
+    a["summary"] = "s"
+    assert a["event_id"] == 3 and a.keys() == ["title", "summary", "url", "source", "event_id"]
+    c = a.copy()
+    c["title"] = "other"
+    assert a["title"] == "כותרת" and c.extra is not a.extra
+    try:
+        b["summary"]
+        assert False, "missing field should raise KeyError"
+    except KeyError:
+        pass
+
+
+def test_batch_columns_and_preprocess_output():
+    raw = generate_raw(30, seed=1)
+    out = preprocess(raw)
+    assert all(isinstance(r, Article) for r in out)
+    assert all("record_key" in r and "title_norm_min" in r for r in out)
+    assert raw == generate_raw(30, seed=1)          # input dicts untouched
+    batch = ArticleBatch.from_records(out)
+    assert len(batch) == len(out)
+    assert batch.column("title") == [r["title"] for r in out]
+    assert batch.to_records() == [r.to_dict() for r in out]
+    assert list(batch.to_frame().columns) == list(batch.columns)
+
+
+def test_batch_keeps_missing_and_none_apart():
+    recs = [{"title": "a"}, {"title": "b", "url_id": None}, {"title": "c", "summary": "s"}]
+    batch = ArticleBatch.from_records(recs)
+    assert batch.column("url_id") == [None, None, None]
+    assert batch.to_records() == recs
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("pandas", "numpy", "sklearn", "scipy", "bs4")
+
+PROBE = """
+import sys, main
+main.main({argv!r})
+sys.stdout.write("\\nLOADED " + " ".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def _loaded(argv):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(argv=argv, heavy=HEAVY)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return out.rsplit("LOADED", 1)[1].split()
+
+
+def _cold_start(code, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_light_commands_do_not_import_the_analysis_stack(tmp_path):
+    assert _loaded(["run", "--list", "--state-dir", str(tmp_path)]) == []
+    assert _loaded(["run", "--dry-run", "--state-dir", str(tmp_path), "--metrics", ""]) == []
+    assert _loaded(["report", "--clustered-dir", str(tmp_path), "--metrics", str(tmp_path / "m.jsonl")]) == []
+    assert _loaded(["query", "עזה", "--index-dir", str(tmp_path)]) == ["numpy"]            # mmap'd index, no pandas/scipy
+
+
+def test_scraper_modules_import_light():
+    code = ("import sys, scraping.n12_scraper, scraping.channel14_scraper\n"
+            f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == []
+
+
+def test_cold_start_is_well_below_analysis_import():
+    cli = _cold_start("import main; main.build_parser()")
+    heavy = _cold_start("import pandas, sklearn.cluster", repeat=1)
+    assert cli < heavy / 2, (cli, heavy)
+
+
+def test_query_parser_matches_search_index():
+    import argparse
+
+    import main
+    from adapters.common.storage import DEFAULT_EXT
+    from analysis.search_index import add_query_arguments
+
+    sub = next(a for a in main.build_parser()._actions if isinstance(a, argparse._SubParsersAction))
+    ours, theirs = sub.choices["query"], add_query_arguments(argparse.ArgumentParser())
+    assert set(ours._option_string_actions) == set(theirs._option_string_actions)
+    argv = ["עזה", "רפיח", "--days", "7", "--source", "n12", "--per-source", "3", "--any"]
+    assert vars(ours.parse_args(argv)) == vars(theirs.parse_args(argv))
+    # migrate / compact reuse the modules' own parsers
+    assert sub.choices["compact"].parse_args(["--prefix", "x"]).prefix == "x"
+    assert sub.choices["migrate"].parse_args([]).to == DEFAULT_EXT
@@ -0,0 +1,81 @@
+from adapters.common import partition, storage
+from analysis import group_similar
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.streaming_tfidf import build_archive
+from pipeline.compact import compact, prune_runs
+
+RECS = [{"title": f"t{i}", "source": ["n12", "c14", None][i % 3], "n": i, "none": None} for i in range(30)]
+
+
+def _by_source(recs):
+    return sorted(recs, key=lambda r: r.get("source") or "")
+
+
+def test_partition_footer_and_pushdown(tmp_path):
+    recs = RECS + [{"title": "no source key", "extra": [1, 2]}]
+    p = tmp_path / "combined_2025-08.partition"
+    footer = partition.write_partition(p, {"2025-08-02": recs[:10], "2025-08-01": recs[10:]})
+    assert footer == partition.read_footer(p) and footer["month"] == "2025-08" and footer["rows"] == len(recs)
+    day1 = footer["days"]["2025-08-01"]
+    assert day1["rows"] == [0, 21] and set(day1["sources"]) == {"", "c14", "n12"}
+    assert list(partition.iter_partition_records(p, days=["2025-08-01"])) == _by_source(recs[10:])  # exact, incl. missing keys
+
+    n, cols, missing = partition.read_partition(p, columns=["title"], days=["2025-08-02"], sources=["n12"])
+    assert n == 4 and set(cols) == {"title", "_file_date"} and not missing
+    assert cols["title"] == [r["title"] for r in recs[:10] if r["source"] == "n12"]
+    assert set(cols["_file_date"]) == {"2025-08-02"}
+
+
+def test_compact_then_load_transparently(tmp_path):
+    processed = tmp_path / "processed"
+    write_corpus(generate_corpus(400, seed=3, days=30), processed, ext=".jsonl.gz")
+    days = [storage.base_name(f)[-10:] for f in storage.data_files(processed, "combined_")]
+    before = group_similar.load_articles(str(processed), columns=None)
+    window = group_similar.load_articles(str(processed), date_from="2025-09-10", date_to="2025-09-12")
+
+    out = compact(processed, today=days[-1], open_days=2)
+    left = [storage.base_name(f) for f in storage.data_files(processed)]
+    assert left == [f"combined_{d}" for d in days[-2:]]                      # the open days stay daily
+    assert out["days"] == len(days) - 2 and [p.name for p in partition.partition_files(processed)] == \
+        ["combined_2025-08.partition", "combined_2025-09.partition"]
+
+    after = group_similar.load_articles(str(processed), columns=None)
+    assert sorted(after["record_key"]) == sorted(before["record_key"]) and len(after.columns) == len(before.columns)
+    parts = group_similar.select_parts(str(processed), date_from="2025-09-10", date_to="2025-09-12")
+    assert parts == [(processed / "combined_2025-09.partition", ["2025-09-10", "2025-09-11", "2025-09-12", "2025-09-13"])]
+    again = group_similar.load_articles(str(processed), date_from="2025-09-10", date_to="2025-09-12")
+    assert sorted(again["record_key"]) == sorted(window["record_key"])
+
+    # a rewritten daily file wins over its day in the partition, and the next compaction merges it in
+    day = "2025-09-11"
+    one = [r for r in partition.iter_partition_records(processed / "combined_2025-09.partition", days=[day])][:1]
+    storage.write_records(storage.data_path(processed / f"combined_{day}"), one)
+    df = group_similar.load_articles(str(processed), date_from=day, date_to=day, columns=None)
+    assert (df["_file_date"] == day).sum() == 1
+    compact(processed, today=days[-1], open_days=2)
+    assert list(partition.iter_partition_records(processed / "combined_2025-09.partition", days=[day])) == one
+    assert not (processed / f"combined_{day}.jsonl.gz").exists()
+
+
+def test_streaming_tfidf_reads_partitions(tmp_path):
+    processed = tmp_path / "processed"
+    write_corpus(generate_corpus(200, seed=4, days=4), processed)
+    a = build_archive(str(processed), str(tmp_path / "a"), chunk_rows=64)
+    compact(processed, today="2025-08-30")
+    assert not storage.data_files(processed, "combined_")
+    b = build_archive(str(processed), str(tmp_path / "b"), chunk_rows=64)
+    assert (a["n_docs"], a["n_features"]) == (b["n_docs"], b["n_features"])
+
+
+def test_prune_runs_retention(tmp_path):
+    names = ["2025-05-03_10-00-00", "2025-05-20_10-00-00",                 # old month -> keep the last
+             "2025-08-01_08-00-00", "2025-08-01_20-00-00",                 # recent day -> keep the last
+             "2025-08-20_01-00-00", "2025-08-20_02-00-00", "2025-08-20_03-00-00"]
+    for n in names + ["lineage"]:
+        (tmp_path / n).mkdir()
+        (tmp_path / n / "clusters_summary.csv").write_text("x", encoding="utf-8")
+    out = prune_runs(tmp_path, keep_last=2, daily_days=30, today="2025-08-25", dry_run=True)
+    assert out["removed"] == 3 and (tmp_path / names[0]).exists()
+    prune_runs(tmp_path, keep_last=2, daily_days=30, today="2025-08-25")
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ["2025-05-20_10-00-00", "2025-08-01_20-00-00", "2025-08-20_02-00-00", "2025-08-20_03-00-00", "lineage"]
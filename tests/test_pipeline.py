@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+
+from pipeline.runner import Pipeline, Stage
+
+
+def _chain(tmp_path, calls, copy_fn=None):
+    src, mid, out = tmp_path / "in.txt", tmp_path / "mid.txt", tmp_path / "out.txt"
+
+    def make_mid():
+        calls.append("mid")
+        mid.write_text(src.read_text() + "!")
+
+    def make_out():
+        calls.append("out")
+        out.write_text(mid.read_text().upper())
+
+    return [
+        Stage("mid", copy_fn or make_mid, inputs=[str(src)], outputs=[str(mid)]),
+        Stage("out", make_out, inputs=[str(mid)], outputs=[str(out)], deps=["mid"]),
+    ]
+
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    calls = []
+    Pipeline(_chain(tmp_path, calls), state_dir=tmp_path / "st").run()
+    report = Pipeline(_chain(tmp_path, calls), state_dir=tmp_path / "st").run()
+    assert calls == ["mid", "out"]
+    assert {r["status"] for r in report.values()} == {"cached"}
+
+
+def test_changed_input_reruns_downstream(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    calls = []
+    Pipeline(_chain(tmp_path, calls), state_dir=tmp_path / "st").run()
+    (tmp_path / "in.txt").write_text("bb")
+    Pipeline(_chain(tmp_path, calls), state_dir=tmp_path / "st").run()
+    assert calls == ["mid", "out", "mid", "out"]
+    assert (tmp_path / "out.txt").read_text() == "BB!"
+
+
+def test_changed_code_or_missing_output_reruns(tmp_path):
+    (tmp_path / "in.txt").write_text("a")
+    calls = []
+    Pipeline(_chain(tmp_path, calls), state_dir=tmp_path / "st").run()
+
+    def make_mid_v2():
+        calls.append("mid2")
+        (tmp_path / "mid.txt").write_text("a!")     # same bytes -> "out" stays cached
+
+    Pipeline(_chain(tmp_path, calls, make_mid_v2), state_dir=tmp_path / "st").run()
+    assert calls == ["mid", "out", "mid2"]
+    (tmp_path / "out.txt").unlink()
+    Pipeline(_chain(tmp_path, calls, make_mid_v2), state_dir=tmp_path / "st").run()
+    assert calls[-1] == "out"
+
+
+def test_from_until_and_disabled_stages(tmp_path):
+    noop = lambda: None
+    pipe = Pipeline([Stage("a", noop), Stage("b", noop), Stage("c", noop, deps=["a", "b"]),
+                     Stage("d", noop, deps=["c"], enabled=False)], state_dir=tmp_path)
+    assert pipe.levels == [["a", "b"], ["c"], ["d"]]
+    assert pipe.select() == ["a", "b", "c"]
+    assert pipe.select(start=["c"]) == ["c"]
+    assert pipe.select(until=["d"]) == ["a", "b", "c", "d"]
+    assert pipe.select(start=["b"], until=["c"]) == ["b", "c"]
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)    # deadlocks (BrokenBarrierError) if run one by one
+    pipe = Pipeline([Stage("x", barrier.wait, always=True), Stage("y", barrier.wait, always=True)],
+                    state_dir=tmp_path, workers=2)
+    report = pipe.run()
+    assert [r["status"] for r in report.values()] == ["ok", "ok"]
+
+
+def test_failure_is_reported_and_not_cached(tmp_path):
+    def boom():
+        raise RuntimeError("no network")
+
+    pipe = Pipeline([Stage("a", boom), Stage("b", lambda: None, deps=["a"])], state_dir=tmp_path)
+    report = pipe.run()
+    assert report["a"]["status"] == "failed" and report["b"]["status"] == "ok"
+    assert Pipeline(pipe.stages.values(), state_dir=tmp_path).run()["a"]["status"] == "failed"
+
+
+def test_ctrl_c_stops_the_run(tmp_path):
+    calls = []
+
+    def interrupt():
+        raise KeyboardInterrupt
+
+    stages = [Stage("a", lambda: calls.append("a")), Stage("b", interrupt, deps=["a"]),
+              Stage("c", lambda: calls.append("c"), deps=["b"])]
+    with pytest.raises(KeyboardInterrupt):
+        Pipeline(stages, state_dir=tmp_path).run()
+    assert calls == ["a"]
+    stages[1] = Stage("b", lambda: None, deps=["a"])
+    report = Pipeline(stages, state_dir=tmp_path).run()
+    assert report["a"]["status"] == "cached" and calls == ["a", "c"]
+
+
+def test_stage_metrics_and_profile(tmp_path):
+    import json
+    from pipeline.instrument import count, span
+
+    def work():
+        with span("build"):
+            data = [str(i) for i in range(20000)]
+        count("records_in", 3)
+        count("records_out", len(data))
+        (tmp_path / "out.txt").write_text("\n".join(data))
+
+    metrics = tmp_path / "metrics.jsonl"
+    pipe = Pipeline([Stage("w", work, always=True)], state_dir=tmp_path / "st", metrics_path=metrics,
+                    profile=["w"], profile_dir=tmp_path / "prof")
+    pipe.run()
+    pipe.run()
+    lines = [json.loads(x) for x in metrics.read_text().splitlines()]
+    assert len(lines) == 2 and lines[0]["run_id"] == lines[1]["run_id"]
+    m = lines[0]
+    assert m["status"] == "ok" and m["records_in"] == 3 and m["records_out"] == 20000
+    assert m["wall_s"] >= m["spans"]["build"] > 0
+    assert m["peak_rss_mb"] is None or m["peak_rss_mb"] > 0
+    assert (tmp_path / "prof").joinpath(f"{m['run_id']}_w.prof").exists()
+    assert "top allocation sites" in open(m["tracemalloc"], encoding="utf-8").read()
+
+
+def test_helpers_are_noops_outside_a_stage():
+    from pipeline.instrument import count, span
+    count("records_in", 5)
+    with span("x"):
+        pass
@@ -0,0 +1,119 @@
+import csv
+import http.client
+import json
+import threading
+
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+from analysis.search_index import build
+from pipeline.service import QueryService, ServiceServer, TTLCache
+
+
+def _write_csv(path, rows):
+    with path.open("w", encoding="utf-8-sig", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def _run(clustered, name, clusters, events=True):
+    """clusters: {cluster id: [source per article]}"""
+    d = clustered / name
+    d.mkdir(parents=True)
+    arts = [{"cluster": c, "cluster_size": len(s), "source": src, "published": f"2025-08-2{i % 9}T10:00:00+03:00",
+             "title": f"כותרת {c}.{i}", "url": f"u{c}.{i}", "record_key": f"{src}:{c}.{i}"}
+            for c, s in clusters.items() for i, src in enumerate(s)]
+    _write_csv(d / "articles.csv", arts)
+    _write_csv(d / "clusters_summary.csv", [{"cluster": c, "cluster_size": len(s), "sources": ", ".join(sorted(set(s))),
+                                             "example_title": f"כותרת {c}.0"} for c, s in clusters.items()])
+    if events:
+        _events(d, clusters)
+
+
+def _events(d, clusters):
+    _write_csv(d / "cluster_events.csv", [{"cluster": c, "event_id": f"E{c:06d}", "status": "new"} for c in clusters])
+
+
+def _service(tmp_path):
+    clustered = tmp_path / "clustered"
+    _run(clustered, "2025-08-28_10-00-00", {0: ["n12", "c14", "n12"], 1: ["n12", "n12"], 2: ["c14"], 3: ["kan11"]})
+    write_corpus(generate_corpus(300, seed=1, days=5), tmp_path / "processed")
+    build(tmp_path / "processed", tmp_path / "index")
+    return QueryService(clustered, tmp_path / "index"), clustered
+
+
+def _json(svc, path, **q):
+    status, body, etag, state = svc.get(path, {k: str(v) for k, v in q.items()})
+    return status, json.loads(body), state
+
+
+def test_endpoints(tmp_path):
+    svc, _ = _service(tmp_path)
+    status, latest, _ = _json(svc, "/clusters/latest", top=2)
+    assert status == 200 and [r["cluster"] for r in latest["top"]] == ["0", "1"] and latest["articles"] == 7
+    assert latest["top"][0]["event_id"] == "E000000"
+    assert [r["cluster"] for r in _json(svc, "/clusters/latest", source="kan11")[1]["top"]] == ["3"]
+    _, detail, _ = _json(svc, "/clusters/0")
+    assert detail["cluster_size"] == 3 and len(detail["articles"]) == 3 and detail["event_id"] == "E000000"
+
+    _, outlets, _ = _json(svc, "/outlets")
+    assert outlets["outlets"]["n12"] == {"articles": 4, "clusters": 2, "shared": 1, "exclusive": 1}
+    assert outlets["outlets"]["c14"]["exclusive"] == 0 and outlets["shared_clusters"] == {"c14|n12": 1}
+
+    word = generate_corpus(300, seed=1, days=5)[0]["title_norm_min"].split()[0]
+    status, res, _ = _json(svc, "/search", q=word, per_source=2)
+    assert status == 200 and res["total"] > 0 and len(res["hits"]) <= 2 * len(res["by_source"])
+    _, topic, _ = _json(svc, "/outlets", q=word)
+    assert {s: o["articles"] for s, o in topic["outlets"].items()} == res["by_source"]
+
+    assert _json(svc, "/clusters/99")[0] == 404
+    assert _json(svc, "/nope")[0] == 404
+    assert _json(svc, "/search")[0] == 400
+    assert _json(svc, "/search", q=word, **{"from": "yesterday"})[0] == 400
+
+
+def test_cache_and_invalidation(tmp_path):
+    svc, clustered = _service(tmp_path)
+    assert _json(svc, "/clusters/latest")[2] == "miss"
+    assert _json(svc, "/clusters/latest")[2] == "hit"
+    assert _json(svc, "/clusters/latest", top=3)[2] == "miss"                   # other query string, other entry
+    _run(clustered, "2025-08-29_10-00-00", {7: ["n12", "c14"]})                  # a new run lands
+    status, latest, state = _json(svc, "/clusters/latest")
+    assert state == "miss" and latest["run"] == "2025-08-29_10-00-00" and svc.invalidations == 1
+    assert _json(svc, "/clusters/0", run="2025-08-28_10-00-00")[0] == 200       # older runs stay reachable
+
+    # a run caught between clusters_summary.csv and cluster_events.csv picks the events up once they land
+    _run(clustered, "2025-08-30_10-00-00", {8: ["n12", "c14"]}, events=False)
+    assert _json(svc, "/clusters/latest")[1]["top"][0]["event_id"] is None
+    _events(clustered / "2025-08-30_10-00-00", {8: None})
+    status, latest, state = _json(svc, "/clusters/latest")
+    assert state == "miss" and latest["top"][0]["event_id"] == "E000008"
+
+    c = TTLCache(maxsize=2, ttl=60)
+    for k in "abc":
+        c.put(k, k)
+    assert c.get("a") is None and c.get("c") == "c" and len(c) == 2
+    c.ttl = -1
+    assert c.get("c") is None
+
+
+def test_http_etag_and_read_only(tmp_path):
+    svc, _ = _service(tmp_path)
+    server = ServiceServer(("127.0.0.1", 0), svc)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+        conn.request("GET", "/clusters/latest?top=1")
+        r = conn.getresponse()
+        body, etag = r.read(), r.getheader("ETag")
+        assert r.status == 200 and json.loads(body)["top"][0]["cluster"] == "0" and etag
+        conn.request("GET", "/clusters/latest?top=1", headers={"If-None-Match": etag})
+        r = conn.getresponse()
+        assert r.status == 304 and r.read() == b""
+        conn.request("POST", "/clusters/latest", body=b"{}")
+        r = conn.getresponse()
+        r.read()
+        assert r.status == 405
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import pytest
+
+from adapters.common import storage
+from analysis import group_similar
+from analysis.bench.synthetic_corpus import generate_corpus, write_corpus
+
+RECS = [{"title": "כותרת\nשנייה", "source": "n12", "n": i, "none": None} for i in range(50)]
+
+
+@pytest.mark.parametrize("ext", [".json", ".jsonl", ".jsonl.gz", ".json.gz", ".jsonl.zst"])
+def test_round_trip_every_format(tmp_path, ext):
+    if ext.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    p = storage.write_records(storage.data_path(tmp_path / "n12_rss_2025-08-22", ext), RECS)
+    assert p.name == "n12_rss_2025-08-22" + ext and storage.base_name(p) == "n12_rss_2025-08-22"
+    assert storage.read_records(p) == RECS
+    assert list(storage.iter_records(p)) == RECS
+    assert not [f for f in tmp_path.iterdir() if f.name.startswith(".")]        # no temp file left
+
+
+def test_detect_and_compression(tmp_path):
+    assert storage.detect("a/combined_2025-08-22.jsonl.gz") == ("jsonl", "gz")
+    assert storage.detect("x.json") == ("json", None)
+    with pytest.raises(ValueError):
+        storage.detect("articles.csv")
+    old = storage.write_records(tmp_path / "a.json", RECS * 20)                     # indent=2, the old layout
+    new = storage.write_records(tmp_path / "b.jsonl.gz", RECS * 20)
+    assert new.stat().st_size * 5 < old.stat().st_size
+    with gzip.open(new, "rt", encoding="utf-8") as fh:                           # plain gzip'd JSONL
+        assert json.loads(fh.readline()) == RECS[0]
+
+
+@pytest.mark.parametrize("ext", [".jsonl.gz", ".json.gz"])
+def test_gzip_output_is_deterministic(tmp_path, monkeypatch, ext):
+    a = storage.write_records(tmp_path / f"a_2025-08-22{ext}", RECS).read_bytes()
+    monkeypatch.setattr("time.time", lambda: 2_000_000_000.0)                     # a later run
+    monkeypatch.setattr("os.getpid", lambda: 99999)                               # other temp file name
+    b = storage.write_records(tmp_path / f"a_2025-08-22{ext}", RECS).read_bytes()
+    assert a == b
+    with storage.open_data(tmp_path / f"a_2025-08-22{ext}", "ab") as fh:         # append still works
+        fh.write(b"")
+    assert storage.read_records(tmp_path / f"a_2025-08-22{ext}") == RECS
+
+
+def test_blank_lines_and_rewrite_replaces_old_format(tmp_path):
+    p = tmp_path / "x.jsonl"
+    p.write_text("\n" + json.dumps(RECS[0]) + "\n\n  \n" + json.dumps(RECS[1]) + "\n", encoding="utf-8")
+    assert storage.read_records(p) == RECS[:2] == list(storage.iter_records(p))
+    storage.write_records(tmp_path / "day_2025-08-22.json", RECS)
+    storage.write_records(tmp_path / "day_2025-08-22.jsonl.gz", RECS[:3])
+    assert [f.name for f in storage.data_files(tmp_path, "day_")] == ["day_2025-08-22.jsonl.gz"]
+
+
+def test_migrate_and_read_back(tmp_path):
+    processed = tmp_path / "processed"
+    write_corpus(generate_corpus(300, seed=5), processed)                        # old .json files
+    before = group_similar.load_articles(str(processed), columns=None)
+    listed = storage.migrate([processed], to=".jsonl.gz", dry_run=True)
+    assert listed["files"] > 0 and all(f.suffix == ".json" for f in storage.data_files(processed))
+    out = storage.migrate([processed], to=".jsonl.gz")
+    assert out["files"] == listed["files"] and out["bytes_after"] * 4 < out["bytes_before"]
+    assert all(f.name.endswith(".jsonl.gz") for f in storage.data_files(processed))
+    after = group_similar.load_articles(str(processed), columns=None)
+    assert after["record_key"].tolist() == before["record_key"].tolist()
+    assert storage.migrate([processed], to=".jsonl.gz")["files"] == 0              # idempotent